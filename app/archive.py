@@ -0,0 +1,100 @@
+"""
+Архив подписок на прошедшие олимпиады.
+
+Ключ (olympiad_id, profile) считается завершённым, если в каталоге у него есть даты и все
+события (для диапазонов — их конец) в прошлом. Подписки на такие ключи переносятся в subscriptions_archive: ежедневная рассылка
+и «Мои подписки» их больше не читают. Если в таблице следующего сезона тот же id снова с
+будущими датами (или пока без дат), подписки возвращаются. После переноса — ANALYZE и, если
+в файле много свободных страниц, VACUUM.
+
+Даты без года тоже могут закончиться: год им подбирается от опорной даты каталога. Если таблицу
+давно не обновляли (опорная дата старше STALE_DAYS) или в архив разом уходит больше
+ARCHIVE_MAX_SHARE подписанных ключей, перенос не выполняется — только предупреждение в лог;
+/archive force переносит всё равно.
+"""
+import asyncio
+import logging
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from telegram.ext import ContextTypes
+
+from app import catalog, config, database
+from app.dates import GRACE_DAYS, parse_events
+
+# Опорная дата старше этого — все даты без года уже в прошлом: таблица явно устарела
+STALE_DAYS = 365 - GRACE_DAYS
+
+
+def is_expired(cell: str, today: date, reference: Optional[date] = None) -> bool:
+    """В ячейке есть даты, и все события закончились до today. Пустая ячейка / «ПОКА РАНО» — не завершена."""
+    events = parse_events(cell, reference or today)
+    return bool(events) and max(last for _, last, _ in events) < today
+
+
+def find_changes(
+    lookup: Dict[tuple, Dict], subscribed: set, archived: set, today: date, reference: Optional[date] = None
+) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """(ключи в архив, ключи из архива). Ключи, которых нет в каталоге, не трогаем."""
+    def expired_key(k):
+        return is_expired(lookup[k]["date_desc"], today, reference)
+
+    expired = sorted(k for k in subscribed if k in lookup and expired_key(k))
+    revived = sorted(k for k in archived if k in lookup and not expired_key(k))
+    return expired, revived
+
+
+def hold_reason(expired: int, active: int, today: date, reference: date) -> Optional[str]:
+    """Почему перенос в архив подозрителен (None — можно переносить)."""
+    if (today - reference).days > STALE_DAYS:
+        return f"опорная дата каталога {reference:%d.%m.%Y} старше {STALE_DAYS} дней"
+    if config.ARCHIVE_MAX_SHARE and expired > config.ARCHIVE_MAX_SHARE * active:
+        return f"в архив уходят {expired} из {active} ключей (больше ARCHIVE_MAX_SHARE)"
+    return None
+
+
+async def run(today: Optional[date] = None, force: bool = False) -> Dict[str, object]:
+    t0 = time.perf_counter()
+    today = today or datetime.now(config.TIMEZONE).date()
+    lookup = await catalog.lookup()
+    subscribed, archived = await asyncio.gather(
+        asyncio.to_thread(database.get_subscribed_keys), asyncio.to_thread(database.get_archived_keys)
+    )
+    reference = catalog.reference_date()
+    expired, revived = find_changes(lookup, subscribed, archived, today, reference)
+    held = None if force else hold_reason(len(expired), sum(1 for k in subscribed if k in lookup), today, reference)
+    if held:
+        logging.warning("Архивация %d ключей пропущена: %s; /archive force — перенести всё равно", len(expired), held)
+        expired = []
+
+    moved = await asyncio.to_thread(database.archive_subscriptions, expired) if expired else 0
+    restored = await asyncio.to_thread(database.restore_subscriptions, revived) if revived else 0
+    compact = await asyncio.to_thread(database.compact_db)
+    hot, cold = await asyncio.to_thread(database.get_archive_counts)
+    res = {
+        "held": held,
+        "archived_keys": len(expired),
+        "archived": moved,
+        "restored_keys": len(revived),
+        "restored": restored,
+        "subscriptions": hot,
+        "archive": cold,
+        "vacuumed": compact["vacuumed"],
+        "size_bytes": compact["size_bytes"],
+        "seconds": time.perf_counter() - t0,
+    }
+    logging.info(
+        "Архивация: в архив %d подписок (%d ключей), возвращено %d (%d ключей), "
+        "в работе %d, в архиве %d, VACUUM: %s, %.1f с",
+        moved, len(expired), restored, len(revived), hot, cold, "да" if compact["vacuumed"] else "нет",
+        res["seconds"],
+    )
+    return res
+
+
+async def job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    try:
+        await run()
+    except Exception:
+        logging.exception("Ошибка архивации подписок")
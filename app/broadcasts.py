@@ -0,0 +1,173 @@
+"""
+Рассылки-кампании.
+
+Рассылка сохраняется в таблице broadcasts и выполняется фоновой задачей — хендлер админа
+возвращается сразу. Курсор (user_id получателя) записывается в БД наперёд, на окно из SAVE_EVERY
+получателей: после рестарта рассылка продолжается за последним окном и никому не приходит
+дважды (получатели недосланного окна остаются без сообщения). Запросы к БД идут в отдельном
+потоке и не держат event loop.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from telegram.ext import Application
+
+from app import database, metrics
+from app.delivery import BLOCKED, SENT, send_chunks
+from app.ui import split_text
+
+PAGE_SIZE = 500      # получателей за один запрос к БД
+RECORD_EVERY = 100   # как часто сохранять состояние доставки (app.database.record_deliveries)
+SAVE_EVERY = 50      # на сколько получателей вперёд записывается курсор
+
+
+class _Progress:
+    """Живой прогресс рассылки, которая выполняется в этом процессе."""
+
+    def __init__(self, row: Dict):
+        self.started = time.monotonic()
+        self.processed = 0
+        self.sent = row["sent"]
+        self.failed = row["failed"]
+        self.skipped = row["skipped"]
+        self.cancelled = False
+
+
+_running: Dict[int, _Progress] = {}
+
+
+def audience_title(audience: str) -> str:
+    kind, _, value = audience.partition(":")
+    if kind == "profile":
+        return f"профиль «{value}»"
+    if kind == "olympiad":
+        return f"олимпиада «{value}»"
+    return "все пользователи"
+
+
+async def start(app: Application, text: str, audience: str, admin_chat: int) -> Tuple[int, int]:
+    """Создаёт рассылку и запускает её в фоне. Возвращает (id, число получателей)."""
+    total = await asyncio.to_thread(database.count_audience, audience)
+    broadcast_id = await asyncio.to_thread(database.create_broadcast, text, audience, admin_chat, total)
+    _spawn(app, broadcast_id)
+    return broadcast_id, total
+
+
+def resume(app: Application) -> List[int]:
+    """Продолжает рассылки, прерванные остановкой бота."""
+    ids = []
+    for row in database.get_broadcasts("running", limit=1000):
+        if row["id"] not in _running:
+            _spawn(app, row["id"])
+            ids.append(row["id"])
+    if ids:
+        logging.info("Продолжаю рассылки: %s", ", ".join(map(str, ids)))
+    return ids
+
+
+async def cancel(broadcast_id: int) -> bool:
+    row = await asyncio.to_thread(database.get_broadcast, broadcast_id)
+    if not row or row["status"] != "running":
+        return False
+    await asyncio.to_thread(database.finish_broadcast, broadcast_id, "cancelled")
+    prog = _running.get(broadcast_id)
+    if prog:
+        prog.cancelled = True
+    return True
+
+
+def _spawn(app: Application, broadcast_id: int) -> None:
+    row = database.get_broadcast(broadcast_id)
+    _running[broadcast_id] = _Progress(row)
+    app.create_task(_run(app.bot, broadcast_id))
+
+
+async def _run(bot, broadcast_id: int) -> None:
+    prog = _running[broadcast_id]
+    try:
+        row = await asyncio.to_thread(database.get_broadcast, broadcast_id)
+        chunks = split_text(row["text"])
+        cursor = reserved = row["cursor"]
+        blocked = await asyncio.to_thread(database.get_blocked_user_ids)
+        outcomes: Dict[int, str] = {}
+        while not prog.cancelled:
+            page = await asyncio.to_thread(database.get_audience_page, row["audience"], cursor, PAGE_SIZE)
+            if not page:
+                break
+            for i, uid in enumerate(page):
+                if prog.cancelled:
+                    break
+                cursor = uid
+                if uid in blocked:
+                    prog.skipped += 1
+                    metrics.MESSAGES_SKIPPED.inc(kind="broadcast")
+                    continue
+                # Курсор — до отправки и сразу на окно вперёд: после падения получатели окна
+                # не получат сообщение повторно
+                if uid > reserved:
+                    reserved = page[min(i + SAVE_EVERY, len(page)) - 1]
+                    await asyncio.to_thread(
+                        database.save_broadcast_progress, broadcast_id, reserved, prog.sent, prog.failed, prog.skipped
+                    )
+                res = await send_chunks(bot, uid, chunks, kind="broadcast")
+                outcomes[uid] = res
+                if res == SENT:
+                    prog.sent += 1
+                else:
+                    prog.failed += 1
+                    if res == BLOCKED:
+                        blocked.add(uid)
+                prog.processed += 1
+                if len(outcomes) >= RECORD_EVERY:
+                    await asyncio.to_thread(database.record_deliveries, outcomes)
+                    outcomes = {}
+        await asyncio.to_thread(
+            database.save_broadcast_progress, broadcast_id, cursor, prog.sent, prog.failed, prog.skipped
+        )
+        await asyncio.to_thread(database.record_deliveries, outcomes)
+        if prog.cancelled:
+            return
+        await asyncio.to_thread(database.finish_broadcast, broadcast_id, "done")
+        await bot.send_message(
+            chat_id=row["admin_chat"],
+            text=(
+                f"✅ Рассылка #{broadcast_id} завершена ({audience_title(row['audience'])}).\n"
+                f"Получателей: {prog.sent + prog.failed}\nУспешно: {prog.sent}\n"
+                f"Ошибок: {prog.failed}\nПропущено недоступных: {prog.skipped}"
+            ),
+        )
+    except Exception:
+        logging.exception("Рассылка #%s прервана; продолжится после перезапуска", broadcast_id)
+    finally:
+        _running.pop(broadcast_id, None)
+
+
+def _fmt_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    return f"{h}:{rem // 60:02d}:{rem % 60:02d}" if h else f"{rem // 60}:{rem % 60:02d}"
+
+
+def status_lines(limit: int = 5) -> List[str]:
+    rows = database.get_broadcasts(limit=limit)
+    if not rows:
+        return ["Рассылок ещё не было."]
+    lines = []
+    for row in rows:
+        prog: Optional[_Progress] = _running.get(row["id"])
+        sent, failed, skipped = (prog.sent, prog.failed, prog.skipped) if prog else (
+            row["sent"], row["failed"], row["skipped"]
+        )
+        done = sent + failed + skipped
+        line = (
+            f"#{row['id']} [{row['status']}] {audience_title(row['audience'])}: "
+            f"{done}/{row['total']} (успешно {sent}, ошибок {failed}, пропущено {skipped})"
+        )
+        if prog and prog.processed:
+            rate = prog.processed / max(time.monotonic() - prog.started, 1e-6)
+            eta = max(row["total"] - done, 0) / rate
+            line += f"\n   {rate:.1f} сообщ./с, осталось ≈ {_fmt_eta(eta)}"
+        lines.append(line)
+    return lines
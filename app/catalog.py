@@ -0,0 +1,100 @@
+"""
+Каталог олимпиад в памяти.
+
+Excel по-прежнему источник правды: перед каждым обращением сверяется время изменения
+и размер файла, и при изменении каталог перечитывается. Чтение идёт в отдельном потоке,
+чтобы не блокировать event loop.
+
+У каждой загрузки каталога своя опорная дата (reference_date) — от неё ячейкам дат без года
+подбирается год, поэтому разбор ячеек не зависит от «сегодня» и кэшируется до перечитывания таблицы.
+Опорная дата — CATALOG_REFERENCE_DATE, иначе дата сохранения из свойств книги .xlsx и только
+в крайнем случае время изменения файла.
+"""
+import asyncio
+import logging
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from app import config, metrics
+
+_lock = threading.Lock()
+_olys: Optional[List[Dict]] = None
+_lookup: Dict[tuple, Dict] = {}
+_stamp: Optional[Tuple[str, int, int]] = None
+_reference: Optional[date] = None
+
+
+def _file_stamp() -> Tuple[str, int, int]:
+    st = os.stat(config.EXCEL_FILE)
+    return config.EXCEL_FILE, st.st_mtime_ns, st.st_size
+
+
+def _is_fresh() -> bool:
+    return _olys is not None and _file_stamp() == _stamp
+
+
+def _reference_for(stamp: Tuple[str, int, int]) -> date:
+    """CATALOG_REFERENCE_DATE, иначе день сохранения книги из её свойств, иначе — день изменения файла.
+
+    Время изменения файла — крайний случай: копирование, checkout и деплой его сбрасывают."""
+    if config.CATALOG_REFERENCE_DATE:
+        return config.CATALOG_REFERENCE_DATE
+    from app.excel_data import saved_date
+
+    saved = saved_date(stamp[0])
+    if saved:
+        return saved
+    logging.warning(
+        "Опорная дата каталога — время изменения файла %s; задайте CATALOG_REFERENCE_DATE", stamp[0]
+    )
+    return datetime.fromtimestamp(stamp[1] / 1e9, config.TIMEZONE).date()
+
+
+def is_ready() -> bool:
+    """Каталог уже загружен хотя бы раз."""
+    return _olys is not None
+
+
+def get_olympiads() -> List[Dict]:
+    """Список олимпиад (синхронно; при необходимости перечитывает Excel в текущем потоке)."""
+    global _olys, _lookup, _stamp, _reference
+    if _is_fresh():
+        metrics.CATALOG_CACHE.inc(result="hit")
+        return _olys
+    with _lock:
+        stamp = _file_stamp()
+        if _olys is not None and stamp == _stamp:
+            metrics.CATALOG_CACHE.inc(result="hit")
+            return _olys
+        metrics.CATALOG_CACHE.inc(result="miss")
+        from app.excel_data import build_lookup, fetch_olympiads
+
+        olys = fetch_olympiads()
+        _olys, _lookup, _stamp, _reference = olys, build_lookup(olys), stamp, _reference_for(stamp)
+        return olys
+
+
+def get_lookup() -> Dict[tuple, Dict]:
+    get_olympiads()
+    return _lookup
+
+
+async def olympiads() -> List[Dict]:
+    """Список олимпиад; перечитывание Excel — в отдельном потоке."""
+    if _is_fresh():
+        metrics.CATALOG_CACHE.inc(result="hit")
+        return _olys
+    return await asyncio.to_thread(get_olympiads)
+
+
+async def lookup() -> Dict[tuple, Dict]:
+    """Индекс (olympiad_id, profile) -> запись олимпиады."""
+    await olympiads()
+    return _lookup
+
+
+def reference_date() -> date:
+    """Опорная дата загруженного каталога (до первой загрузки — сегодня)."""
+    return _reference or datetime.now(config.TIMEZONE).date()
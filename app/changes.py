@@ -0,0 +1,131 @@
+"""
+Изменения дат в таблице олимпиад и уведомления подписчикам.
+
+Раз в CATALOG_WATCH_SECONDS каталог сверяется с файлом; если таблица перечитана, новая версия
+сравнивается с предыдущей по ключам (olympiad_id, profile): добавленные, удалённые и ключи,
+у которых изменились события ячейки «Даты». Ячейки с тем же текстом не разбираются, поэтому
+разбор дат идёт только для правленых строк. Подписчикам изменившихся ключей (выборка по индексу
+subscriptions) уходит одно сообщение со всеми их изменениями.
+
+Первая проверка после старта только запоминает каталог: правки, сделанные пока бот был
+остановлен, не рассылаются.
+"""
+import asyncio
+import logging
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from telegram.ext import Application, ContextTypes
+
+from app import catalog, config, database, metrics
+from app.dates import Event, format_event, parse_events, parse_events_at
+from app.delivery import SENT, send_chunks
+from app.ratelimit import DAILY
+from app.ui import chunk_messages
+
+Key = Tuple[str, str]
+HEADER = "📅 Изменились даты олимпиад, на которые вы подписаны:"
+
+_baseline: Optional[Tuple[Dict[tuple, Dict], date]] = None   # (каталог, опорная дата), с которым сравниваем
+
+
+def diff(
+    old: Dict[tuple, Dict], new: Dict[tuple, Dict], old_reference: date, new_reference: date
+) -> Dict[str, object]:
+    """{"added": ключи, "removed": ключи, "changed": {ключ: (события было, события стало)}}.
+
+    Старые ячейки разбираются с опорной датой своей версии каталога и мимо общего кэша дат,
+    новые — через parse_events (кэш новой версии заодно прогревается).
+    """
+    memo: Dict = {}
+    changed: Dict[Key, Tuple[Tuple[Event, ...], Tuple[Event, ...]]] = {}
+    for key, o in new.items():
+        prev = old.get(key)
+        if prev is None or prev is o or prev["date_desc"] == o["date_desc"]:
+            continue
+        before = parse_events_at(prev["date_desc"], old_reference, memo)
+        after = parse_events(o["date_desc"], new_reference)
+        if before != after:
+            changed[key] = (before, after)
+    return {"added": new.keys() - old.keys(), "removed": old.keys() - new.keys(), "changed": changed}
+
+
+def _events_text(events: Tuple[Event, ...], today: date) -> str:
+    upcoming = [format_event(ev, today) for ev in events if ev[1] >= today]
+    return "; ".join(upcoming) if upcoming else "дат пока нет"
+
+
+def render(lookup: Dict[tuple, Dict], keys: List[Key], changed: Dict, today: date) -> List[str]:
+    """Блоки сообщения подписчику: по одному на изменившийся ключ."""
+    out = []
+    for key in sorted(keys):
+        o = lookup[key]
+        before, after = changed[key]
+        out.append(
+            f"🔹 {o['name']} ({key[1]})\n"
+            f"было: {_events_text(before, today)}\n"
+            f"стало: {_events_text(after, today)}\n{o['link']}"
+        )
+    return out
+
+
+async def notify(bot, lookup: Dict[tuple, Dict], changed: Dict, today: date) -> Dict[str, int]:
+    """Шлёт подписчикам изменившихся ключей по одному сообщению (недоступных пропускает)."""
+    subscribers, blocked = await asyncio.gather(
+        asyncio.to_thread(database.get_key_subscribers, list(changed)),
+        asyncio.to_thread(database.get_blocked_user_ids),
+    )
+    stats = {"users": len(subscribers), "sent": 0, "failed": 0, "skipped": 0}
+    outcomes: Dict[int, str] = {}
+    for uid in sorted(subscribers):
+        if uid in blocked:
+            stats["skipped"] += 1
+            metrics.MESSAGES_SKIPPED.inc(kind="changes")
+            continue
+        blocks = render(lookup, subscribers[uid], changed, today)
+        chunks = chunk_messages([HEADER] + blocks, config.MAX_MESSAGE_LENGTH)
+        res = outcomes[uid] = await send_chunks(bot, uid, chunks, kind="changes", lane=DAILY)
+        stats["sent" if res == SENT else "failed"] += 1
+    await asyncio.to_thread(database.record_deliveries, outcomes)
+    return stats
+
+
+async def check(bot, today: Optional[date] = None) -> Optional[Dict[str, object]]:
+    """Сверяет каталог с файлом; если таблица изменилась — diff и уведомления. None — изменений нет."""
+    global _baseline
+    lookup = await catalog.lookup()
+    reference = catalog.reference_date()
+    if _baseline is None:
+        _baseline = (lookup, reference)
+        return None
+    if _baseline[0] is lookup:
+        return None
+    t0 = time.perf_counter()
+    d = diff(_baseline[0], lookup, _baseline[1], reference)
+    diff_s = time.perf_counter() - t0
+    _baseline = (lookup, reference)
+    res = {
+        "added": len(d["added"]),
+        "removed": len(d["removed"]),
+        "changed": len(d["changed"]),
+        "diff_seconds": diff_s,
+    }
+    if d["changed"]:
+        res.update(await notify(bot, lookup, d["changed"], today or datetime.now(config.TIMEZONE).date()))
+    logging.info("Таблица олимпиад изменилась: %s", res)
+    return res
+
+
+async def job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    try:
+        await check(context.bot)
+    except Exception:
+        logging.exception("Ошибка проверки изменений таблицы олимпиад")
+
+
+async def watch(app: Application) -> None:
+    """Проверка изменений без JobQueue: раз в CATALOG_WATCH_SECONDS."""
+    while True:
+        await job(app)
+        await asyncio.sleep(config.CATALOG_WATCH_SECONDS)
@@ -2,8 +2,9 @@
 Конфигурация бота.
 """
 import os
-from datetime import time
+from datetime import date, time
 from pathlib import Path
+from typing import Optional
 from zoneinfo import ZoneInfo
 
 from dotenv import load_dotenv
@@ -31,6 +32,14 @@ def _get_admin_ids(name: str) -> set[int]:
     return {int(x) for x in val.split(",") if x.strip().isdigit()}
 
 
+def _get_date(name: str) -> Optional[date]:
+    raw = os.getenv(name, "").strip()
+    try:
+        return date.fromisoformat(raw) if raw else None
+    except ValueError:
+        return None
+
+
 def _resolve_path(value: str) -> str:
     p = Path(value)
     return str(p if p.is_absolute() else BASE_DIR / p)
@@ -38,12 +47,30 @@ def _resolve_path(value: str) -> str:
 
 # --- Telegram ---
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN", "")
+# Адрес Bot API без /bot<токен> (локальный Bot API сервер или bench/fake_bot_api.py); пусто — api.telegram.org
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "").strip()
 ADMIN_IDS = _get_admin_ids("ADMIN_IDS")
+# Общий лимит исходящих запросов к Bot API, запросов в секунду; 0 — без планировщика
+BOT_API_RATE = float(os.getenv("BOT_API_RATE", "25"))
+# Доля лимита, которую рассылки (напоминания, кампании) не занимают: она остаётся ответам на клики
+INTERACTIVE_SHARE = float(os.getenv("INTERACTIVE_SHARE", "0.3"))
 
 # --- Источники данных ---
 EXCEL_FILE = _resolve_path(os.getenv("EXCEL_FILE", "data/Расписание олимпиад.xlsx"))
 DB_FILE = _resolve_path(os.getenv("DB_FILE", "subscriptions.db"))
 
+# --- SQLite при нескольких процессах (бот, админ-скрипты, воркер рассылки) ---
+# Режим журнала: WAL — читатели не ждут писателя; сколько ждать занятую БД (busy_timeout);
+# сколько раз повторить захват записи, если БД всё ещё занята, и базовая пауза между попытками
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL").upper()
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "2000"))
+DB_WRITE_RETRIES = int(os.getenv("DB_WRITE_RETRIES", "5"))
+DB_RETRY_BASE_MS = int(os.getenv("DB_RETRY_BASE_MS", "25"))
+
+# Держать подписки в памяти (app.subindex): списки, меню удаления и рассылка читают их без SQLite.
+# Записи других процессов индекс догоняет по журналу изменений в базе (subscriptions_log)
+SUBSCRIPTION_INDEX = _get_bool("SUBSCRIPTION_INDEX", True)
+
 # --- Время и напоминания ---
 TIMEZONE = ZoneInfo(os.getenv("TIMEZONE", "Europe/Moscow"))
 DAILY_NOTIFY_TIME = os.getenv("DAILY_NOTIFY_TIME", "12:00")
@@ -68,9 +95,30 @@ REMIND_DAYS_SET = _get_int_set(
     "REMIND_DAYS_SET", {60, 30, 21, 14, 10, 7, 5, 3, 2, 1, 0}
 )
 
+# Опорная дата каталога (ГГГГ-ММ-ДД), относительно которой датам без года в таблице подбирается год;
+# лучше задавать явно (например начало сезона). Пусто — дата сохранения из свойств книги .xlsx,
+# а если её нет — время изменения файла EXCEL_FILE; см. app.catalog._reference_for
+CATALOG_REFERENCE_DATE = _get_date("CATALOG_REFERENCE_DATE")
+
+# Время ежедневной архивации подписок на прошедшие олимпиады (app.archive); пусто — не архивировать
+ARCHIVE_TIME = os.getenv("ARCHIVE_TIME", "04:00").strip()
+ARCHIVE_AT = _parse_daily_time(ARCHIVE_TIME) if ARCHIVE_TIME else None
+# Если за один прогон в архив уходит большая доля подписанных ключей (олимпиада, профиль), перенос
+# откладывается до /archive force — так устаревшая таблица не отправит в архив почти всё; 0 — не проверять
+ARCHIVE_MAX_SHARE = float(os.getenv("ARCHIVE_MAX_SHARE", "0.5"))
+
+# Как часто (с) сверять таблицу с загруженным каталогом и уведомлять подписчиков об изменившихся
+# датах (app.changes); 0 — не проверять
+CATALOG_WATCH_SECONDS = int(os.getenv("CATALOG_WATCH_SECONDS", "600"))
+
 # Сообщать ли "Сегодня напоминаний нет", когда ничего не подошло
 SEND_EMPTY_INFO = _get_bool("SEND_EMPTY_INFO", False)
 
+# После скольких неудачных доставок подряд считать получателя недоступным
+# (Forbidden — «бот заблокирован» — помечает сразу). Таким пользователям рассылки не шлются,
+# пока они снова не напишут боту.
+DELIVERY_MAX_FAILURES = int(os.getenv("DELIVERY_MAX_FAILURES", "5"))
+
 # --- Разное ---
 GOOGLE_SHEET_LINK = os.getenv(
     "GOOGLE_SHEET_LINK",
@@ -78,3 +126,29 @@ GOOGLE_SHEET_LINK = os.getenv(
 )
 
 MAX_MESSAGE_LENGTH = int(os.getenv("MAX_MESSAGE_LENGTH", "4000"))
+
+# Правка сообщения с чекбоксами (профили, олимпиады) уходит, когда клики стихли на столько мс;
+# серия кликов даёт одну правку. 0 — править на каждый клик
+EDIT_DEBOUNCE_MS = int(os.getenv("EDIT_DEBOUNCE_MS", "300"))
+
+# --- Логи ---
+# Уровень и формат (json — по строке JSON на запись, text — как раньше)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").strip().lower()
+# Прореживание частых событий: доля успешных, которые попадут в лог (неуспешные пишутся всегда).
+# update — апдейт, обработанный хендлером; message — одно сообщение рассылки
+LOG_SAMPLE = {
+    k.strip(): float(v)
+    for k, _, v in (item.partition("=") for item in os.getenv("LOG_SAMPLE", "update=0.1,message=0.01").split(","))
+    if k.strip() and v.strip()
+}
+
+# --- Метрики ---
+# Порт локального HTTP-эндпоинта /metrics (формат Prometheus); 0 — не поднимать
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# --- Профилирование ---
+# Профилировать каждую ежедневную рассылку и слать результат админам (иначе — по команде /profile)
+PROFILE_DAILY = _get_bool("PROFILE_DAILY", False)
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "30"))
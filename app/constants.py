@@ -7,7 +7,7 @@ UD_LIST_EXTRA_IDS = "list_message_ids"
 # Активное сообщение с меню/диалогом (чтобы не плодить дубликаты при /start)
 UD_ACTIVE_MSG_ID = "active_msg_id"
 
-# Ожидание текста рассылки от админа
+# Ожидание текста рассылки от админа; значение — аудитория ("all", "profile:…", "olympiad:…")
 UD_AWAIT_BROADCAST = "await_broadcast_text"
 
 # Состояние сценария подписки
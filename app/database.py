@@ -1,17 +1,39 @@
-"""Слой доступа к SQLite: пользователи и подписки."""
+"""
+Слой доступа к SQLite: пользователи и подписки.
+
+С базой могут работать несколько процессов (бот, админ-скрипты, воркер рассылки), поэтому:
+- журнал в режиме DB_JOURNAL_MODE (по умолчанию WAL — чтение не ждёт записи);
+- каждое соединение ждёт занятую БД до DB_BUSY_TIMEOUT_MS;
+- запись идёт через db_write(): BEGIN IMMEDIATE сразу берёт блокировку записи, поэтому транзакция
+  из нескольких операторов не упирается в «database is locked» посередине. Если БД занята дольше
+  busy_timeout, захват и COMMIT повторяются до DB_WRITE_RETRIES раз с экспоненциальной паузой и джиттером.
+
+Функции синхронные и под нагрузкой ждут блокировку секундами, поэтому из хендлеров и задач
+они вызываются через asyncio.to_thread — иначе ожидание останавливает весь event loop.
+"""
+import logging
+import random
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 from datetime import datetime
-from typing import Iterator, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from telegram import User
 
-from app import config
+from app import config, metrics
+from app.subindex import SubscriptionIndex
+
+
+def _connect(**kwargs) -> sqlite3.Connection:
+    return sqlite3.connect(config.DB_FILE, timeout=config.DB_BUSY_TIMEOUT_MS / 1000, **kwargs)
 
 
 @contextmanager
 def db_conn() -> Iterator[sqlite3.Connection]:
-    conn = sqlite3.connect(config.DB_FILE)
+    """Соединение для чтения."""
+    conn = _connect()
     try:
         yield conn
         conn.commit()
@@ -19,8 +41,55 @@ def db_conn() -> Iterator[sqlite3.Connection]:
         conn.close()
 
 
+def _is_locked(e: sqlite3.OperationalError) -> bool:
+    msg = str(e)
+    return "database is locked" in msg or "database is busy" in msg
+
+
+def _locked_retry(conn: sqlite3.Connection, sql: str, op: str) -> None:
+    """Выполняет BEGIN IMMEDIATE / COMMIT, повторяя при занятой БД."""
+    t0 = time.perf_counter()
+    try:
+        for attempt in range(config.DB_WRITE_RETRIES + 1):
+            try:
+                conn.execute(sql)
+                return
+            except sqlite3.OperationalError as e:
+                if not _is_locked(e) or attempt == config.DB_WRITE_RETRIES:
+                    if _is_locked(e):
+                        metrics.DB_LOCK_ERRORS.inc(op=op)
+                        logging.warning("SQLite занята: %s не выполнен после %d повторов", op, attempt)
+                    raise
+                metrics.DB_LOCK_RETRIES.inc(op=op)
+                time.sleep(random.uniform(0.5, 1.0) * config.DB_RETRY_BASE_MS / 1000 * 2 ** attempt)
+    finally:
+        metrics.DB_LOCK_WAIT.observe(time.perf_counter() - t0, op=op)
+
+
+@contextmanager
+def db_write() -> Iterator[sqlite3.Connection]:
+    """Пишущая транзакция: блокировка записи берётся сразу, все операторы фиксируются вместе."""
+    conn = _connect(isolation_level=None)
+    try:
+        _locked_retry(conn, "BEGIN IMMEDIATE", "begin")
+        try:
+            yield conn
+            _locked_retry(conn, "COMMIT", "commit")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
 def init_db() -> None:
-    with db_conn() as conn:
+    conn = _connect(isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA journal_mode={config.DB_JOURNAL_MODE}")
+    finally:
+        conn.close()
+    with db_write() as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS subscriptions (
@@ -42,12 +111,103 @@ def init_db() -> None:
             )
             """
         )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS delivery (
+                user_id              INTEGER PRIMARY KEY,
+                last_success         TEXT,
+                last_failure         TEXT,
+                consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                blocked              INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS broadcasts (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                text        TEXT NOT NULL,
+                audience    TEXT NOT NULL,
+                admin_chat  INTEGER,
+                status      TEXT NOT NULL,
+                cursor      INTEGER NOT NULL DEFAULT 0,
+                total       INTEGER NOT NULL DEFAULT 0,
+                sent        INTEGER NOT NULL DEFAULT 0,
+                failed      INTEGER NOT NULL DEFAULT 0,
+                skipped     INTEGER NOT NULL DEFAULT 0,
+                created_at  TEXT,
+                finished_at TEXT
+            )
+            """
+        )
+        # Архив подписок на прошедшие олимпиады (см. app.archive)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS subscriptions_archive (
+                user_id       INTEGER,
+                olympiad_id   TEXT,
+                olympiad_name TEXT,
+                profile       TEXT,
+                archived_at   TEXT,
+                UNIQUE(user_id, olympiad_id, profile)
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_archive_key ON subscriptions_archive(olympiad_id, profile)"
+        )
+        # Выборка аудитории рассылок по профилю/олимпиаде, постранично по user_id
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_subscriptions_profile ON subscriptions(profile, user_id)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_subscriptions_olympiad ON subscriptions(olympiad_id, user_id)"
+        )
+        # Журнал изменений подписок (ведут триггеры, в том числе для записей других процессов):
+        # счётчик n — номер последней записи журнала; по журналу индекс в памяти догоняет базу.
+        # Хранятся последние _LOG_KEEP записей.
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS subscriptions_changes (id INTEGER PRIMARY KEY CHECK (id = 1), n INTEGER)"
+        )
+        conn.execute("INSERT OR IGNORE INTO subscriptions_changes (id, n) VALUES (1, 0)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS subscriptions_log (
+                seq           INTEGER PRIMARY KEY,
+                added         INTEGER,
+                user_id       INTEGER,
+                olympiad_id   TEXT,
+                olympiad_name TEXT,
+                profile       TEXT
+            )
+            """
+        )
+        log = (
+            "UPDATE subscriptions_changes SET n = n + 1; "
+            "INSERT INTO subscriptions_log (seq, added, user_id, olympiad_id, olympiad_name, profile) "
+            "SELECT n, {added}, {row}.user_id, {row}.olympiad_id, {row}.olympiad_name, {row}.profile "
+            "FROM subscriptions_changes;"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS subscriptions_insert_log AFTER INSERT ON subscriptions "
+            f"BEGIN {log.format(added=1, row='NEW')} END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS subscriptions_delete_log AFTER DELETE ON subscriptions "
+            f"BEGIN {log.format(added=0, row='OLD')} END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS subscriptions_update_log AFTER UPDATE ON subscriptions "
+            f"BEGIN {log.format(added=0, row='OLD')} {log.format(added=1, row='NEW')} END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS subscriptions_log_prune AFTER INSERT ON subscriptions_log "
+            f"WHEN NEW.seq % 1000 = 0 BEGIN DELETE FROM subscriptions_log WHERE seq <= NEW.seq - {_LOG_KEEP}; END"
+        )
 
 
 def ensure_user(user: Optional[User]) -> None:
     if not user:
         return
-    with db_conn() as conn:
+    with db_write() as conn:
         conn.execute(
             "INSERT OR IGNORE INTO users (user_id, first_name, username, joined_at) VALUES (?,?,?,?)",
             (user.id, user.first_name or "", user.username or "", datetime.now(config.TIMEZONE).isoformat()),
@@ -56,6 +216,11 @@ def ensure_user(user: Optional[User]) -> None:
             "UPDATE users SET first_name=?, username=? WHERE user_id=?",
             (user.first_name or "", user.username or "", user.id),
         )
+        # Пользователь снова пишет боту — значит, больше не блокирует его
+        conn.execute(
+            "UPDATE delivery SET blocked=0, consecutive_failures=0 WHERE user_id=? AND blocked=1",
+            (user.id,),
+        )
 
 
 def get_all_user_ids() -> set:
@@ -68,24 +233,228 @@ def get_all_user_ids() -> set:
     return a | b
 
 
+# Версии подписок: по ним кэши (app.plans) узнают, что подписки изменились. Своя версия у каждого
+# пользователя и общая — для массовых операций (архив) и когда чужих изменений не разобрать по журналу.
+# Записи других процессов учитываются при sync_subscriptions().
+_subs_version = 0
+_user_versions: Dict[int, int] = {}
+
+
+def _touch(user_id: Optional[int] = None) -> None:
+    global _subs_version
+    if user_id is None:
+        _subs_version += 1
+    else:
+        _user_versions[user_id] = _user_versions.get(user_id, 0) + 1
+
+
+def subscriptions_version(user_id: int) -> Tuple[int, int]:
+    """Версия подписок пользователя на момент последней sync_subscriptions()."""
+    return _subs_version, _user_versions.get(user_id, 0)
+
+
+# --- Индекс подписок в памяти (app.subindex) ---
+# Чтения подписок идут из индекса, записи этого процесса обновляют его сразу после COMMIT.
+# Записи других процессов видны по журналу subscriptions_log: если PRAGMA data_version сообщает
+# о чужом COMMIT и счётчик ушёл вперёд, индекс применяет новые записи журнала. Если их больше
+# _LOG_APPLY_MAX или журнал уже обрезан, индекс перестраивается в фоновом потоке, а чтения до
+# его готовности идут в SQLite.
+_LOG_KEEP = 100_000
+_LOG_APPLY_MAX = 5_000
+_index: Optional[SubscriptionIndex] = None
+_index_changes = 0      # значение счётчика, которому соответствует индекс
+_index_file: Optional[str] = None
+_index_lock = threading.RLock()
+_build_lock = threading.Lock()
+_rebuilding = False
+_seen_changes: Optional[int] = None   # значение счётчика, до которого учтены версии подписок
+_watch: Optional[sqlite3.Connection] = None
+_watch_file: Optional[str] = None
+_watch_version: Optional[int] = None
+
+
+def _changes(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT n FROM subscriptions_changes").fetchone()[0]
+
+
+def _watch_conn() -> sqlite3.Connection:
+    """Соединение для сверки с базой (PRAGMA data_version, журнал). Вызывается под _index_lock."""
+    global _watch, _watch_file, _watch_version, _seen_changes
+    if _watch is None or _watch_file != config.DB_FILE:
+        if _watch is not None:
+            _watch.close()
+        _watch = _connect(check_same_thread=False)
+        _watch_file, _watch_version, _seen_changes = config.DB_FILE, None, None
+    return _watch
+
+
+def load_subscription_index() -> SubscriptionIndex:
+    """Строит индекс из таблицы subscriptions одним проходом (при старте и когда журнала не хватает).
+
+    Строится без _index_lock: чтения тем временем идут в SQLite или в прежний индекс.
+    """
+    global _index, _index_changes, _index_file, _watch_version
+    with _build_lock:
+        t0 = time.perf_counter()
+        db_file = config.DB_FILE
+        conn = _connect(isolation_level=None)
+        try:
+            conn.execute("BEGIN")
+            changes = _changes(conn)
+            index = SubscriptionIndex.build(
+                conn.execute("SELECT user_id, olympiad_id, olympiad_name, profile FROM subscriptions")
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        with _index_lock:
+            _index, _index_changes, _index_file = index, changes, db_file
+            _watch_version = None   # записи после снимка догоним по журналу при следующем чтении
+        logging.info("Индекс подписок: %d подписок за %.2f с", index.size, time.perf_counter() - t0)
+        return index
+
+
+def _rebuild_in_background() -> None:
+    global _rebuilding
+    with _index_lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+
+    def run() -> None:
+        global _rebuilding
+        try:
+            load_subscription_index()
+        except Exception:
+            logging.exception("Не удалось перестроить индекс подписок")
+        finally:
+            _rebuilding = False
+
+    threading.Thread(target=run, name="subscription-index", daemon=True).start()
+
+
+def _has_index() -> bool:
+    return _index is not None and _index_file == config.DB_FILE
+
+
+def _catch_up(watch: sqlite3.Connection) -> None:
+    """Догоняет базу по журналу: версии подписок — с _seen_changes, индекс — с _index_changes.
+    Если журнала не хватает, общая версия растёт, а индекс сбрасывается и перестраивается в фоне.
+    Вызывается под _index_lock."""
+    global _index, _index_changes, _seen_changes
+    has_index = _has_index()
+    watch.execute("BEGIN")
+    try:
+        target = _changes(watch)
+        seen = target if _seen_changes is None else _seen_changes   # первая сверка — отсчёт с текущего
+        start = min(seen, _index_changes) if has_index else seen
+        rows = watch.execute(
+            "SELECT seq, added, user_id, olympiad_id, olympiad_name, profile FROM subscriptions_log "
+            "WHERE seq > ? AND seq <= ? ORDER BY seq LIMIT ?",
+            (start, target, _LOG_APPLY_MAX + 1),
+        ).fetchall()
+    finally:
+        watch.execute("COMMIT")
+    complete = len(rows) == target - start   # журнал не обрезан и записей не слишком много
+    if complete:
+        for uid in {r[2] for r in rows if r[0] > seen}:
+            _touch(uid)
+    elif target != seen:
+        _touch()
+    _seen_changes = target
+    if not has_index or _index_changes == target:
+        return
+    if not complete:
+        _index = None
+        _rebuild_in_background()
+        return
+    for seq, added, uid, oid, name, prof in rows:
+        if seq <= _index_changes:
+            continue
+        if added:
+            _index.add(uid, oid, name, prof)
+        else:
+            _index.remove(uid, oid, prof)
+    _index_changes = target
+
+
+def sync_subscriptions() -> None:
+    """Учитывает записи других процессов (индекс, версии подписок), если с прошлой сверки был чужой COMMIT."""
+    global _watch_version
+    with _index_lock:
+        watch = _watch_conn()
+        version = watch.execute("PRAGMA data_version").fetchone()[0]
+        if version != _watch_version:
+            # data_version — до сверки: COMMIT, случившийся после, заметим при следующем вызове
+            _catch_up(watch)
+            _watch_version = version
+
+
+def _read_index(read: Callable[[SubscriptionIndex], object]):
+    """read(индекс), сверенный с базой; None — индекс выключен (SUBSCRIPTION_INDEX) или строится."""
+    if not config.SUBSCRIPTION_INDEX:
+        return None
+    with _index_lock:
+        if not _has_index():
+            _rebuild_in_background()
+            return None
+        sync_subscriptions()
+        return read(_index) if _has_index() else None
+
+
+def _apply(before: int, after: int, change: Optional[Callable[[SubscriptionIndex], None]]) -> None:
+    """Переносит в индекс и версии запись, закоммиченную при значениях счётчика before -> after.
+
+    Если процесс отстал (before не совпал — между сверкой и записью был чужой COMMIT) или change
+    не задан, индекс и версии догоняют базу по журналу.
+    """
+    global _index_changes, _seen_changes
+    with _index_lock:
+        watch = _watch_conn()
+        if _seen_changes == before:
+            _seen_changes = after
+        if _has_index() and change is not None and _index_changes == before:
+            change(_index)
+            _index_changes = after
+        if _seen_changes != after or (_has_index() and _index_changes != after):
+            _catch_up(watch)
+
+
 def add_subscription(user_id: int, olympiad_id: str, olympiad_name: str, profile: str) -> None:
-    with db_conn() as conn:
+    with db_write() as conn:
+        before = _changes(conn)
         conn.execute(
             "INSERT OR IGNORE INTO subscriptions (user_id, olympiad_id, olympiad_name, profile) VALUES (?,?,?,?)",
             (user_id, olympiad_id, olympiad_name, profile),
         )
+        after = _changes(conn)
+    _apply(before, after, lambda idx: idx.add(user_id, olympiad_id, olympiad_name, profile))
+    _touch(user_id)
 
 
 def add_subscriptions(user_id: int, items: List[Tuple[dict, str]]) -> None:
-    with db_conn() as conn:
+    rows = [(user_id, o["id"], o["name"], prof) for o, prof in items]
+    with db_write() as conn:
+        before = _changes(conn)
         conn.executemany(
             "INSERT OR IGNORE INTO subscriptions (user_id, olympiad_id, olympiad_name, profile) VALUES (?,?,?,?)",
-            [(user_id, o["id"], o["name"], prof) for o, prof in items],
+            rows,
         )
+        after = _changes(conn)
+
+    def change(idx: SubscriptionIndex) -> None:
+        for row in rows:
+            idx.add(*row)
+
+    _apply(before, after, change)
+    _touch(user_id)
 
 
 def get_user_subscriptions(user_id: int) -> List[Tuple[str, str, str]]:
     """Возвращает список (olympiad_id, olympiad_name, profile)."""
+    rows = _read_index(lambda idx: idx.user_rows(user_id))
+    if rows is not None:
+        return rows
     with db_conn() as conn:
         cur = conn.cursor()
         cur.execute(
@@ -97,6 +466,9 @@ def get_user_subscriptions(user_id: int) -> List[Tuple[str, str, str]]:
 
 def get_user_subscription_pairs(user_id: int) -> List[Tuple[str, str]]:
     """Возвращает список (olympiad_id, profile) — используется для построения напоминаний."""
+    pairs = _read_index(lambda idx: idx.user_pairs(user_id))
+    if pairs is not None:
+        return pairs
     with db_conn() as conn:
         cur = conn.cursor()
         cur.execute("SELECT olympiad_id, profile FROM subscriptions WHERE user_id=?", (user_id,))
@@ -104,6 +476,9 @@ def get_user_subscription_pairs(user_id: int) -> List[Tuple[str, str]]:
 
 
 def get_user_profiles(user_id: int) -> List[str]:
+    profiles = _read_index(lambda idx: idx.user_profiles(user_id))
+    if profiles is not None:
+        return profiles
     with db_conn() as conn:
         cur = conn.cursor()
         cur.execute("SELECT DISTINCT profile FROM subscriptions WHERE user_id = ?", (user_id,))
@@ -111,21 +486,308 @@ def get_user_profiles(user_id: int) -> List[str]:
 
 
 def remove_subscription(user_id: int, olympiad_id: str, profile: str) -> None:
-    with db_conn() as conn:
-        conn.execute(
-            "DELETE FROM subscriptions WHERE user_id=? AND olympiad_id=? AND profile=?",
-            (user_id, olympiad_id, profile),
-        )
+    with db_write() as conn:
+        before = _changes(conn)
+        for table in ("subscriptions", "subscriptions_archive"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE user_id=? AND olympiad_id=? AND profile=?",
+                (user_id, olympiad_id, profile),
+            )
+        after = _changes(conn)
+    _apply(before, after, lambda idx: idx.remove(user_id, olympiad_id, profile))
+    _touch(user_id)
 
 
 def remove_subscriptions_by_profile(user_id: int, profile: str) -> None:
-    with db_conn() as conn:
-        conn.execute("DELETE FROM subscriptions WHERE user_id=? AND profile=?", (user_id, profile))
+    with db_write() as conn:
+        before = _changes(conn)
+        for table in ("subscriptions", "subscriptions_archive"):
+            conn.execute(f"DELETE FROM {table} WHERE user_id=? AND profile=?", (user_id, profile))
+        after = _changes(conn)
+    _apply(before, after, lambda idx: idx.remove_profile(user_id, profile))
+    _touch(user_id)
 
 
 def get_all_subscriptions() -> List[Tuple[int, str, str]]:
-    """Возвращает список (user_id, olympiad_id, profile) — для ежедневной рассылки напоминаний."""
+    """Возвращает список (user_id, olympiad_id, profile) — для симуляции рассылки."""
+    rows = _read_index(lambda idx: [(uid, oid, prof) for uid, pairs in idx.users() for oid, prof in pairs])
+    if rows is not None:
+        return rows
     with db_conn() as conn:
         cur = conn.cursor()
         cur.execute("SELECT user_id, olympiad_id, profile FROM subscriptions")
         return cur.fetchall()
+
+
+def get_subscriptions_by_user() -> Dict[int, List[Tuple[str, str]]]:
+    """user_id -> [(olympiad_id, profile)] — для ежедневной рассылки напоминаний."""
+    by_user = _read_index(lambda idx: dict(idx.users()))
+    if by_user is not None:
+        return by_user
+    by_user = {}
+    with db_conn() as conn:
+        for uid, oid, prof in conn.execute("SELECT user_id, olympiad_id, profile FROM subscriptions"):
+            by_user.setdefault(uid, []).append((oid, prof))
+    return by_user
+
+
+def get_key_subscribers(keys: Iterable[Tuple[str, str]]) -> Dict[int, List[Tuple[str, str]]]:
+    """user_id -> подписанные ключи из keys. По индексу olympiad_id — читаются только строки этих олимпиад."""
+    keys = list(keys)
+    out: Dict[int, List[Tuple[str, str]]] = {}
+
+    def from_index(idx: SubscriptionIndex) -> bool:
+        for key in keys:
+            for uid in idx.key_users(key) or ():
+                out.setdefault(uid, []).append(key)
+        return True
+
+    if _read_index(from_index):
+        return out
+    with db_conn() as conn:
+        for oid, prof in keys:
+            for (uid,) in conn.execute(
+                "SELECT user_id FROM subscriptions WHERE olympiad_id=? AND profile=?", (oid, prof)
+            ):
+                out.setdefault(uid, []).append((oid, prof))
+    return out
+
+
+# --- Архив подписок ---
+
+def get_subscribed_keys() -> set:
+    """Множество (olympiad_id, profile), на которые есть подписки."""
+    keys = _read_index(lambda idx: idx.keys())
+    if keys is not None:
+        return keys
+    with db_conn() as conn:
+        return set(conn.execute("SELECT DISTINCT olympiad_id, profile FROM subscriptions").fetchall())
+
+
+def get_archived_keys() -> set:
+    with db_conn() as conn:
+        return set(conn.execute("SELECT DISTINCT olympiad_id, profile FROM subscriptions_archive").fetchall())
+
+
+# Кэш страниц на время массового переноса (КиБ): индексы обеих таблиц обновляются вразброс
+_BULK_CACHE_KIB = 65536
+
+
+def _keys_table(conn: sqlite3.Connection, keys: Iterable[Tuple[str, str]]) -> None:
+    conn.execute(f"PRAGMA cache_size=-{_BULK_CACHE_KIB}")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS move_keys (oid TEXT, prof TEXT, PRIMARY KEY (oid, prof))")
+    conn.execute("DELETE FROM move_keys")
+    conn.executemany("INSERT OR IGNORE INTO move_keys VALUES (?, ?)", keys)
+
+
+def archive_subscriptions(keys: Iterable[Tuple[str, str]]) -> int:
+    """Переносит подписки на данные (olympiad_id, profile) в архив. Возвращает число перенесённых строк."""
+    now = datetime.now(config.TIMEZONE).isoformat()
+    keys = list(keys)
+    with db_write() as conn:
+        before = _changes(conn)
+        _keys_table(conn, keys)
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO subscriptions_archive (user_id, olympiad_id, olympiad_name, profile, archived_at)
+            SELECT s.user_id, s.olympiad_id, s.olympiad_name, s.profile, ?
+            FROM subscriptions s JOIN move_keys k ON s.olympiad_id = k.oid AND s.profile = k.prof
+            """,
+            (now,),
+        )
+        moved = conn.execute(
+            "DELETE FROM subscriptions WHERE (olympiad_id, profile) IN (SELECT oid, prof FROM move_keys)"
+        ).rowcount
+        after = _changes(conn)
+    _apply(before, after, lambda idx: idx.remove_keys(keys))
+    _touch()
+    return moved
+
+
+def restore_subscriptions(keys: Iterable[Tuple[str, str]]) -> int:
+    """Возвращает подписки на данные ключи из архива. Возвращает число восстановленных строк."""
+    with db_write() as conn:
+        before = _changes(conn)
+        _keys_table(conn, keys)
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO subscriptions (user_id, olympiad_id, olympiad_name, profile)
+            SELECT a.user_id, a.olympiad_id, a.olympiad_name, a.profile
+            FROM subscriptions_archive a JOIN move_keys k ON a.olympiad_id = k.oid AND a.profile = k.prof
+            """
+        )
+        moved = conn.execute(
+            "DELETE FROM subscriptions_archive WHERE (olympiad_id, profile) IN (SELECT oid, prof FROM move_keys)"
+        ).rowcount
+        after = _changes(conn)
+    _apply(before, after, None)   # восстановленные строки индекс возьмёт из журнала
+    _touch()
+    return moved
+
+
+def compact_db(min_free_ratio: float = 0.25) -> Dict[str, object]:
+    """ANALYZE, а если свободных страниц больше min_free_ratio файла — VACUUM."""
+    conn = _connect(isolation_level=None)
+    try:
+        conn.execute("ANALYZE")
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        vacuumed = bool(pages) and free / pages > min_free_ratio
+        if vacuumed:
+            conn.execute("VACUUM")
+            pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        conn.close()
+    return {"vacuumed": vacuumed, "size_bytes": pages * page_size}
+
+
+def get_archive_counts() -> Tuple[int, int]:
+    """(подписок в рабочей таблице, подписок в архиве)."""
+    with db_conn() as conn:
+        hot = conn.execute("SELECT COUNT(*) FROM subscriptions").fetchone()[0]
+        cold = conn.execute("SELECT COUNT(*) FROM subscriptions_archive").fetchone()[0]
+    return hot, cold
+
+
+def record_deliveries(outcomes: Dict[int, str]) -> None:
+    """Сохраняет итог отправки по пользователям: {user_id: "sent" | "blocked" | "failed"}.
+
+    Пользователь помечается заблокированным при Forbidden или после
+    DELIVERY_MAX_FAILURES неудач подряд.
+    """
+    now = datetime.now(config.TIMEZONE).isoformat()
+    ok = [(uid, now) for uid, res in outcomes.items() if res == "sent"]
+    bad = [(uid, now, int(res == "blocked")) for uid, res in outcomes.items() if res != "sent"]
+    with db_write() as conn:
+        conn.executemany(
+            """
+            INSERT INTO delivery (user_id, last_success) VALUES (?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                last_success=excluded.last_success, consecutive_failures=0, blocked=0
+            """,
+            ok,
+        )
+        conn.executemany(
+            """
+            INSERT INTO delivery (user_id, last_failure, consecutive_failures, blocked) VALUES (?, ?, 1, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                last_failure=excluded.last_failure,
+                consecutive_failures=consecutive_failures + 1,
+                blocked=MAX(blocked, excluded.blocked)
+            """,
+            bad,
+        )
+        conn.execute(
+            "UPDATE delivery SET blocked=1 WHERE blocked=0 AND consecutive_failures >= ?",
+            (config.DELIVERY_MAX_FAILURES,),
+        )
+
+
+def get_blocked_user_ids() -> set:
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT user_id FROM delivery WHERE blocked=1")
+        return {r[0] for r in cur.fetchall()}
+
+
+def get_delivery_report() -> Dict[str, object]:
+    """Сводка по доставке: сколько получателей, заблокировавших, с ошибками подряд и когда был последний успех."""
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT COUNT(*),
+                   COALESCE(SUM(blocked), 0),
+                   COALESCE(SUM(blocked = 0 AND consecutive_failures > 0), 0),
+                   MAX(last_success)
+            FROM delivery
+            """
+        )
+        tracked, blocked, failing, last_success = cur.fetchone()
+    return {
+        "users": len(get_all_user_ids()),
+        "tracked": tracked,
+        "blocked": blocked,
+        "failing": failing,
+        "last_success": last_success,
+    }
+
+
+# --- Рассылки ---
+# Аудитория: "all" — все пользователи; "profile:<профиль>"; "olympiad:<id олимпиады>".
+
+def _audience_query(audience: str) -> Tuple[str, tuple]:
+    kind, _, value = audience.partition(":")
+    if kind == "profile":
+        return "SELECT DISTINCT user_id FROM subscriptions WHERE profile=? AND user_id > ?", (value,)
+    if kind == "olympiad":
+        return "SELECT DISTINCT user_id FROM subscriptions WHERE olympiad_id=? AND user_id > ?", (value,)
+    return (
+        "SELECT user_id FROM users WHERE user_id > ? UNION SELECT user_id FROM subscriptions WHERE user_id > ?",
+        (),
+    )
+
+
+def get_audience_page(audience: str, after: int, limit: int) -> List[int]:
+    """Следующие limit получателей с user_id > after, по возрастанию user_id."""
+    sql, params = _audience_query(audience)
+    after_params = (after, after) if audience == "all" else (after,)
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(f"{sql} ORDER BY 1 LIMIT ?", params + after_params + (limit,))
+        return [r[0] for r in cur.fetchall()]
+
+
+def count_audience(audience: str, after: int = 0) -> int:
+    sql, params = _audience_query(audience)
+    after_params = (after, after) if audience == "all" else (after,)
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT COUNT(*) FROM ({sql})", params + after_params)
+        return cur.fetchone()[0]
+
+
+def create_broadcast(text: str, audience: str, admin_chat: int, total: int) -> int:
+    with db_write() as conn:
+        cur = conn.execute(
+            "INSERT INTO broadcasts (text, audience, admin_chat, status, total, created_at) VALUES (?,?,?,?,?,?)",
+            (text, audience, admin_chat, "running", total, datetime.now(config.TIMEZONE).isoformat()),
+        )
+        return cur.lastrowid
+
+
+def get_broadcast(broadcast_id: int) -> Optional[Dict]:
+    with db_conn() as conn:
+        conn.row_factory = sqlite3.Row
+        row = conn.execute("SELECT * FROM broadcasts WHERE id=?", (broadcast_id,)).fetchone()
+        return dict(row) if row else None
+
+
+def get_broadcasts(status: Optional[str] = None, limit: int = 10) -> List[Dict]:
+    """Последние рассылки (новые первыми), при необходимости — только с данным статусом."""
+    with db_conn() as conn:
+        conn.row_factory = sqlite3.Row
+        if status:
+            rows = conn.execute(
+                "SELECT * FROM broadcasts WHERE status=? ORDER BY id DESC LIMIT ?", (status, limit)
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM broadcasts ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(r) for r in rows]
+
+
+def save_broadcast_progress(broadcast_id: int, cursor: int, sent: int, failed: int, skipped: int) -> None:
+    with db_write() as conn:
+        conn.execute(
+            "UPDATE broadcasts SET cursor=?, sent=?, failed=?, skipped=? WHERE id=?",
+            (cursor, sent, failed, skipped, broadcast_id),
+        )
+
+
+def finish_broadcast(broadcast_id: int, status: str) -> None:
+    with db_write() as conn:
+        conn.execute(
+            "UPDATE broadcasts SET status=?, finished_at=? WHERE id=? AND status='running'",
+            (status, datetime.now(config.TIMEZONE).isoformat(), broadcast_id),
+        )
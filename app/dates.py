@@ -2,107 +2,228 @@
 Разбор дат из ячеек Excel.
 """
 import re
-from datetime import date
-from typing import List, Optional, Tuple
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
 
-DATE_RE = re.compile(r"(\d{1,2})\.(\d{1,2})(?:\.(\d{2,4}))?")
-RANGE_SEP_RE = re.compile(r"\s*[–—-]\s*")
 
+# Год у дат без года выбирается относительно опорной даты каталога (сезона / загрузки таблицы),
+# а не «сегодня»: берётся ближайшее вхождение дня не раньше чем за GRACE_DAYS до опорной даты.
+# Так результат не меняется изо дня в день, а таблица, выложенная в сентябре, понимает майские и
+# летние даты как даты следующего года. В прошлом оказываются только события последних GRACE_DAYS
+# перед загрузкой; прошедшим событие считается, когда оно раньше «сегодня».
+GRACE_DAYS = 14
+MAX_ROLLOVER_DAYS = 183
+
+Event = Tuple[date, date, str]  # (начало, конец, ярлык); у одиночной даты начало == конец
+
+
+def year_for_day_month(d: int, m: int, reference: date) -> int:
+    floor = reference - timedelta(days=GRACE_DAYS)
+    for year in range(floor.year, floor.year + 5):  # 29.02 — до ближайшего високосного
+        try:
+            candidate = date(year, m, d)
+        except ValueError:
+            continue
+        if candidate >= floor:
+            return year
+    return floor.year
 
-def year_for_day_month(d: int, m: int, today: date) -> int:
-    try:
-        candidate = date(today.year, m, d)
-    except ValueError:
-        return today.year
-    return candidate.year if candidate >= today else today.year + 1
 
+def _explicit_year(y: Optional[str]) -> Optional[int]:
+    if not y:
+        return None
+    return int(y) + (2000 if int(y) < 100 else 0)
 
-def _resolve_year(dd: int, mm: int, y: Optional[str], today: date) -> int:
-    if y:
-        return int(y) + (2000 if int(y) < 100 else 0)
-    return year_for_day_month(dd, mm, today)
+
+DATE_RE = re.compile(r"(\d{1,2})\.(\d{1,2})(?:\.(\d{2,4}))?")
+# Записи ячейки разделяются переводом строки и ';', а также запятой, если за ней не дата
+# («01.02, 03.02/два тура» — одна запись)
+CHUNK_SEP_RE = re.compile(r"[\n\r;]+")
+COMMA_SEP_RE = re.compile(r",(?!\s*\d{1,2}\.\d{1,2})")
+DASHES = "–—-"
+
+Parts = Tuple[str, str, Optional[str]]  # (день, месяц, год или None) как в ячейке
+
+# Кэши действительны для одной опорной даты, т. е. на всё время жизни каталога:
+#   (начало, конец) из ячейки -> интервал (None, если такой даты нет);
+#   текст ячейки -> события (одна и та же ячейка разбирается для каждого подписчика и каждый день).
+_resolved: Dict[Tuple[Parts, Optional[Parts]], Optional[Tuple[date, date]]] = {}
+_parsed: Dict[str, Tuple[Event, ...]] = {}
+_cache_reference: Optional[date] = None
+PARSED_CACHE_SIZE = 50_000
+
+
+def _interval(start: Parts, end: Optional[Parts], reference: date) -> Optional[Tuple[date, date]]:
+    """
+    Интервал записи. Год начала без года берётся из года конца диапазона («28.12–05.01.2026»),
+    иначе — по опорной дате; год конца без года — по началу (конец раньше начала — следующий год, если
+    диапазон не длиннее MAX_ROLLOVER_DAYS). Некорректный конец — событие из одного дня.
+    """
+    sd, sm = int(start[0]), int(start[1])
+    sy = _explicit_year(start[2])
+    if end is not None:
+        ed, em = int(end[0]), int(end[1])
+        ey = _explicit_year(end[2])
+        if sy is None and ey is not None:
+            sy = ey - ((sm, sd) > (em, ed))
+    if sy is None:
+        sy = year_for_day_month(sd, sm, reference)
+    try:
+        first = date(sy, sm, sd)
+    except ValueError:
+        return None
+    if end is None:
+        return first, first
+    try:
+        last = date(ey if ey is not None else sy + ((em, ed) < (sm, sd)), em, ed)
+    except ValueError:
+        return first, first
+    if last < first or (ey is None and (last - first).days > MAX_ROLLOVER_DAYS):
+        return first, first
+    return first, last
 
 
-def parse_dates_from_cell(cell: str, today: date) -> List[Tuple[date, str]]:
+def _normalize(cell: str) -> Optional[str]:
     if not cell:
-        return []
+        return None
     text = str(cell).strip()
     if not text or text.upper().startswith("ПОКА"):
-        return []
+        return None
+    return text
+
+
+def parse_events(cell: str, reference: date) -> Tuple[Event, ...]:
+    """
+    Все события ячейки: ((начало, конец, ярлык), ...) по возрастанию, без фильтра по «сегодня».
+
+    Диапазоны («12.11–14.11», «с 12.09 по 14.09») — интервалы, одиночные даты — интервал из одного дня;
+    ярлыки одинаковых интервалов объединяются через '; '. Результат зависит только от ячейки и опорной
+    даты, поэтому кэшируется на всё время жизни каталога.
+    """
+    global _cache_reference
+    text = _normalize(cell)
+    if text is None:
+        return ()
+    if reference != _cache_reference:
+        _resolved.clear()
+        _parsed.clear()
+        _cache_reference = reference
+    cached = _parsed.get(text)
+    if cached is None:
+        if len(_parsed) >= PARSED_CACHE_SIZE:
+            _parsed.clear()
+        cached = _parsed[text] = resolve_entries(_entries(text), reference, _resolved)
+    return cached
+
+
+def parse_events_at(cell: str, reference: date, memo: Optional[Dict] = None) -> Tuple[Event, ...]:
+    """Как parse_events, но мимо общего кэша: для ячеек прежней версии каталога с её опорной датой."""
+    text = _normalize(cell)
+    return resolve_entries(_entries(text), reference, memo) if text is not None else ()
+
+
+def resolve_entries(
+    entries: List[Tuple[Parts, Optional[Parts], str]],
+    reference: date,
+    memo: Optional[Dict[Tuple[Parts, Optional[Parts]], Optional[Tuple[date, date]]]] = None,
+) -> Tuple[Event, ...]:
+    """События записей при опорной дате reference. memo — кэш интервалов, действительный для reference."""
+    if memo is None:
+        memo = {}
+    out: List[Event] = []
+    for start, end, label in entries:
+        key = (start, end)
+        iv = memo.get(key, False)
+        if iv is False:
+            iv = memo[key] = _interval(start, end, reference)
+        if iv is not None:
+            out.append((iv[0], iv[1], label))
+
+    if len(out) < 2:
+        return tuple(out)
+    uniq: Dict[Tuple[date, date], str] = {}
+    for first, last, lab in out:
+        k = (first, last)
+        if k in uniq and lab not in uniq[k]:
+            uniq[k] = uniq[k] + f"; {lab}"
+        else:
+            uniq.setdefault(k, lab)
+    # по началу; события с одним началом — в порядке записей в ячейке
+    return tuple((first, last, uniq[(first, last)]) for first, last in sorted(uniq, key=lambda k: k[0]))
+
+
+def upcoming_events(cell: str, today: date, reference: Optional[date] = None) -> List[Event]:
+    """События, которые ещё не закончились: идущие сейчас и будущие. reference по умолчанию — today."""
+    return [ev for ev in parse_events(cell, reference or today) if ev[1] >= today]
+
 
-    chunks = re.split(r"[\n;]+", text.replace("\r", "\n"))
-    refined = []
-    for ch in chunks:
-        parts = [p.strip() for p in re.split(r",(?!\s*\d{1,2}\.\d{1,2})", ch) if p.strip()]
-        refined.extend(parts)
+def parse_dates_from_cell(cell: str, today: date, reference: Optional[date] = None) -> List[Tuple[date, str]]:
+    """Даты начала будущих (включая сегодня) событий: [(дата, ярлык)], по возрастанию, ярлыки одной даты через '; '.
 
+    Уже идущие диапазоны сюда не попадают — для них см. upcoming_events. reference по умолчанию — today.
+    """
     out: List[Tuple[date, str]] = []
-    for entry in refined:
-        entry = entry.strip()
-        if not entry:
+    for first, _, label in parse_events(cell, reference or today):
+        if first < today:
             continue
-
-        # отделяем ярлык после '/'
-        if "/" in entry:
-            left, label = entry.split("/", 1)
-            label = label.strip() or "событие"
+        if out and out[-1][0] == first:
+            if label not in out[-1][1]:
+                out[-1] = (first, out[-1][1] + f"; {label}")
         else:
-            left, label = entry, "событие"
-
-        # "с 12.09 по 14.09"
-        if "с " in left.lower() and " по " in left.lower():
-            m = DATE_RE.findall(left)
-            if m:
-                d1, m1, y1 = m[0]
-                dd, mm = int(d1), int(m1)
-                yy = _resolve_year(dd, mm, y1, today)
-                try:
-                    dt = date(yy, mm, dd)
-                    if dt >= today:
-                        out.append((dt, label))
-                except ValueError:
-                    pass
-            continue
+            out.append((first, label))
+    return out
 
-        # диапазон "12.11–14.11(.2025)"
-        if RANGE_SEP_RE.search(left):
-            sides = RANGE_SEP_RE.split(left)
-            if sides:
-                m = DATE_RE.search(sides[0])
-                if m:
-                    d1, m1, y1 = m.groups()
-                    dd, mm = int(d1), int(m1)
-                    yy = _resolve_year(dd, mm, y1, today)
-                    try:
-                        dt = date(yy, mm, dd)
-                        if dt >= today:
-                            out.append((dt, label or "начало"))
-                    except ValueError:
-                        pass
-            continue
 
-        # одиночная дата
-        m = DATE_RE.search(left) or DATE_RE.search(entry)
-        if m:
-            d, m_, y = m.groups()
-            dd, mm = int(d), int(m_)
-            yy = _resolve_year(dd, mm, y, today)
-            try:
-                dt = date(yy, mm, dd)
-                if dt >= today:
-                    out.append((dt, label))
-            except ValueError:
-                pass
-
-    uniq = {}
-    for dt, lab in out:
-        if dt in uniq and lab not in uniq[dt]:
-            uniq[dt] = uniq[dt] + f"; {lab}"
-        else:
-            uniq.setdefault(dt, lab)
-    return [(dt, uniq[dt]) for dt in sorted(uniq.keys())]
+def _has_dash(text: str) -> bool:
+    return any(d in text for d in DASHES)
+
 
+def _entries(text: str) -> List[Tuple[Parts, Optional[Parts], str]]:
+    """Записи ячейки без привязки к датам календаря: [(начало, конец диапазона или None, ярлык)].
 
-def next_upcoming_from_cell(cell: str, today: date) -> Optional[Tuple[date, str]]:
-    items = parse_dates_from_cell(cell, today)
+    Дата записи — первая до '/', а если до '/' дат нет — первая после. «с … по …» и диапазон через
+    тире («12.11–14.11») дают конец; у диапазона, где тире стоит раньше первой даты, начала нет.
+    """
+    out: List[Tuple[Parts, Optional[Parts], str]] = []
+    for chunk in CHUNK_SEP_RE.split(text):
+        for entry in COMMA_SEP_RE.split(chunk) if "," in chunk else (chunk,):
+            entry = entry.strip()
+            if not entry:
+                continue
+            left, slash, label = entry.partition("/")
+            label = label.strip() or "событие"
+            first = DATE_RE.search(left)
+            low = left.lower()
+            if "с " in low and " по " in low:
+                if first is None:
+                    continue
+                last = DATE_RE.search(left, first.end())
+            elif _has_dash(left):
+                if first is None or _has_dash(left[: first.start()]):
+                    continue
+                last = DATE_RE.search(left, first.end())
+                if last is not None and not _has_dash(left[first.end(): last.start()]):
+                    last = None
+            else:
+                last = None
+                if first is None:
+                    first = DATE_RE.search(entry, len(left)) if slash else None
+                    if first is None:
+                        continue
+            out.append((first.group(1, 2, 3), last.group(1, 2, 3) if last is not None else None, label))
+    return out
+
+
+def next_upcoming_from_cell(cell: str, today: date, reference: Optional[date] = None) -> Optional[Event]:
+    """Ближайшее незакончившееся событие (идущее сейчас или будущее)."""
+    items = upcoming_events(cell, today, reference)
     return items[0] if items else None
+
+
+def format_event(ev: Event, today: date) -> str:
+    first, last, label = ev
+    if first == last:
+        return f"{first:%d.%m.%Y} — {label}"
+    if first <= today:
+        return f"идёт, до {last:%d.%m.%Y} — {label}"
+    return f"{first:%d.%m.%Y}–{last:%d.%m.%Y} — {label}"
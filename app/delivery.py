@@ -0,0 +1,45 @@
+"""Отправка массовых сообщений (напоминания, рассылки) с учётом метрик и RetryAfter."""
+import asyncio
+from typing import Optional, Sequence
+
+from telegram.error import Forbidden, RetryAfter
+
+from app import logs, metrics
+from app.ratelimit import lane_args
+
+SENT = "sent"
+BLOCKED = "blocked"
+FAILED = "failed"
+
+
+async def send_chunks(bot, chat_id: int, chunks: Sequence[str], kind: str, lane: Optional[str] = None) -> str:
+    """Шлёт части сообщения одному получателю. Возвращает SENT, BLOCKED или FAILED.
+
+    На RetryAfter ждём указанное Telegram время и повторяем часть один раз.
+    Прочие ошибки не прерывают отправку остальных частей. kind ("daily", "broadcast") — и метка
+    метрик, и полоса планировщика запросов (lane — если полоса другая): массовые отправки
+    пропускают вперёд ответы пользователям. Каждая часть — событие лога message.
+    """
+    result = SENT
+    extra = lane_args(bot, lane or kind)
+    for ch in chunks:
+        try:
+            try:
+                await bot.send_message(chat_id=chat_id, text=ch, **extra)
+            except RetryAfter as e:
+                metrics.MESSAGES_RETRIED.inc(kind=kind, error="RetryAfter")
+                logs.event("message", "retry", chat_id=chat_id, kind=kind, retry_after=e.retry_after)
+                await asyncio.sleep(e.retry_after)
+                await bot.send_message(chat_id=chat_id, text=ch, **extra)
+        except Forbidden:
+            metrics.MESSAGES_FAILED.inc(kind=kind, error="Forbidden")
+            logs.event("message", BLOCKED, chat_id=chat_id, kind=kind)
+            return BLOCKED
+        except Exception as e:
+            metrics.MESSAGES_FAILED.inc(kind=kind, error=type(e).__name__)
+            logs.event("message", FAILED, chat_id=chat_id, kind=kind, error=f"{type(e).__name__}: {e}")
+            result = FAILED
+            continue
+        metrics.MESSAGES_SENT.inc(kind=kind)
+        logs.event("message", SENT, chat_id=chat_id, kind=kind)
+    return result
@@ -1,12 +1,23 @@
 """
-Чтение списка олимпиад из Excel.
+Чтение списка олимпиад из таблицы.
+
+Источник выбирается по расширению EXCEL_FILE:
+- .xlsx/.xlsm — openpyxl в режиме read-only (потоково, без pandas);
+- .csv        — модуль csv (разделитель «,», «;» или табуляция определяется сам);
+- .json       — список объектов {заголовок: значение};
+- .xls/.ods   — через pandas (необязательная зависимость, нужен соответствующий движок).
+Новые форматы подключаются через register_source.
 """
+import csv
+import json
+import os
 import re
-from typing import Dict, List, Optional
+import zipfile
+from datetime import date, datetime, timezone
+from xml.etree import ElementTree
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-import pandas as pd
-
-from app import config
+from app import config, metrics
 
 REQUIRED_COLUMN_KEYWORDS = {
     "id": ["название", "олимпиад"],
@@ -14,9 +25,130 @@ REQUIRED_COLUMN_KEYWORDS = {
     "date": ["дат"],
 }
 
+# Читатель таблицы: путь -> (заголовки, строки значений). Если у строк есть close(),
+# fetch_olympiads вызывает его и тогда, когда разбор прервался (например, нет нужных столбцов)
+TableReader = Callable[[str], Tuple[List[str], Iterable[Sequence]]]
+
+_SOURCES: Dict[str, TableReader] = {}
+
+
+def register_source(extensions: Iterable[str], reader: TableReader) -> None:
+    for ext in extensions:
+        _SOURCES[ext.lower()] = reader
+
+
+class _WorkbookRows:
+    """Строки листа read-only книги; книга закрывается в конце прохода или по close()."""
+
+    def __init__(self, wb, rows: Iterator[Sequence]):
+        self._wb = wb
+        self._rows = rows
+
+    def __iter__(self) -> "_WorkbookRows":
+        return self
+
+    def __next__(self) -> Sequence:
+        try:
+            return next(self._rows)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self._wb.close()
+
+
+def _read_xlsx(path: str) -> Tuple[List[str], Iterator[Sequence]]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, ())
+    except Exception:
+        wb.close()
+        raise
+    return [_cell_str(h) for h in header], _WorkbookRows(wb, rows)
+
+
+def saved_date(path: str) -> Optional[date]:
+    """День последнего сохранения книги .xlsx/.xlsm из её свойств (docProps/core.xml).
+
+    В отличие от времени изменения файла, не сбрасывается при копировании, checkout и деплое.
+    None — другой формат или свойства нет."""
+    if os.path.splitext(path)[1].lower() not in (".xlsx", ".xlsm"):
+        return None
+    try:
+        with zipfile.ZipFile(path) as z:
+            root = ElementTree.fromstring(z.read("docProps/core.xml"))
+        text = root.findtext("{http://purl.org/dc/terms/}modified") or ""
+        saved = datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+    except (KeyError, OSError, ValueError, zipfile.BadZipFile, ElementTree.ParseError):
+        return None
+    if saved.tzinfo is None:
+        saved = saved.replace(tzinfo=timezone.utc)
+    return saved.astimezone(config.TIMEZONE).date()
+
+
+def _read_csv(path: str) -> Tuple[List[str], List[Sequence]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        rows = list(csv.reader(f, dialect))
+    return (rows[0] if rows else []), rows[1:]
+
+
+def _read_json(path: str) -> Tuple[List[str], List[Sequence]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("olympiads") or data.get("rows") or []
+    header: List[str] = []
+    for obj in data:
+        for k in obj:
+            if k not in header:
+                header.append(k)
+    return header, [[obj.get(k) for k in header] for obj in data]
+
+
+def _read_pandas(path: str) -> Tuple[List[str], List[Sequence]]:
+    import pandas as pd  # необязательная зависимость: только для .xls/.ods
+
+    df = pd.read_excel(path, sheet_name=0)
+    df = df.astype(object).where(df.notna(), None)
+    return [str(c) for c in df.columns], df.itertuples(index=False, name=None)
+
+
+register_source([".xlsx", ".xlsm"], _read_xlsx)
+register_source([".csv"], _read_csv)
+register_source([".json"], _read_json)
+register_source([".xls", ".ods"], _read_pandas)
+
 
-def detect_col(df: pd.DataFrame, keywords: List[str]) -> Optional[str]:
-    for col in df.columns:
+def read_table(path: str) -> Tuple[List[str], Iterable[Sequence]]:
+    ext = os.path.splitext(path)[1].lower()
+    reader = _SOURCES.get(ext)
+    if reader is None:
+        raise RuntimeError(f"Неподдерживаемый формат таблицы: {ext or path}")
+    return reader(path)
+
+
+def _cell_str(v) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    if isinstance(v, (datetime, date)):
+        return v.strftime("%d.%m.%Y")
+    return str(v)
+
+
+def detect_col(columns: Iterable[str], keywords: List[str]) -> Optional[str]:
+    for col in columns:
         low = col.lower()
         if any(kw.lower() in low for kw in keywords):
             return col
@@ -24,34 +156,46 @@ def detect_col(df: pd.DataFrame, keywords: List[str]) -> Optional[str]:
 
 
 def fetch_olympiads() -> List[Dict]:
-    df = pd.read_excel(config.EXCEL_FILE, sheet_name=0)
-
-    id_col = detect_col(df, REQUIRED_COLUMN_KEYWORDS["id"])
-    prof_col = detect_col(df, REQUIRED_COLUMN_KEYWORDS["profile"])
-    date_col = detect_col(df, REQUIRED_COLUMN_KEYWORDS["date"])
-    lvl_col = detect_col(df, ["уровень"])
-    desc_col = detect_col(df, ["описан"])
-    link_col = detect_col(df, ["ссыл"])
-
-    if not id_col or not prof_col or not date_col:
-        raise RuntimeError("Не найдены обязательные столбцы в Excel (название/профиль/дата).")
-
-    olympiads = []
-    for _, row in df.iterrows():
-        oid = str(row[id_col]).strip()
-        raw_profiles = str(row.get(prof_col, "") or "")
-        profiles = [p.strip() for p in re.split(r"[;,/]", raw_profiles) if p.strip()] or ["—"]
-        olympiads.append(
-            {
-                "id": oid,
-                "profiles": profiles,
-                "name": oid,
-                "date_desc": str(row.get(date_col, "") or "").strip(),
-                "level": str(row.get(lvl_col, "") or "—").strip(),
-                "description": str(row.get(desc_col, "") or "—").strip(),
-                "link": str(row.get(link_col, "") or "—").strip(),
-            }
-        )
+    with metrics.EXCEL_LOAD.time():
+        header, rows = read_table(config.EXCEL_FILE)
+        try:
+            id_col = detect_col(header, REQUIRED_COLUMN_KEYWORDS["id"])
+            prof_col = detect_col(header, REQUIRED_COLUMN_KEYWORDS["profile"])
+            date_col = detect_col(header, REQUIRED_COLUMN_KEYWORDS["date"])
+            lvl_col = detect_col(header, ["уровень"])
+            desc_col = detect_col(header, ["описан"])
+            link_col = detect_col(header, ["ссыл"])
+
+            if not id_col or not prof_col or not date_col:
+                raise RuntimeError("Не найдены обязательные столбцы в Excel (название/профиль/дата).")
+
+            idx = {col: i for i, col in reversed(list(enumerate(header)))}
+
+            def get(row: Sequence, col: Optional[str]) -> str:
+                i = idx.get(col) if col else None
+                return _cell_str(row[i]).strip() if i is not None and i < len(row) else ""
+
+            olympiads = []
+            for row in rows:
+                if not any(v not in (None, "") for v in row):
+                    continue
+                oid = get(row, id_col)
+                profiles = [p.strip() for p in re.split(r"[;,/]", get(row, prof_col)) if p.strip()] or ["—"]
+                olympiads.append(
+                    {
+                        "id": oid,
+                        "profiles": profiles,
+                        "name": oid,
+                        "date_desc": get(row, date_col),
+                        "level": get(row, lvl_col) or "—",
+                        "description": get(row, desc_col) or "—",
+                        "link": get(row, link_col) or "—",
+                    }
+                )
+        finally:
+            close = getattr(rows, "close", None)
+            if close is not None:
+                close()
     return olympiads
 
 
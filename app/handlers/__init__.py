@@ -1,36 +1,61 @@
 """Регистрация всех хендлеров бота в Application."""
-from telegram.ext import Application, CallbackQueryHandler, CommandHandler, MessageHandler, filters
+from telegram import Update
+from telegram.ext import Application, CallbackQueryHandler, CommandHandler, MessageHandler, TypeHandler, filters
 
+from app import warmup
 from app.handlers import admin, delete, fallback, menu, subscribe
+from app.metrics import timed
+from app.profiling import profiled
+
+
+def _command(app: Application, name: str, callback) -> None:
+    app.add_handler(CommandHandler(name, timed(f"/{name}", profiled(callback))))
+
+
+def _callback(app: Application, pattern: str, callback) -> None:
+    app.add_handler(CallbackQueryHandler(timed(pattern, profiled(callback)), pattern=pattern))
 
 
 def register_handlers(app: Application) -> None:
+    # До готовности БД апдейты ждут (прогрев идёт в фоне, см. app.warmup)
+    app.add_handler(TypeHandler(Update, warmup.wait_ready), group=-1)
+
     # Меню
-    app.add_handler(CommandHandler("start", menu.start))
-    app.add_handler(CallbackQueryHandler(menu.menu_back_cb, pattern="^menu_back$"))
-    app.add_handler(CallbackQueryHandler(menu.menu_select_cb, pattern="^menu_select$"))
-    app.add_handler(CallbackQueryHandler(menu.menu_list_cb, pattern="^menu_list$"))
-    app.add_handler(CallbackQueryHandler(menu.menu_delete_cb, pattern="^menu_delete$"))
+    _command(app, "start", menu.start)
+    _callback(app, "^menu_back$", menu.menu_back_cb)
+    _callback(app, "^menu_select$", menu.menu_select_cb)
+    _callback(app, "^menu_list$", menu.menu_list_cb)
+    _callback(app, "^menu_delete$", menu.menu_delete_cb)
+    _callback(app, "^menu_preview$", menu.menu_preview_cb)
+    _command(app, "preview", menu.preview_cmd)
 
     # Удаление
-    app.add_handler(CallbackQueryHandler(delete.del_one_cb, pattern="^del_one$"))
-    app.add_handler(CallbackQueryHandler(delete.del_one_oly_cb, pattern=r"^del_one_oly\|"))
-    app.add_handler(CallbackQueryHandler(delete.del_profile_cb, pattern="^del_profile$"))
-    app.add_handler(CallbackQueryHandler(delete.del_profile_sel_cb, pattern=r"^del_profile_sel\|"))
+    _callback(app, "^del_one$", delete.del_one_cb)
+    _callback(app, r"^del_one_oly\|", delete.del_one_oly_cb)
+    _callback(app, "^del_profile$", delete.del_profile_cb)
+    _callback(app, r"^del_profile_sel\|", delete.del_profile_sel_cb)
 
     # Подписка
-    app.add_handler(CallbackQueryHandler(subscribe.toggle_profile_cb, pattern=r"^toggle_profile\|"))
-    app.add_handler(CallbackQueryHandler(subscribe.profiles_done_cb, pattern="^profiles_done$"))
-    app.add_handler(CallbackQueryHandler(subscribe.include_all_cb, pattern="^include_all$"))
-    app.add_handler(CallbackQueryHandler(subscribe.include_manual_cb, pattern="^include_manual$"))
-    app.add_handler(CallbackQueryHandler(subscribe.toggle_oly_cb, pattern=r"^toggle_oly\|"))
-    app.add_handler(CallbackQueryHandler(subscribe.manual_done_cb, pattern="^manual_done$"))
+    _callback(app, r"^toggle_profile\|", subscribe.toggle_profile_cb)
+    _callback(app, "^profiles_done$", subscribe.profiles_done_cb)
+    _callback(app, "^include_all$", subscribe.include_all_cb)
+    _callback(app, "^include_manual$", subscribe.include_manual_cb)
+    _callback(app, r"^toggle_oly\|", subscribe.toggle_oly_cb)
+    _callback(app, "^manual_done$", subscribe.manual_done_cb)
 
     # Админ
-    app.add_handler(CommandHandler("broadcast", admin.broadcast_cmd))
-    app.add_handler(CommandHandler("testnotify", admin.test_notify_cmd))
+    _command(app, "broadcast", admin.broadcast_cmd)
+    _command(app, "broadcast_to", admin.broadcast_to_cmd)
+    _command(app, "broadcast_status", admin.broadcast_status_cmd)
+    _command(app, "broadcast_cancel", admin.broadcast_cancel_cmd)
+    _command(app, "testnotify", admin.test_notify_cmd)
+    _command(app, "simulate", admin.simulate_cmd)
+    _command(app, "stats", admin.stats_cmd)
+    _command(app, "delivery", admin.delivery_cmd)
+    _command(app, "archive", admin.archive_cmd)
+    _command(app, "profile", admin.profile_cmd)
 
     # Текст и неизвестные команды
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, fallback.catch_all))
-    app.add_handler(MessageHandler(filters.COMMAND, fallback.unknown_command))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, timed("text", profiled(fallback.catch_all))))
+    app.add_handler(MessageHandler(filters.COMMAND, timed("unknown_command", profiled(fallback.unknown_command))))
     app.add_error_handler(fallback.error_handler)
@@ -1,14 +1,13 @@
 """Админ-команды."""
+import asyncio
 from datetime import datetime
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from app import config, database
+from app import archive, broadcasts, catalog, config, database, metrics, plans, profiling, simulation
 from app.constants import UD_AWAIT_BROADCAST
-from app.excel_data import build_lookup, fetch_olympiads
-from app.reminders import build_user_reminders
-from app.ui import chunk_messages, split_text
+from app.ui import chunk_messages, split_text, utf16_len
 
 
 async def test_notify_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -17,26 +16,58 @@ async def test_notify_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     today = datetime.now(config.TIMEZONE).date()
-    olys = fetch_olympiads()
-    lookup = build_lookup(olys)
-
-    uid = update.effective_user.id
-    items = database.get_user_subscription_pairs(uid)
-
-    lines = build_user_reminders(lookup, items, today)
-    if lines and lines != ["🔔 Напоминание:"]:
-        for ch in chunk_messages(lines):
+    lines, lengths = await plans.plan(update.effective_user.id, today)
+    if len(lines) > 1:
+        for ch in chunk_messages(lines, config.MAX_MESSAGE_LENGTH - utf16_len("🧪 TEST:\n\n"), lengths):
             await update.message.reply_text("🧪 TEST:\n\n" + ch)
     else:
         await update.message.reply_text("🧪 TEST: Сегодня напоминаний бы не было по текущей политике.")
 
 
+async def simulate_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in config.ADMIN_IDS:
+        await update.message.reply_text("⛔ Только для админа.")
+        return
+
+    args = context.args or []
+    try:
+        days = int(args[0]) if args else 365
+        mode = args[1].upper() if len(args) > 1 else None
+        window_days = days_set = None
+        if len(args) > 2 and mode == "WINDOW":
+            window_days = int(args[2])
+        elif len(args) > 2:
+            days_set = {int(x) for x in args[2].split(",") if x.strip()}
+        if not 1 <= days <= 730 or mode not in (None, "WINDOW", "MILESTONES"):
+            raise ValueError
+    except ValueError:
+        await update.message.reply_text(
+            "Использование: /simulate [дней] [MILESTONES|WINDOW] [дни через запятую | ширина окна]\n"
+            "Например: /simulate 365, /simulate 90 WINDOW 14, /simulate 365 MILESTONES 7,3,1,0"
+        )
+        return
+
+    today = datetime.now(config.TIMEZONE).date()
+    lookup = await catalog.lookup()
+    subs = database.get_all_subscriptions()
+    blocked = database.get_blocked_user_ids()
+    res = await asyncio.to_thread(
+        simulation.simulate, lookup, subs, today, days, mode, window_days, days_set,
+        blocked=blocked, reference=catalog.reference_date(),
+    )
+    await update.message.reply_text(
+        "🧮 Симуляция рассылки:\n\n"
+        f"Политика: {mode or config.REMIND_MODE}, дни до события: "
+        f"{', '.join(map(str, res['due_deltas'])) or '—'}\n" + "\n".join(simulation.summary_lines(res))
+    )
+
+
 async def broadcast_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id not in config.ADMIN_IDS:
         await update.message.reply_text("⛔ Эта команда доступна только администратору.")
         return
 
-    database.ensure_user(update.effective_user)
+    await asyncio.to_thread(database.ensure_user, update.effective_user)
 
     if context.args:
         text = " ".join(context.args).strip()
@@ -47,37 +78,172 @@ async def broadcast_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         await do_broadcast(update, context, text)
     else:
-        context.user_data[UD_AWAIT_BROADCAST] = True
+        context.user_data[UD_AWAIT_BROADCAST] = "all"
         await update.message.reply_text("✍️ Отправьте текст рассылки одним сообщением. Для отмены — /start.")
 
 
+async def broadcast_to_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in config.ADMIN_IDS:
+        await update.message.reply_text("⛔ Эта команда доступна только администратору.")
+        return
+
+    args = context.args or []
+    value = " ".join(args[1:]).strip()
+    if len(args) < 2 or args[0] not in ("profile", "olympiad") or not value:
+        await update.message.reply_text(
+            "Использование:\n/broadcast_to profile <профиль>\n/broadcast_to olympiad <название олимпиады>\n"
+            "Затем отправьте текст рассылки отдельным сообщением."
+        )
+        return
+    audience = f"{args[0]}:{value}"
+    total = database.count_audience(audience)
+    if not total:
+        await update.message.reply_text(f"Нет подписчиков: {broadcasts.audience_title(audience)}.")
+        return
+    context.user_data[UD_AWAIT_BROADCAST] = audience
+    await update.message.reply_text(
+        f"✍️ Получателей: {total} ({broadcasts.audience_title(audience)}). "
+        "Отправьте текст рассылки одним сообщением. Для отмены — /start."
+    )
+
+
 async def maybe_handle_broadcast_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
     if update.effective_user and update.effective_user.id in config.ADMIN_IDS and context.user_data.get(
         UD_AWAIT_BROADCAST
     ):
-        context.user_data.pop(UD_AWAIT_BROADCAST, None)
+        audience = context.user_data.pop(UD_AWAIT_BROADCAST, None)
         text = (update.message.text or "").strip()
         if not text:
             await update.message.reply_text("Пустой текст. Рассылка отменена.")
             return True
-        await do_broadcast(update, context, text)
+        await do_broadcast(update, context, text, audience if isinstance(audience, str) else "all")
         return True
     return False
 
 
-async def do_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str):
-    admin_chat = update.effective_chat.id
-    user_ids = sorted(database.get_all_user_ids())
-    sent = failed = 0
-    chunks = split_text(text)
-    for uid in user_ids:
-        try:
-            for ch in chunks:
-                await context.bot.send_message(chat_id=uid, text=ch)
-            sent += 1
-        except Exception:
-            failed += 1
-    await context.bot.send_message(
-        chat_id=admin_chat,
-        text=f"✅ Рассылка завершена.\nПолучателей: {len(user_ids)}\nУспешно: {sent}\nОшибок: {failed}",
+async def do_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, audience: str = "all"):
+    broadcast_id, total = await broadcasts.start(context.application, text, audience, update.effective_chat.id)
+    await update.message.reply_text(
+        f"📣 Рассылка #{broadcast_id} запущена ({broadcasts.audience_title(audience)}), получателей: {total}.\n"
+        f"Прогресс — /broadcast_status, отмена — /broadcast_cancel {broadcast_id}."
+    )
+
+
+async def broadcast_status_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in config.ADMIN_IDS:
+        await update.message.reply_text("⛔ Только для админа.")
+        return
+    await update.message.reply_text("📣 Рассылки:\n\n" + "\n".join(broadcasts.status_lines()))
+
+
+async def broadcast_cancel_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in config.ADMIN_IDS:
+        await update.message.reply_text("⛔ Только для админа.")
+        return
+    args = context.args or []
+    if not args or not args[0].isdigit():
+        await update.message.reply_text("Использование: /broadcast_cancel <номер рассылки>")
+        return
+    if await broadcasts.cancel(int(args[0])):
+        await update.message.reply_text(f"Рассылка #{args[0]} отменена.")
+    else:
+        await update.message.reply_text(f"Рассылка #{args[0]} не выполняется.")
+
+
+async def delivery_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in config.ADMIN_IDS:
+        await update.message.reply_text("⛔ Только для админа.")
+        return
+
+    r = database.get_delivery_report()
+    await update.message.reply_text(
+        "📬 Доставка:\n\n"
+        f"Пользователей: {r['users']}\n"
+        f"Заблокировали бота / недоступны: {r['blocked']}\n"
+        f"С ошибками доставки подряд: {r['failing']}\n"
+        f"Получат следующую рассылку: {r['users'] - r['blocked']}\n"
+        f"Последняя успешная доставка: {r['last_success'] or '—'}"
     )
+
+
+async def stats_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in config.ADMIN_IDS:
+        await update.message.reply_text("⛔ Только для админа.")
+        return
+
+    lines = ["📊 Статистика с момента запуска:", "", "Хендлеры (вызовов, среднее, p95, макс):"]
+    for (name,), count, total, mx in metrics.HANDLER_LATENCY.stats():
+        p95 = metrics.HANDLER_LATENCY.quantile(0.95, handler=name)
+        errors = metrics.HANDLER_ERRORS.get(handler=name)
+        lines.append(
+            f"• {name}: {count}, {total / count * 1000:.0f} мс, ≤{p95 * 1000:.0f} мс, {mx * 1000:.0f} мс"
+            + (f", ошибок {errors:g}" if errors else "")
+        )
+
+    lines.append("")
+    lines.append("Сообщения:")
+    for (kind,), n in metrics.MESSAGES_SENT.items():
+        lines.append(f"• {kind}: отправлено {n:g}")
+    for (kind, error), n in metrics.MESSAGES_FAILED.items():
+        lines.append(f"• {kind}: ошибка {error} — {n:g}")
+    for (kind, error), n in metrics.MESSAGES_RETRIED.items():
+        lines.append(f"• {kind}: повтор после {error} — {n:g}")
+
+    for _, count, total, mx in metrics.EXCEL_LOAD.stats():
+        lines.append("")
+        lines.append(f"Чтение Excel: {count} раз, в среднем {total / count * 1000:.0f} мс, макс {mx * 1000:.0f} мс")
+
+    for _, count, total, mx in metrics.DAILY_RUN.stats():
+        lines.append("")
+        lines.append(
+            f"Ежедневная рассылка: {count} запусков, в среднем {total / count:.1f} с, макс {mx:.1f} с, "
+            f"пользователей в последней: {metrics.DAILY_LAST_USERS.get():g}"
+        )
+
+    for ch in split_text("\n".join(lines)):
+        await update.message.reply_text(ch)
+
+
+async def archive_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in config.ADMIN_IDS:
+        await update.message.reply_text("⛔ Только для админа.")
+        return
+
+    r = await archive.run(force=(context.args or [""])[0].lower() == "force")
+    await update.message.reply_text(
+        "🗄 Архивация подписок:\n\n"
+        + (f"⚠️ Перенос в архив пропущен: {r['held']}. Перенести всё равно — /archive force\n" if r["held"] else "")
+        + f"В архив: {r['archived']} подписок ({r['archived_keys']} олимпиад/профилей)\n"
+        f"Возвращено из архива: {r['restored']} ({r['restored_keys']})\n"
+        f"Подписок в работе: {r['subscriptions']}, в архиве: {r['archive']}\n"
+        f"База: {r['size_bytes'] / 1024 / 1024:.1f} МБ" + (" (после VACUUM)" if r["vacuumed"] else "") + "\n"
+        f"Заняло {r['seconds']:.1f} с"
+    )
+
+
+async def profile_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in config.ADMIN_IDS:
+        await update.message.reply_text("⛔ Только для админа.")
+        return
+
+    args = context.args or []
+    chat_id = update.effective_chat.id
+    if args and args[0] == "daily":
+        if profiling.arm_daily(chat_id):
+            await update.message.reply_text("⏱ Следующая ежедневная рассылка будет запущена под профилировщиком.")
+        else:
+            await update.message.reply_text("Профилировщик занят апдейтами — дождитесь отчёта или /profile off.")
+    elif args and args[0] == "updates":
+        count = int(args[1]) if len(args) > 1 and args[1].isdigit() else 100
+        if profiling.arm_updates(chat_id, max(1, count)):
+            await update.message.reply_text(f"⏱ Профилирую следующие {max(1, count)} апдейтов.")
+        else:
+            await update.message.reply_text("Профилировщик занят — дождитесь отчёта или /profile off.")
+    elif args and args[0] == "off":
+        profiling.disarm()
+        await update.message.reply_text("Профилирование отменено.")
+    else:
+        await update.message.reply_text(
+            profiling.status() + "\n\n/profile daily — следующая ежедневная рассылка\n"
+            "/profile updates N — следующие N апдейтов\n/profile off — отменить"
+        )
@@ -1,4 +1,6 @@
 """Сценарий удаления подписок."""
+import asyncio
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -27,7 +29,7 @@ async def del_one_oly_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await safe_edit_message(update.callback_query, "❌ Неверный выбор.", BACK_TO_MENU)
         return
     oid, name, prof = rows[idx]
-    database.remove_subscription(update.effective_user.id, oid, prof)
+    await asyncio.to_thread(database.remove_subscription, update.effective_user.id, oid, prof)
     await safe_edit_message(update.callback_query, f"✅ Удалено: {name} ({prof})", BACK_TO_MENU)
 
 
@@ -52,5 +54,5 @@ async def del_profile_sel_cb(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await safe_edit_message(update.callback_query, "❌ Неверный выбор.", BACK_TO_MENU)
         return
     prof = profiles[idx]
-    database.remove_subscriptions_by_profile(update.effective_user.id, prof)
+    await asyncio.to_thread(database.remove_subscriptions_by_profile, update.effective_user.id, prof)
     await safe_edit_message(update.callback_query, f"✅ Удалены все подписки профиля «{prof}».", BACK_TO_MENU)
@@ -1,19 +1,21 @@
 """Главное меню и навигация."""
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from app import config, database
+from app import catalog, config, database, logs, plans
 from app.constants import UD_ACTIVE_MSG_ID, UD_CHOSEN, UD_LIST_EXTRA_IDS, UD_LIST_ROOT_ID, UD_OLYS, UD_SELECTION
-from app.excel_data import build_lookup, fetch_olympiads
 from app.handlers.subscribe import show_profiles
 from app.keyboards import BACK_TO_MENU, delete_menu_markup, main_menu_markup
-from app.ui import cleanup_list_messages, safe_edit_message
-from app.dates import next_upcoming_from_cell
-from datetime import datetime
+from app.ui import chunk_messages, cleanup_list_messages, safe_edit_message
+from app.dates import format_event, next_upcoming_from_cell
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    database.ensure_user(update.effective_user)
+    await asyncio.to_thread(database.ensure_user, update.effective_user)
     text = (
         "👋 Привет! Я бот-напоминалка об олимпиадах.\n\n"
         f"🔔 Напоминаю о ближайших олимпиадах каждый день в {config.DAILY_NOTIFY_TIME} по МСК.\n\n"
@@ -37,8 +39,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if prev_id:
             try:
                 await context.bot.delete_message(chat_id=chat_id, message_id=prev_id)
-            except Exception:
-                pass
+            except Exception as e:
+                logs.suppressed("start_delete_menu", e)
         await cleanup_list_messages(update, context, exclude_id=None)
         m = await update.message.reply_text(text, reply_markup=main_menu_markup())
         context.user_data[UD_ACTIVE_MSG_ID] = m.message_id
@@ -54,7 +56,7 @@ async def menu_select_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data[UD_ACTIVE_MSG_ID] = cur_id
     await cleanup_list_messages(update, context, exclude_id=cur_id)
     # НЕ чистим полностью user_data, чтобы не потерять служебные ключи
-    context.user_data[UD_OLYS] = fetch_olympiads()
+    context.user_data[UD_OLYS] = await catalog.olympiads()
     context.user_data[UD_SELECTION] = []
     context.user_data[UD_CHOSEN] = []  # list[(o, profile)]
     await show_profiles(update, context)
@@ -66,8 +68,7 @@ async def menu_list_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data[UD_ACTIVE_MSG_ID] = cur_id
     await cleanup_list_messages(update, context, exclude_id=cur_id)
 
-    olys = fetch_olympiads()
-    lookup = build_lookup(olys)
+    lookup = await catalog.lookup()
 
     uid = update.effective_user.id
     rows = database.get_user_subscriptions(uid)
@@ -79,13 +80,14 @@ async def menu_list_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     today = datetime.now(config.TIMEZONE).date()
+    reference = catalog.reference_date()
     blocks = []
     for oid, name, prof in rows:
         o = lookup.get((oid, prof))
         if not o:
             continue
-        nxt = next_upcoming_from_cell(o["date_desc"], today)
-        human = f"{nxt[0].strftime('%d.%m.%Y')} — {nxt[1]}" if nxt else (o["date_desc"] or "ПОКА РАНО")
+        nxt = next_upcoming_from_cell(o["date_desc"], today, reference)
+        human = format_event(nxt, today) if nxt else (o["date_desc"] or "ПОКА РАНО")
         blocks.append(
             f"• {o['name']}\n"
             f"  Профиль: {prof}\n"
@@ -95,16 +97,12 @@ async def menu_list_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"  Сайт: {o['link']}\n"
         )
 
-    chunks = []
-    cur_txt = "📋 Ваши подписки:\n\n"
-    for blk in blocks:
-        if len(cur_txt) + len(blk) > config.MAX_MESSAGE_LENGTH:
-            chunks.append(cur_txt.rstrip())
-            cur_txt = ""
-        cur_txt += blk + "\n"
-    if cur_txt.strip():
-        chunks.append(cur_txt.rstrip())
+    chunks = chunk_messages(["📋 Ваши подписки:"] + [blk.rstrip() for blk in blocks])
+    await _show_chunks(update, context, chunks)
+
 
+async def _show_chunks(update: Update, context: ContextTypes.DEFAULT_TYPE, chunks: List[str]) -> None:
+    """Первая часть — в текущее сообщение, остальные — новыми (их удалит cleanup_list_messages)."""
     await safe_edit_message(update.callback_query, chunks[0], BACK_TO_MENU)
     context.user_data[UD_LIST_ROOT_ID] = update.callback_query.message.message_id
     extra_ids = []
@@ -115,6 +113,36 @@ async def menu_list_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data[UD_LIST_EXTRA_IDS] = extra_ids
 
 
+WEEKDAYS = ("пн", "вт", "ср", "чт", "пт", "сб", "вс")
+
+
+async def _preview_chunks(uid: int) -> List[str]:
+    """Напоминания, которые придут с завтрашнего дня на неделю вперёд (из кэша планов)."""
+    tomorrow = datetime.now(config.TIMEZONE).date() + timedelta(days=1)
+    days = await plans.preview(uid, tomorrow, plans.PREVIEW_DAYS)
+    if not days:
+        return ["🔮 В ближайшую неделю напоминаний не будет."]
+    parts = ["🔮 Что придёт на неделе:"]
+    for day, lines in days:
+        title = "завтра" if day == tomorrow else f"{day:%d.%m}, {WEEKDAYS[day.weekday()]}"
+        parts.append(f"📅 {title}:")
+        parts.extend(lines)
+    return chunk_messages(parts)
+
+
+async def preview_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    for chunk in await _preview_chunks(update.effective_user.id):
+        await update.message.reply_text(chunk)
+
+
+async def menu_preview_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.callback_query.answer()
+    cur_id = update.callback_query.message.message_id
+    context.user_data[UD_ACTIVE_MSG_ID] = cur_id
+    await cleanup_list_messages(update, context, exclude_id=cur_id)
+    await _show_chunks(update, context, await _preview_chunks(update.effective_user.id))
+
+
 async def menu_delete_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.callback_query.answer()
     cur_id = update.callback_query.message.message_id
@@ -1,4 +1,6 @@
 """Сценарий подписки."""
+import asyncio
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -16,19 +18,21 @@ from app.constants import (
 )
 from app.excel_data import filter_by_profile, get_profiles
 from app.keyboards import BACK_TO_MENU, manual_olympiads_markup, profile_option_markup, profiles_markup
-from app.ui import safe_edit_message
+from app.ui import debounced_edit, safe_edit_message
+
+
+def _profiles_view(context: ContextTypes.DEFAULT_TYPE):
+    return "Выберите профиль(и):", profiles_markup(context.user_data[UD_PROFILES], context.user_data[UD_SELECTION])
 
 
 async def show_profiles(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    olys = context.user_data[UD_OLYS]
-    profiles = get_profiles(olys)
-    context.user_data[UD_PROFILES] = profiles
-    markup = profiles_markup(profiles, context.user_data[UD_SELECTION])
+    context.user_data[UD_PROFILES] = get_profiles(context.user_data[UD_OLYS])
+    text, markup = _profiles_view(context)
     if update.callback_query:
         context.user_data[UD_ACTIVE_MSG_ID] = update.callback_query.message.message_id
-        await safe_edit_message(update.callback_query, "Выберите профиль(и):", markup)
+        await safe_edit_message(update.callback_query, text, markup)
     else:
-        m = await update.message.reply_text("Выберите профиль(и):", reply_markup=markup)
+        m = await update.message.reply_text(text, reply_markup=markup)
         context.user_data[UD_ACTIVE_MSG_ID] = m.message_id
 
 
@@ -41,7 +45,8 @@ async def toggle_profile_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         sel.remove(prof)
     else:
         sel.append(prof)
-    await show_profiles(update, context)
+    context.user_data[UD_ACTIVE_MSG_ID] = update.callback_query.message.message_id
+    await debounced_edit(update.callback_query, lambda: _profiles_view(context))
 
 
 async def profiles_done_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -79,10 +84,13 @@ async def include_manual_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await show_manual(update, context)
 
 
+def _manual_view(context: ContextTypes.DEFAULT_TYPE):
+    markup = manual_olympiads_markup(context.user_data[UD_MANUAL_LIST], context.user_data[UD_MANUAL_SEL])
+    return "Выберите олимпиады вручную:", markup
+
+
 async def show_manual(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    olys = context.user_data[UD_MANUAL_LIST]
-    markup = manual_olympiads_markup(olys, context.user_data[UD_MANUAL_SEL])
-    await safe_edit_message(update.callback_query, "Выберите олимпиады вручную:", markup)
+    await safe_edit_message(update.callback_query, *_manual_view(context))
 
 
 async def toggle_oly_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -93,7 +101,7 @@ async def toggle_oly_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         sel.remove(idx)
     else:
         sel.append(idx)
-    await show_manual(update, context)
+    await debounced_edit(update.callback_query, lambda: _manual_view(context))
 
 
 async def manual_done_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -112,7 +120,7 @@ async def proceed_next(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await ask_profile_option(update, context)
 
     uid = update.effective_user.id
-    database.add_subscriptions(uid, context.user_data[UD_CHOSEN])
+    await asyncio.to_thread(database.add_subscriptions, uid, context.user_data[UD_CHOSEN])
 
     await safe_edit_message(
         update.callback_query,
@@ -11,6 +11,7 @@ def main_menu_markup() -> InlineKeyboardMarkup:
         [
             [InlineKeyboardButton("🎯 Выбрать олимпиаду", callback_data="menu_select")],
             [InlineKeyboardButton("📋 Мои подписки", callback_data="menu_list")],
+            [InlineKeyboardButton("🔮 Что придёт на неделе", callback_data="menu_preview")],
             [InlineKeyboardButton("🗑️ Удалить подписку", callback_data="menu_delete")],
         ]
     )
@@ -0,0 +1,111 @@
+"""
+Логирование через очередь и структурированные события.
+
+Хендлеры логгеров только кладут запись в очередь (QueueHandler); форматирование и запись в stderr
+идут в потоке QueueListener, поэтому event loop не ждёт вывода. Формат — JSON по строке на запись
+(LOG_FORMAT=json) или прежний текст.
+
+Событие (event) — запись с полями: update — апдейт, обработанный хендлером (update_id, user_id,
+handler, duration_ms, outcome); message — результат отправки одного сообщения рассылки (chat_id,
+kind, outcome, error); suppressed — проглоченная ошибка, которая не мешает работе. Частые события
+прореживаются по LOG_SAMPLE: пишется доля rate успешных (поле sample_rate позволяет пересчитать
+количество), неуспешные пишутся всегда.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from typing import Optional
+
+from app import config
+
+logger = logging.getLogger("olymp.events")
+
+# Атрибуты LogRecord, которые не являются полями события
+_STANDARD = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+OK = "ok"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись — одна строка JSON: время, уровень, логгер, сообщение и поля события из extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for k, v in vars(record).items():
+            if k not in _STANDARD:
+                out[k] = v
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который не форматирует запись сам: стандартный prepare вклеивает traceback
+    в msg и сбрасывает exc_info. Слушатель в том же процессе, поэтому достаточно копии записи."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()   # аргументы могут измениться, пока запись в очереди
+        record.args = None
+        return record
+
+
+def setup(stream=None) -> logging.handlers.QueueListener:
+    """Корневой логгер пишет через очередь; возвращает запущенный QueueListener (stop — при выходе)."""
+    global _listener
+    stop()
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if config.LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(_QueueHandler(q))
+    root.setLevel(config.LOG_LEVEL)
+    # По строке на каждый запрос к Bot API — только при отладке
+    logging.getLogger("httpx").setLevel(logging.DEBUG if config.LOG_LEVEL == "DEBUG" else logging.WARNING)
+    _listener = logging.handlers.QueueListener(q, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop)
+    return _listener
+
+
+def stop() -> None:
+    """Дописывает очередь и останавливает поток записи."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def event(name: str, outcome: str = OK, level: int = logging.INFO, **fields) -> None:
+    """Пишет событие name; успешные (outcome == "ok"/"sent") прореживаются по LOG_SAMPLE[name]."""
+    if not logger.isEnabledFor(level):
+        return
+    rate = config.LOG_SAMPLE.get(name, 1.0)
+    if rate < 1.0 and outcome in (OK, "sent"):
+        if rate <= 0.0 or random.random() >= rate:
+            return
+        fields["sample_rate"] = rate
+    fields["event"] = name
+    fields["outcome"] = outcome
+    logger.log(level, name, extra=fields)
+
+
+def suppressed(where: str, exc: BaseException) -> None:
+    """Ошибка, которую код сознательно проглатывает (удаление старого сообщения и т.п.)."""
+    event("suppressed", outcome="error", level=logging.DEBUG, where=where, error=f"{type(exc).__name__}: {exc}")
@@ -0,0 +1,242 @@
+"""
+Метрики в текстовом формате Prometheus: счётчики, гистограммы и HTTP-эндпоинт /metrics.
+
+Без внешних зависимостей; накладные расходы — пара обращений к dict на событие.
+"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app import logs
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RUN_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+_REGISTRY: List["_Metric"] = []
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def items(self) -> List[Tuple[LabelValues, float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self) -> List[str]:
+        out = super().render()
+        for key, val in self.items():
+            out.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {val:g}")
+        return out
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class _HistState:
+    __slots__ = ("buckets", "count", "sum", "max")
+
+    def __init__(self, n: int):
+        self.buckets = [0] * n
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self._states: Dict[LabelValues, _HistState] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            st = self._states.get(key)
+            if st is None:
+                st = self._states[key] = _HistState(len(self.bounds))
+            i = bisect_left(self.bounds, value)
+            if i < len(self.bounds):
+                st.buckets[i] += 1
+            st.count += 1
+            st.sum += value
+            if value > st.max:
+                st.max = value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Оценка квантиля по корзинам (верхняя граница корзины); None, если наблюдений нет."""
+        st = self._states.get(self._key(labels))
+        if not st or not st.count:
+            return None
+        rank, acc = q * st.count, 0
+        for bound, n in zip(self.bounds, st.buckets):
+            acc += n
+            if acc >= rank:
+                return bound
+        return st.max
+
+    def stats(self) -> List[Tuple[LabelValues, int, float, float]]:
+        """Список (метки, количество, сумма, максимум)."""
+        with self._lock:
+            return [(k, s.count, s.sum, s.max) for k, s in sorted(self._states.items())]
+
+    def render(self) -> List[str]:
+        out = super().render()
+        with self._lock:
+            states = sorted(self._states.items())
+            for key, st in states:
+                acc = 0
+                for bound, n in zip(self.bounds, st.buckets):
+                    acc += n
+                    le = 'le="%g"' % bound
+                    out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {acc}")
+                le = 'le="+Inf"'
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {st.count}")
+                out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {st.sum:g}")
+                out.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {st.count}")
+        return out
+
+
+# --- Метрики бота ---
+HANDLER_LATENCY = Histogram("olymp_handler_seconds", "Время обработки апдейта хендлером.", ["handler"])
+HANDLER_ERRORS = Counter("olymp_handler_errors_total", "Исключения в хендлерах.", ["handler"])
+CATALOG_CACHE = Counter("olymp_catalog_cache_total", "Обращения к каталогу олимпиад: hit/miss.", ["result"])
+EXCEL_LOAD = Histogram("olymp_excel_load_seconds", "Время чтения Excel с олимпиадами.")
+MESSAGES_SENT = Counter("olymp_messages_sent_total", "Успешно отправленные сообщения.", ["kind"])
+MESSAGES_FAILED = Counter("olymp_messages_failed_total", "Неотправленные сообщения.", ["kind", "error"])
+MESSAGES_RETRIED = Counter("olymp_messages_retried_total", "Повторные попытки отправки.", ["kind", "error"])
+MESSAGES_SKIPPED = Counter("olymp_messages_skipped_total", "Получатели, пропущенные как недоступные.", ["kind"])
+DAILY_RUN = Histogram("olymp_daily_run_seconds", "Длительность ежедневной рассылки.", buckets=RUN_BUCKETS)
+DAILY_USERS = Counter("olymp_daily_users_total", "Пользователи, обработанные ежедневной рассылкой.")
+DAILY_LAST_USERS = Gauge("olymp_daily_last_users", "Пользователей в последней ежедневной рассылке.")
+DAILY_LAST_RUN = Gauge("olymp_daily_last_run_timestamp", "Unix-время завершения последней рассылки.")
+RATE_LIMIT_WAIT = Histogram("olymp_rate_limit_wait_seconds", "Ожидание в очереди исходящих запросов к Bot API.", ["lane"])
+DB_LOCK_WAIT = Histogram("olymp_db_lock_wait_seconds", "Ожидание блокировки записи SQLite.", ["op"])
+DB_LOCK_RETRIES = Counter("olymp_db_lock_retries_total", "Повторы после «database is locked».", ["op"])
+DB_LOCK_ERRORS = Counter("olymp_db_lock_errors_total", "Записи, не получившие блокировку после всех повторов.", ["op"])
+
+
+def render() -> str:
+    lines: List[str] = []
+    for m in _REGISTRY:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+def timed(name: str, callback: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """Оборачивает хендлер: время выполнения и исключения по имени (паттерну колбэка/команде),
+    событие лога update (app.logs)."""
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        t0 = time.perf_counter()
+        outcome = logs.OK
+        try:
+            return await callback(update, context)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=name)
+            outcome = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            HANDLER_LATENCY.observe(elapsed, handler=name)
+            user = getattr(update, "effective_user", None)
+            logs.event(
+                "update", outcome, level=logging.INFO if outcome == logs.OK else logging.WARNING,
+                update_id=getattr(update, "update_id", None), user_id=user.id if user else None,
+                handler=name, duration_ms=round(elapsed * 1000, 2),
+            )
+
+    return wrapper
+
+
+async def _handle_http(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?", 1)[0] == "/metrics":
+            status, body = "200 OK", render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+    except Exception as e:
+        logs.suppressed("metrics_http", e)
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int) -> None:
+    """Локальный HTTP-эндпоинт /metrics; работает до отмены задачи."""
+    server = await asyncio.start_server(_handle_http, host, port)
+    logging.info("Метрики доступны на http://%s:%s/metrics", host, port)
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,95 @@
+"""
+План напоминаний: что пользователь получит в ежедневной рассылке в заданный день.
+
+План (строки дайджеста) считается при первом обращении или заранее — send_daily сохраняет
+построенные на сегодня дайджесты — и дальше читается из памяти: /testnotify и /preview не ходят
+ни в Excel, ни в базу. Весь кэш сбрасывается при перечитывании каталога и смене политики,
+записи пользователя — при изменении его подписок (database.subscriptions_version; записи других
+процессов учитывает database.sync_subscriptions). Планы на прошедшие дни удаляются со сменой дня,
+при переполнении вытесняются самые старые записи.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app import catalog, config, database
+from app.reminders import DAY_CACHE_DAYS, policy_key, user_digest
+
+Version = Tuple[int, int]
+Plan = Tuple[List[str], List[int]]  # строки (первая — заголовок) и их длины в UTF-16
+
+_scope: Optional[Tuple[Dict[tuple, Dict], tuple]] = None   # (каталог, политика), для которых действителен кэш
+_items: Dict[int, Tuple[Version, List[Tuple[str, str]]]] = {}
+_plans: Dict[Tuple[int, date], Tuple[Version, Plan]] = {}
+_today: Optional[date] = None
+PLAN_CACHE_SIZE = 200_000
+PREVIEW_DAYS = DAY_CACHE_DAYS - 1
+
+
+def _check_scope(lookup: Dict[tuple, Dict]) -> None:
+    global _scope, _today
+    policy = policy_key()
+    if _scope is None or _scope[0] is not lookup or _scope[1] != policy:
+        _scope = (lookup, policy)
+        _items.clear()
+        _plans.clear()
+    today = datetime.now(config.TIMEZONE).date()
+    if today != _today:
+        _today = today
+        for key in [k for k in _plans if k[1] < today]:
+            del _plans[key]
+
+
+def _store(cache: Dict, key, value) -> None:
+    """Кладёт запись; при переполнении вытесняет самую старую."""
+    cache.pop(key, None)
+    if len(cache) >= PLAN_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+
+def remember(lookup: Dict[tuple, Dict], uid: int, day: date, plan: Plan, version: Version) -> None:
+    """Сохраняет уже построенный план (send_daily строит их для всех на сегодня).
+
+    version — версия подписок пользователя на момент их чтения, а не сохранения плана.
+    """
+    _check_scope(lookup)
+    _store(_plans, (uid, day), (version, plan))
+
+
+def user_items(uid: int) -> List[Tuple[str, str]]:
+    """Подписки пользователя (olympiad_id, profile); из базы — только после их изменения."""
+    database.sync_subscriptions()
+    version = database.subscriptions_version(uid)
+    cached = _items.get(uid)
+    if cached is None or cached[0] != version:
+        cached = (version, database.get_user_subscription_pairs(uid))
+        _store(_items, uid, cached)
+    return cached[1]
+
+
+def user_plan(lookup: Dict[tuple, Dict], uid: int, day: date) -> Plan:
+    _check_scope(lookup)
+    database.sync_subscriptions()
+    version = database.subscriptions_version(uid)
+    cached = _plans.get((uid, day))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    plan = user_digest(lookup, user_items(uid), day)
+    _store(_plans, (uid, day), (version, plan))
+    return plan
+
+
+async def plan(uid: int, day: date) -> Plan:
+    return user_plan(await catalog.lookup(), uid, day)
+
+
+async def preview(uid: int, start: date, days: int) -> List[Tuple[date, List[str]]]:
+    """[(день, строки напоминаний без заголовка)] для дней из [start, start + days), где что-то придёт."""
+    lookup = await catalog.lookup()
+    out = []
+    for i in range(min(days, PREVIEW_DAYS)):
+        day = start + timedelta(days=i)
+        lines = user_plan(lookup, uid, day)[0]
+        if len(lines) > 1:
+            out.append((day, lines[1:]))
+    return out
@@ -0,0 +1,193 @@
+"""
+Профилирование по запросу: следующая ежедневная рассылка или N ближайших апдейтов.
+
+Если установлен yappi, используется он (учитывает корутины, wall-time); иначе cProfile —
+он видит всё, что выполняется в потоке event loop, включая соседние задачи.
+Пока ничего не заказано, цена — одна проверка флага на апдейт.
+
+Профилировщик на процесс один (yappi глобален, cProfile — один хук на поток), поэтому сеансы
+взаимоисключающие: пока заказаны или идут апдейты, рассылку заказать нельзя, и наоборот.
+"""
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import tempfile
+import time
+from typing import Awaitable, Callable, Optional, Set, Tuple
+
+from app import config
+
+try:
+    import yappi
+except ImportError:  # необязательная зависимость
+    yappi = None
+
+
+class _Capture:
+    """Один сеанс профилирования; start/stop можно вызывать многократно — статистика копится."""
+
+    def __init__(self):
+        self._depth = 0  # сколько хендлеров сейчас внутри start/stop
+        if yappi is not None:
+            yappi.clear_stats()
+            yappi.set_clock_type("wall")
+            self._prof = None
+        else:
+            self._prof = cProfile.Profile()
+
+    def start(self) -> None:
+        self._depth += 1
+        if self._depth > 1:
+            return
+        if self._prof is None:
+            yappi.start()
+        else:
+            self._prof.enable()
+
+    def stop(self) -> None:
+        if not self._depth:
+            return
+        self._depth -= 1
+        if self._depth:
+            return
+        if self._prof is None:
+            yappi.stop()
+        else:
+            self._prof.disable()
+
+    def close(self) -> None:
+        """Останавливает сбор, даже если хендлеры ещё внутри start/stop."""
+        if self._depth:
+            self._depth = 1
+            self.stop()
+
+    def dump(self, name: str) -> Tuple[str, str]:
+        """Сохраняет .prof (формат pstats) и возвращает (путь, текстовая сводка top-N)."""
+        fd, path = tempfile.mkstemp(prefix=f"olymp-{name}-", suffix=".prof")
+        os.close(fd)
+        if self._prof is None:
+            yappi.get_func_stats().save(path, type="pstat")
+            yappi.clear_stats()
+        else:
+            self._prof.dump_stats(path)
+        buf = io.StringIO()
+        stats = pstats.Stats(path, stream=buf)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(config.PROFILE_TOP_N)
+        return path, buf.getvalue()
+
+
+# Чаты, которым отправить результат следующей ежедневной рассылки
+_daily_chats: Set[int] = set()
+_daily_running = False
+
+# Профилирование апдейтов: сколько осталось и кому отправить результат
+_updates_left = 0
+_updates_chat: Optional[int] = None
+_updates_capture: Optional[_Capture] = None
+
+
+def arm_daily(chat_id: int) -> bool:
+    """False — уже заказано профилирование апдейтов."""
+    if _updates_left:
+        return False
+    _daily_chats.add(chat_id)
+    return True
+
+
+def arm_updates(chat_id: int, count: int) -> bool:
+    """False — заказана или идёт ежедневная рассылка под профилировщиком, либо уже идут апдейты."""
+    global _updates_left, _updates_chat
+    if _daily_chats or _daily_running or _updates_capture is not None:
+        return False
+    _updates_left, _updates_chat = count, chat_id
+    return True
+
+
+def disarm() -> None:
+    global _updates_left, _updates_chat, _updates_capture
+    _daily_chats.clear()
+    if _updates_capture is not None:
+        _updates_capture.close()
+    _updates_left, _updates_chat, _updates_capture = 0, None, None
+
+
+def status() -> str:
+    parts = []
+    if _daily_chats or config.PROFILE_DAILY:
+        parts.append("следующая ежедневная рассылка" + (" (PROFILE_DAILY)" if config.PROFILE_DAILY else ""))
+    if _updates_left:
+        parts.append(f"ещё {_updates_left} апдейтов")
+    backend = "yappi" if yappi is not None else "cProfile"
+    return f"Профилировщик: {backend}. Заказано: " + (", ".join(parts) if parts else "ничего")
+
+
+async def _send_report(bot, chat_ids, capture: _Capture, name: str, title: str) -> None:
+    from app.ui import split_text
+
+    path, summary = capture.dump(name)
+    try:
+        for chat_id in chat_ids:
+            try:
+                for ch in split_text(f"⏱ {title}\n\n{summary}"):
+                    await bot.send_message(chat_id=chat_id, text=ch)
+                with open(path, "rb") as f:
+                    await bot.send_document(chat_id=chat_id, document=f, filename=os.path.basename(path))
+            except Exception:
+                logging.exception("Не удалось отправить результат профилирования в чат %s", chat_id)
+    finally:
+        os.remove(path)
+
+
+async def run_daily(coro_fn: Callable[..., Awaitable], context) -> None:
+    """Выполняет ежедневную рассылку; если профилирование заказано — под профилировщиком."""
+    global _daily_running
+    if not _daily_chats and not config.PROFILE_DAILY:
+        await coro_fn(context)
+        return
+    if _updates_left:
+        # Только при PROFILE_DAILY: заказанную вручную рассылку arm_updates не пропустил бы
+        logging.warning("Ежедневная рассылка идёт без профилировщика: он занят апдейтами")
+        await coro_fn(context)
+        return
+    chats = set(_daily_chats) or set(config.ADMIN_IDS)
+    _daily_chats.clear()
+    capture = _Capture()
+    t0 = time.perf_counter()
+    _daily_running = True
+    capture.start()
+    try:
+        await coro_fn(context)
+    finally:
+        capture.stop()
+        _daily_running = False
+        title = f"Профиль ежедневной рассылки: {time.perf_counter() - t0:.1f} с"
+        await _send_report(context.bot, chats, capture, "daily", title)
+
+
+def profiled(callback: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """Оборачивает хендлер: пока заказано профилирование апдейтов, копит статистику по ним."""
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        global _updates_left, _updates_capture
+        if not _updates_left:
+            return await callback(update, context)
+        if _updates_capture is None:
+            _updates_capture = _Capture()
+        capture = _updates_capture
+        capture.start()
+        try:
+            return await callback(update, context)
+        finally:
+            capture.stop()
+            if _updates_capture is capture:
+                _updates_left -= 1
+                if not _updates_left:
+                    chat_id = _updates_chat
+                    _updates_capture = None
+                    await _send_report(context.bot, [chat_id], capture, "updates", "Профиль обработки апдейтов")
+
+    return wrapper
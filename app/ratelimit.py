@@ -0,0 +1,160 @@
+"""
+Общий планировщик исходящих запросов к Bot API с приоритетными очередями.
+
+Все запросы бота проходят через один лимит BOT_API_RATE в секунду. Запрос без rate_limit_args —
+ответ пользователю (полоса interactive); массовые отправки передают полосу явно: "daily" —
+ежедневные напоминания, "broadcast" — рассылки-кампании. Ожидающие запросы выпускаются строго
+по приоритету полос (interactive → daily → broadcast), внутри полосы — по очереди.
+
+Массовые полосы дополнительно ограничены вторым ведром со скоростью BOT_API_RATE × (1 −
+INTERACTIVE_SHARE): даже при непрерывной рассылке часть лимита остаётся свободной, и клик
+пользователя уходит без ожидания. На RetryAfter от Telegram все полосы ставятся на паузу.
+"""
+import asyncio
+import heapq
+import itertools
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from app import metrics
+
+INTERACTIVE = "interactive"
+DAILY = "daily"
+BROADCAST = "broadcast"
+LANES = (INTERACTIVE, DAILY, BROADCAST)   # по убыванию приоритета
+_PRIORITY = {lane: i for i, lane in enumerate(LANES)}
+_EPS = 1e-9
+BURST_SECONDS = 0.1   # после простоя можно отправить лимит за столько секунд разом
+
+
+def lane_args(bot, lane: str) -> Dict[str, str]:
+    """kwargs для bot.send_message: полоса передаётся, только если у бота есть планировщик
+    (ExtBot без rate_limiter отвергает rate_limit_args)."""
+    return {"rate_limit_args": lane} if getattr(bot, "rate_limiter", None) is not None else {}
+
+
+class PriorityRateLimiter(BaseRateLimiter[str]):
+    def __init__(self, rate: float, interactive_share: float = 0.3):
+        share = min(max(interactive_share, 0.0), 0.9)
+        self.rate = rate
+        self.bulk_rate = rate * (1 - share)
+        self._total_cap = max(1.0, rate * BURST_SECONDS)
+        self._bulk_cap = max(1.0, self.bulk_rate * BURST_SECONDS)
+        self._total = self._total_cap
+        self._bulk = self._bulk_cap
+        self._stamp: Optional[float] = None
+        self._paused_until = 0.0
+
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._waiting = [0] * len(LANES)
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._pump: Optional[asyncio.Task] = None
+
+    async def initialize(self) -> None:
+        self._wake = asyncio.Event()
+
+    async def shutdown(self) -> None:
+        if self._pump is not None:
+            self._pump.cancel()
+            self._pump = None
+        for _, _, fut in self._queue:
+            fut.cancel()
+        self._queue.clear()
+        self._waiting = [0] * len(LANES)
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[str],
+    ) -> Any:
+        lane = rate_limit_args if rate_limit_args in _PRIORITY else INTERACTIVE
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        await self._acquire(_PRIORITY[lane], loop)
+        metrics.RATE_LIMIT_WAIT.observe(loop.time() - t0, lane=lane)
+        try:
+            return await callback(*args, **kwargs)
+        except RetryAfter as e:
+            self.pause(float(e.retry_after))
+            raise
+
+    def pause(self, seconds: float) -> None:
+        """Telegram ответил RetryAfter: ни одна полоса не шлёт seconds секунд, всплеска после нет."""
+        loop = asyncio.get_running_loop()
+        self._refill(loop.time())
+        self._paused_until = max(self._paused_until, loop.time() + seconds)
+        self._total = min(self._total, 0.0)
+        if self._queue:
+            self._kick()
+
+    # --- вёдра ---
+
+    def _refill(self, now: float) -> None:
+        if self._stamp is not None and now > self._stamp:
+            dt = now - self._stamp
+            self._total = min(self._total_cap, self._total + dt * self.rate)
+            self._bulk = min(self._bulk_cap, self._bulk + dt * self.bulk_rate)
+        self._stamp = now if self._stamp is None else max(self._stamp, now)
+
+    def _delay(self, prio: int, now: float) -> float:
+        """Сколько ждать, пока запрос полосы prio может уйти (0 — можно сейчас)."""
+        self._refill(now)
+        delay = max(0.0, self._paused_until - now, (1 - _EPS - self._total) / self.rate)
+        if prio:
+            delay = max(delay, (1 - _EPS - self._bulk) / self.bulk_rate)
+        return delay
+
+    def _take(self, prio: int) -> None:
+        self._total -= 1
+        if prio:
+            self._bulk -= 1
+
+    # --- очередь ---
+
+    async def _acquire(self, prio: int, loop: asyncio.AbstractEventLoop) -> None:
+        # Без очереди, если никто с тем же или более высоким приоритетом не ждёт
+        if not any(self._waiting[: prio + 1]) and self._delay(prio, loop.time()) <= 0:
+            self._take(prio)
+            return
+        fut = loop.create_future()
+        heapq.heappush(self._queue, (prio, next(self._seq), fut))
+        self._waiting[prio] += 1
+        self._kick()
+        await fut
+
+    def _kick(self) -> None:
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.get_running_loop().create_task(self._run())
+        else:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._queue:
+            prio, _, fut = self._queue[0]
+            if fut.done():   # ожидающий отменён
+                heapq.heappop(self._queue)
+                self._waiting[prio] -= 1
+                continue
+            delay = self._delay(prio, loop.time())
+            if delay <= 0:
+                heapq.heappop(self._queue)
+                self._waiting[prio] -= 1
+                self._take(prio)
+                fut.set_result(None)
+                continue
+            # Спим до готовности головы очереди; новый запрос повыше приоритетом будит раньше
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
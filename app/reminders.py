@@ -1,16 +1,16 @@
 """Построение и рассылка ежедневных напоминаний."""
 import asyncio
 import logging
+import time
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from telegram.error import BadRequest, Forbidden
 from telegram.ext import Application, ContextTypes
 
-from app import config, database
+from app import catalog, config, database, metrics, profiling
+from app.delivery import SENT, send_chunks
 from app.dates import parse_dates_from_cell
-from app.excel_data import build_lookup, fetch_olympiads
-from app.ui import chunk_messages
+from app.ui import chunk_messages, utf16_len
 
 
 def due_by_policy(delta: int) -> bool:
@@ -19,49 +19,127 @@ def due_by_policy(delta: int) -> bool:
     return delta in config.REMIND_DAYS_SET
 
 
-def build_user_reminders(lookup: Dict[tuple, Dict], items: List[Tuple[str, str]], today: date) -> List[str]:
-    lines: List[str] = ["🔔 Напоминание:"]
-    for oid, prof in items:
-        o = lookup.get((oid, prof))
-        if not o:
-            continue
-        for dt, label in parse_dates_from_cell(o["date_desc"], today):
-            delta = (dt - today).days
-            if due_by_policy(delta):
-                when = "сегодня" if delta == 0 else "завтра" if delta == 1 else f"осталось {delta} дн. {dt}."
-                lines.append(f"🔔 {o['name']} ({prof}, ур. {o['level']}): {when} — {label}\n{o['link']}")
+# Сколько исходов доставки копить перед записью в БД: при падении посреди рассылки теряются
+# не больше стольких (app.database.record_deliveries)
+RECORD_EVERY = 100
+
+HEADER = "🔔 Напоминание:"
+_HEADER_LEN = utf16_len(HEADER)
+
+# Строки напоминаний по дням: день -> {(olympiad_id, profile) -> ((строка, длина в UTF-16), ...)}.
+# Одна и та же олимпиада приходит тысячам подписчиков, поэтому строка форматируется
+# один раз за день и дальше переиспользуется. Кэш действителен для одного каталога и политики;
+# хранятся не больше DAY_CACHE_DAYS дней (сегодня и дни предпросмотра, см. app.plans).
+_scope: Optional[Tuple[Dict[tuple, Dict], tuple]] = None
+_days: Dict[date, Dict[tuple, Tuple[Tuple[str, int], ...]]] = {}
+DAY_CACHE_DAYS = 8
+
+
+def policy_key() -> tuple:
+    """Параметры политики напоминаний: при их смене кэши строк и планов сбрасываются."""
+    return config.REMIND_MODE, config.REMIND_WINDOW_DAYS, tuple(sorted(config.REMIND_DAYS_SET))
+
+
+def _render(o: Dict, prof: str, today: date) -> Tuple[Tuple[str, int], ...]:
+    out = []
+    for dt, label in parse_dates_from_cell(o["date_desc"], today, catalog.reference_date()):
+        delta = (dt - today).days
+        if due_by_policy(delta):
+            when = "сегодня" if delta == 0 else "завтра" if delta == 1 else f"осталось {delta} дн. {dt}."
+            line = f"🔔 {o['name']} ({prof}, ур. {o['level']}): {when} — {label}\n{o['link']}"
+            out.append((line, utf16_len(line)))
+    return tuple(out)
+
+
+def day_lines(lookup: Dict[tuple, Dict], today: date) -> Dict[tuple, Tuple[Tuple[str, int], ...]]:
+    """Кэш отрендеренных строк на день (заполняется по мере обращения к ключам)."""
+    global _scope
+    policy = policy_key()
+    if _scope is None or _scope[0] is not lookup or _scope[1] != policy:
+        _scope = (lookup, policy)
+        _days.clear()
+    lines = _days.get(today)
+    if lines is None:
+        if len(_days) >= DAY_CACHE_DAYS:
+            del _days[min(_days)]
+        lines = _days[today] = {}
     return lines
 
 
+def user_digest(
+    lookup: Dict[tuple, Dict], items: List[Tuple[str, str]], today: date
+) -> Tuple[List[str], List[int]]:
+    """Строки напоминания пользователю (первая — заголовок) и их длины в UTF-16."""
+    rendered = day_lines(lookup, today)
+    lines, lengths = [HEADER], [_HEADER_LEN]
+    for key in items:
+        parts = rendered.get(key)
+        if parts is None:
+            o = lookup.get(key)
+            parts = rendered[key] = _render(o, key[1], today) if o else ()
+        for ln, n in parts:
+            lines.append(ln)
+            lengths.append(n)
+    return lines, lengths
+
+
+def build_user_reminders(lookup: Dict[tuple, Dict], items: List[Tuple[str, str]], today: date) -> List[str]:
+    return user_digest(lookup, items, today)[0]
+
+
 async def send_daily(context: ContextTypes.DEFAULT_TYPE) -> None:
+    await profiling.run_daily(_send_daily, context)
+
+
+async def _send_daily(context: ContextTypes.DEFAULT_TYPE) -> None:
+    t0 = time.perf_counter()
     today = datetime.now(config.TIMEZONE).date()
-    olys = fetch_olympiads()
-    lookup = build_lookup(olys)
+    lookup = await catalog.lookup()
+
+    from app import plans
 
-    subs = database.get_all_subscriptions()
-    by_user: Dict[int, List[Tuple[str, str]]] = {}
-    for uid, oid, prof in subs:
-        by_user.setdefault(uid, []).append((oid, prof))
+    by_user = database.get_subscriptions_by_user()
+    versions = {uid: database.subscriptions_version(uid) for uid in by_user}
 
+    blocked = database.get_blocked_user_ids()
+    outcomes: Dict[int, str] = {}
+    sent = failed = 0
     for uid, items in by_user.items():
-        lines = build_user_reminders(lookup, items, today)
-        if lines != ["🔔 Напоминание:"]:
-            for ch in chunk_messages(lines):
-                try:
-                    await context.bot.send_message(chat_id=uid, text=ch)
-                except (Forbidden, BadRequest):
-                    pass
-                except Exception:
-                    pass
+        if uid in blocked:
+            metrics.MESSAGES_SKIPPED.inc(kind="daily")
+            continue
+        lines, lengths = user_digest(lookup, items, today)
+        plans.remember(lookup, uid, today, (lines, lengths), versions[uid])
+        if len(lines) > 1:
+            chunks = chunk_messages(lines, lengths=lengths)
         elif config.SEND_EMPTY_INFO:
-            try:
-                await context.bot.send_message(chat_id=uid, text="ℹ️ Сегодня напоминаний нет.")
-            except Exception:
-                pass
+            chunks = ["ℹ️ Сегодня напоминаний нет."]
+        else:
+            continue
+        res = outcomes[uid] = await send_chunks(context.bot, uid, chunks, kind="daily")
+        if res == SENT:
+            sent += 1
+        else:
+            failed += 1
+        if len(outcomes) >= RECORD_EVERY:
+            await asyncio.to_thread(database.record_deliveries, outcomes)
+            outcomes = {}
+    await asyncio.to_thread(database.record_deliveries, outcomes)
+
+    elapsed = time.perf_counter() - t0
+    metrics.DAILY_RUN.observe(elapsed)
+    metrics.DAILY_USERS.inc(len(by_user))
+    metrics.DAILY_LAST_USERS.set(len(by_user))
+    metrics.DAILY_LAST_RUN.set(time.time())
+    logging.info(
+        "Ежедневная рассылка: пользователей %d, пропущено недоступных %d, доставлено %d, с ошибками %d, %.1f с",
+        len(by_user), len(blocked & by_user.keys()), sent, failed, elapsed,
+    )
 
 
-async def fallback_daily_scheduler(app: Application, notify_tm) -> None:
-    """Если JobQueue недоступен - отправляем send_daily ежедневно в указанное время."""
+async def fallback_daily_scheduler(app: Application, notify_tm, callback=None) -> None:
+    """Если JobQueue недоступен - запускаем callback (по умолчанию send_daily) ежедневно в указанное время."""
+    callback = callback or send_daily
 
     class DummyCtx:
         def __init__(self, bot):
@@ -74,6 +152,6 @@ async def fallback_daily_scheduler(app: Application, notify_tm) -> None:
             target = target + timedelta(days=1)
         await asyncio.sleep((target - now).total_seconds())
         try:
-            await send_daily(DummyCtx(app.bot))
+            await callback(DummyCtx(app.bot))
         except Exception:
-            logging.exception("Ошибка в fallback_daily_scheduler.send_daily")
+            logging.exception("Ошибка в fallback_daily_scheduler.%s", callback.__name__)
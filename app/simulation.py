@@ -0,0 +1,171 @@
+"""
+Симуляция ежедневной рассылки на диапазоне дат («что будет, если…»).
+
+Считает, сколько напоминаний получит вся база при заданной политике (REMIND_MODE,
+REMIND_WINDOW_DAYS, REMIND_DAYS_SET): число сообщений по дням, пиковый день и максимум
+сообщений на одного пользователя. Ничего не отправляет.
+
+Подписчики каждого ключа (olympiad_id, profile) хранятся битовой маской по номерам
+пользователей (обычный int), поэтому день считается побитовыми OR по ключам, у которых
+в этот день есть событие, а не перебором пользователей. Счётчик сообщений на пользователя —
+побитовый (bit-sliced): несколько масок-разрядов, к которым день прибавляется сложением с переносом.
+"""
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app import config
+from app.dates import parse_events
+
+
+def due_deltas(mode: str, window_days: int, days_set: Iterable[int]) -> FrozenSet[int]:
+    """Значения delta (дней до события), при которых политика шлёт напоминание; см. reminders.due_by_policy."""
+    if mode.upper() == "WINDOW":
+        return frozenset(range(0, window_days + 1))
+    return frozenset(days_set)
+
+
+def current_policy() -> Tuple[str, int, FrozenSet[int]]:
+    return config.REMIND_MODE, config.REMIND_WINDOW_DAYS, frozenset(config.REMIND_DAYS_SET)
+
+
+def _mask(bits: List[int], size: int) -> int:
+    """Маска из номеров битов (через bytearray: OR по большим int копирует их на каждом шаге)."""
+    buf = bytearray((size + 7) // 8)
+    for b in bits:
+        buf[b >> 3] |= 1 << (b & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _add(planes: List[int], mask: int) -> None:
+    """Прибавляет 1 к счётчикам пользователей из mask (planes[i] — i-й разряд счётчиков)."""
+    i = 0
+    while mask:
+        if i == len(planes):
+            planes.append(0)
+        carry = planes[i] & mask
+        planes[i] ^= mask
+        mask = carry
+        i += 1
+
+
+def _max_counter(planes: List[int], everyone: int) -> Tuple[int, int]:
+    """Максимальное значение счётчика и число пользователей, у которых оно достигается."""
+    value, cand = 0, everyone
+    for i in range(len(planes) - 1, -1, -1):
+        hit = cand & planes[i]
+        if hit:
+            cand = hit
+            value |= 1 << i
+    return value, (cand.bit_count() if value else everyone.bit_count())
+
+
+def simulate(
+    lookup: Dict[tuple, Dict],
+    subscriptions: Iterable[Tuple[int, str, str]],
+    start: date,
+    days: int,
+    mode: Optional[str] = None,
+    window_days: Optional[int] = None,
+    days_set: Optional[Iterable[int]] = None,
+    send_empty: Optional[bool] = None,
+    blocked: Iterable[int] = (),
+    reference: Optional[date] = None,
+) -> Dict:
+    """
+    subscriptions — строки (user_id, olympiad_id, profile), как из database.get_all_subscriptions().
+    Незаданные параметры политики берутся из config. Пользователи из blocked не учитываются,
+    как и в send_daily. reference — опорная дата каталога (catalog.reference_date()), по умолчанию start.
+    """
+    cur_mode, cur_window, cur_set = current_policy()
+    due = due_deltas(
+        mode or cur_mode,
+        cur_window if window_days is None else window_days,
+        cur_set if days_set is None else days_set,
+    )
+    if send_empty is None:
+        send_empty = config.SEND_EMPTY_INFO
+    blocked = set(blocked)
+
+    # Номера пользователей и маски подписчиков по ключам
+    user_bit: Dict[int, int] = {}
+    key_bits: Dict[tuple, List[int]] = {}
+    for uid, oid, prof in subscriptions:
+        if uid in blocked:
+            continue
+        bit = user_bit.get(uid)
+        if bit is None:
+            bit = user_bit[uid] = len(user_bit)
+        key_bits.setdefault((oid, prof), []).append(bit)
+    everyone = (1 << len(user_bit)) - 1
+    key_users = {key: _mask(bits, len(user_bit)) for key, bits in key_bits.items()}
+
+    # Ключи с одинаковой ячейкой дат объединяем: для дня важна только ячейка.
+    # Даты ячейки от дня не зависят, поэтому каждая ячейка разбирается один раз.
+    by_cell: Dict[str, List[int]] = {}
+    for key, mask in key_users.items():
+        o = lookup.get(key)
+        if o:
+            agg = by_cell.setdefault(o["date_desc"], [0, 0])
+            agg[0] |= mask
+            agg[1] += len(key_bits[key])
+    reference = reference or start
+    cells = []
+    for cell, (mask, subs) in by_cell.items():
+        starts = {first.toordinal() for first, _, _ in parse_events(cell, reference)}
+        if starts:
+            cells.append((tuple(starts), mask, subs))
+
+    per_day: List[Tuple[date, int, int]] = []   # (день, сообщений, строк-напоминаний)
+    planes: List[int] = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        ordinal = day.toordinal()
+        receivers, lines = 0, 0
+        for starts, mask, subs in cells:
+            hits = sum(1 for s in starts if s - ordinal in due)
+            if hits:
+                receivers |= mask
+                lines += hits * subs
+        if send_empty:
+            receivers = everyone
+        _add(planes, receivers)
+        per_day.append((day, receivers.bit_count(), lines))
+
+    total = sum(m for _, m, _ in per_day)
+    peak = max(per_day, key=lambda r: r[1], default=None)
+    user_max, users_at_max = _max_counter(planes, everyone)
+    return {
+        "start": start,
+        "days": days,
+        "users": len(user_bit),
+        "keys": len(key_users),
+        "due_deltas": sorted(due),
+        "per_day": per_day,
+        "messages": total,
+        "lines": sum(l for _, _, l in per_day),
+        "peak_day": peak[0] if peak else None,
+        "peak_messages": peak[1] if peak else 0,
+        "user_max_messages": user_max,
+        "users_at_max": users_at_max,
+        "user_avg_messages": total / len(user_bit) if user_bit else 0.0,
+    }
+
+
+def summary_lines(res: Dict, top: int = 5) -> List[str]:
+    lines = [
+        f"Период: {res['start']:%d.%m.%Y} + {res['days']} дн.",
+        f"Пользователей: {res['users']}, ключей (олимпиада, профиль): {res['keys']}",
+        f"Сообщений всего: {res['messages']} (напоминаний в них: {res['lines']})",
+    ]
+    if res["peak_day"]:
+        lines.append(f"Пиковый день: {res['peak_day']:%d.%m.%Y} — {res['peak_messages']} сообщ.")
+    lines.append(
+        f"На пользователя: в среднем {res['user_avg_messages']:.1f}, максимум {res['user_max_messages']} "
+        f"(у {res['users_at_max']} польз.)"
+    )
+    busiest = sorted(res["per_day"], key=lambda r: r[1], reverse=True)[:top]
+    if busiest and busiest[0][1]:
+        lines.append("")
+        lines.append("Самые загруженные дни:")
+        lines.extend(f"• {d:%d.%m.%Y}: {m} сообщ., {l} напоминаний" for d, m, l in busiest if m)
+    return lines
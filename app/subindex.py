@@ -0,0 +1,125 @@
+"""
+Индекс подписок в памяти: пользователь -> ключи, ключ -> пользователи.
+
+Ключ (olympiad_id, profile) хранится один раз и получает номер; у пользователя — отсортированный
+массив номеров его ключей, у ключа — отсортированный массив user_id подписчиков (array,
+а не set: на миллион подписок это единицы мегабайт). Индекс только структура данных: когда его
+строить и как сверять с базой, решает app.database.
+"""
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+Key = Tuple[str, str]
+
+
+def _discard(arr: array, value: int) -> bool:
+    i = bisect_left(arr, value)
+    if i < len(arr) and arr[i] == value:
+        del arr[i]
+        return True
+    return False
+
+
+class SubscriptionIndex:
+    def __init__(self):
+        self._key_ids: Dict[Key, int] = {}
+        self._keys: List[Key] = []
+        self._names: List[str] = []
+        self._by_user: Dict[int, array] = {}
+        self._by_key: List[array] = []
+        self.size = 0
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[int, str, str, str]]) -> "SubscriptionIndex":
+        """Из строк (user_id, olympiad_id, olympiad_name, profile) за один проход."""
+        idx = cls()
+        users: Dict[int, List[int]] = {}
+        subscribers: List[List[int]] = []
+        for uid, oid, name, prof in rows:
+            kid = idx._kid((oid, prof), name)
+            if kid == len(subscribers):
+                subscribers.append([])
+            users.setdefault(uid, []).append(kid)
+            subscribers[kid].append(uid)
+        idx._by_user = {uid: array("i", sorted(set(kids))) for uid, kids in users.items()}
+        idx._by_key = [array("q", sorted(set(uids))) for uids in subscribers]
+        idx.size = sum(len(a) for a in idx._by_user.values())
+        return idx
+
+    def _kid(self, key: Key, name: str) -> int:
+        kid = self._key_ids.get(key)
+        if kid is None:
+            kid = self._key_ids[key] = len(self._keys)
+            self._keys.append(key)
+            self._names.append(name)
+            self._by_key.append(array("q"))
+        return kid
+
+    # --- изменения ---
+
+    def add(self, uid: int, oid: str, name: str, prof: str) -> None:
+        kid = self._kid((oid, prof), name)
+        kids = self._by_user.setdefault(uid, array("i"))
+        i = bisect_left(kids, kid)
+        if i < len(kids) and kids[i] == kid:
+            return
+        kids.insert(i, kid)
+        insort(self._by_key[kid], uid)
+        self.size += 1
+
+    def remove(self, uid: int, oid: str, prof: str) -> None:
+        kid = self._key_ids.get((oid, prof))
+        kids = self._by_user.get(uid)
+        if kid is None or kids is None or not _discard(kids, kid):
+            return
+        _discard(self._by_key[kid], uid)
+        self.size -= 1
+        if not kids:
+            del self._by_user[uid]
+
+    def remove_profile(self, uid: int, prof: str) -> None:
+        for oid, p in [self._keys[k] for k in self._by_user.get(uid, ())]:
+            if p == prof:
+                self.remove(uid, oid, p)
+
+    def remove_keys(self, keys: Iterable[Key]) -> None:
+        for key in keys:
+            kid = self._key_ids.get(key)
+            if kid is None:
+                continue
+            for uid in self._by_key[kid]:
+                kids = self._by_user[uid]
+                _discard(kids, kid)
+                if not kids:
+                    del self._by_user[uid]
+            self.size -= len(self._by_key[kid])
+            self._by_key[kid] = array("q")
+
+    # --- чтение ---
+
+    def user_rows(self, uid: int) -> List[Tuple[str, str, str]]:
+        """[(olympiad_id, olympiad_name, profile)] по возрастанию (olympiad_id, profile)."""
+        rows = [(self._keys[k][0], self._names[k], self._keys[k][1]) for k in self._by_user.get(uid, ())]
+        rows.sort(key=lambda r: (r[0], r[2]))
+        return rows
+
+    def user_pairs(self, uid: int) -> List[Key]:
+        return sorted(self._keys[k] for k in self._by_user.get(uid, ()))
+
+    def user_profiles(self, uid: int) -> List[str]:
+        return list(dict.fromkeys(prof for _, prof in self.user_pairs(uid)))
+
+    def key_users(self, key: Key) -> Optional[array]:
+        """Отсортированные user_id подписчиков ключа (не изменять)."""
+        kid = self._key_ids.get(key)
+        return self._by_key[kid] if kid is not None else None
+
+    def keys(self) -> set:
+        return {self._keys[k] for k, uids in enumerate(self._by_key) if uids}
+
+    def users(self) -> Iterator[Tuple[int, List[Key]]]:
+        """(user_id, [(olympiad_id, profile)]) для всех пользователей с подписками."""
+        keys = self._keys
+        for uid, kids in self._by_user.items():
+            yield uid, [keys[k] for k in kids]
@@ -1,16 +1,24 @@
 """Общие утилиты интерфейса."""
-from typing import Iterable, List, Optional
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from telegram import InlineKeyboardMarkup, Update
 from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
-from app import config
+from app import config, logs
 from app.constants import UD_LIST_EXTRA_IDS, UD_LIST_ROOT_ID
 
 
 async def safe_edit_message(cb_query, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None):
-    """Редактирует сообщение."""
+    """Редактирует сообщение. Отложенная правка того же сообщения (debounced_edit) отменяется,
+    а уже отправляемая дожидается — иначе она может прийти позже и перетереть эту."""
+    await _settle_edits(cb_query)
+    return await _edit_message(cb_query, text, reply_markup)
+
+
+async def _edit_message(cb_query, text: str, reply_markup: Optional[InlineKeyboardMarkup], answer: bool = True):
     try:
         msg = cb_query.message
         if msg:
@@ -18,19 +26,93 @@ async def safe_edit_message(cb_query, text: str, reply_markup: Optional[InlineKe
             same_text = cur_text == text
             same_markup = msg.reply_markup == reply_markup
             if same_text and same_markup:
-                await cb_query.answer("Без изменений.")
+                if answer:
+                    await cb_query.answer("Без изменений.")
                 return None
         return await cb_query.edit_message_text(text, reply_markup=reply_markup)
     except BadRequest as e:
         if "Message is not modified" in str(e):
             try:
                 await cb_query.edit_message_reply_markup(reply_markup=reply_markup)
-            except Exception:
-                pass
+            except Exception as e:
+                logs.suppressed("edit_reply_markup", e)
             return None
         raise
 
 
+# Отложенные правки: (chat_id, message_id) -> [задача, последний cb_query, render, срок отправки]
+_pending_edits: Dict[Tuple[int, int], list] = {}
+# Правки, которые уже отправляются: (chat_id, message_id) -> задача _flush_edit
+_flushing: Dict[Tuple[int, int], asyncio.Task] = {}
+# Непрерывные клики не откладывают правку дольше, чем на столько задержек от первого клика
+_MAX_WAIT_FACTOR = 4
+
+
+def _edit_key(cb_query) -> Optional[Tuple[int, int]]:
+    msg = cb_query.message
+    return (msg.chat_id, msg.message_id) if msg else None
+
+
+async def _settle_edits(cb_query) -> None:
+    key = _edit_key(cb_query)
+    if key is None:
+        return
+    entry = _pending_edits.pop(key, None)
+    if entry:
+        entry[0].cancel()
+    flushing = _flushing.get(key)
+    if flushing:
+        await asyncio.wait({flushing})
+
+
+async def debounced_edit(cb_query, render: Callable[[], Tuple[str, Optional[InlineKeyboardMarkup]]]) -> None:
+    """
+    Правка сообщения с чекбоксами: отправляется, когда клики по нему стихли на EDIT_DEBOUNCE_MS.
+
+    Состояние вызывающий меняет сразу; render() вызывается один раз перед отправкой и строит
+    текст и клавиатуру по последнему состоянию. Промежуточные правки не отправляются.
+    """
+    key = _edit_key(cb_query)
+    delay = config.EDIT_DEBOUNCE_MS / 1000
+    if delay <= 0 or key is None:
+        text, markup = render()
+        await safe_edit_message(cb_query, text, markup)
+        return
+    now = asyncio.get_running_loop().time()
+    entry = _pending_edits.get(key)
+    if entry:
+        entry[1], entry[2], entry[3] = cb_query, render, now + delay
+        return
+    entry = [None, cb_query, render, now + delay]
+    _pending_edits[key] = entry
+    entry[0] = asyncio.create_task(_flush_edit(key, entry, now + delay * _MAX_WAIT_FACTOR))
+
+
+async def _flush_edit(key: Tuple[int, int], entry: list, latest: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        wait = min(entry[3], latest) - loop.time()
+        if wait <= 0:
+            break
+        await asyncio.sleep(wait)
+    if _pending_edits.get(key) is not entry:
+        return
+    del _pending_edits[key]
+    task = asyncio.current_task()
+    previous, _flushing[key] = _flushing.get(key), task
+    cb_query, render = entry[1], entry[2]
+    try:
+        if previous:
+            await asyncio.wait({previous})
+        text, markup = render()
+        await _edit_message(cb_query, text, markup, answer=False)
+    except Exception:
+        logging.exception("Не удалось применить отложенную правку сообщения %s", key)
+    finally:
+        if _flushing.get(key) is task:
+            del _flushing[key]
+
+
 async def cleanup_list_messages(update: Update, context: ContextTypes.DEFAULT_TYPE, exclude_id: Optional[int] = None):
     chat_id = update.effective_chat.id if update.effective_chat else None
     if not chat_id:
@@ -42,37 +124,60 @@ async def cleanup_list_messages(update: Update, context: ContextTypes.DEFAULT_TY
             continue
         try:
             await context.bot.delete_message(chat_id=chat_id, message_id=mid)
-        except Exception:
-            pass
+        except Exception as e:
+            logs.suppressed("cleanup_list_messages", e)
     if root_id and (exclude_id is None or root_id != exclude_id):
         try:
             await context.bot.delete_message(chat_id=chat_id, message_id=root_id)
-        except Exception:
-            pass
-
-
-def chunk_messages(lines: Iterable[str], max_len: int = config.MAX_MESSAGE_LENGTH) -> List[str]:
-    chunks, cur = [], ""
-    for ln in lines:
-        if len(cur) + len(ln) + 2 > max_len:
-            if cur:
-                chunks.append(cur.strip())
-                cur = ""
-        cur += ln + "\n\n"
-    if cur.strip():
-        chunks.append(cur.strip())
+        except Exception as e:
+            logs.suppressed("cleanup_list_messages", e)
+
+
+def utf16_len(text: str) -> int:
+    """Длина в единицах UTF-16 — так Telegram считает лимит сообщения (эмодзи занимают две)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def chunk_messages(
+    lines: Iterable[str], max_len: int = config.MAX_MESSAGE_LENGTH, lengths: Optional[Iterable[int]] = None
+) -> List[str]:
+    """
+    Склеивает строки через пустую строку в сообщения не длиннее max_len.
+
+    lengths — заранее посчитанные utf16_len строк (например, у строк, общих для многих пользователей).
+    """
+    if lengths is None:
+        lines = list(lines)
+        lengths = map(utf16_len, lines)
+    chunks: List[str] = []
+    parts: List[str] = []
+    size = 0
+    for ln, n in zip(lines, lengths):
+        if parts and size + n + 2 > max_len:
+            chunks.append("\n\n".join(parts).strip())
+            parts, size = [], 0
+        parts.append(ln)
+        size += n + 2
+    if parts:
+        text = "\n\n".join(parts).strip()
+        if text:
+            chunks.append(text)
     return chunks
 
 
 def split_text(text: str, max_len: int = config.MAX_MESSAGE_LENGTH) -> List[str]:
-    if len(text) <= max_len:
+    if utf16_len(text) <= max_len:
         return [text]
-    chunks, cur = [], ""
+    chunks: List[str] = []
+    parts: List[str] = []
+    size = 0
     for line in text.splitlines(keepends=True):
-        if len(cur) + len(line) > max_len:
-            chunks.append(cur)
-            cur = ""
-        cur += line
-    if cur:
-        chunks.append(cur)
+        n = utf16_len(line)
+        if parts and size + n > max_len:
+            chunks.append("".join(parts))
+            parts, size = [], 0
+        parts.append(line)
+        size += n
+    if parts:
+        chunks.append("".join(parts))
     return chunks
@@ -0,0 +1,64 @@
+"""
+Фоновый прогрев после старта: миграция БД, индекс подписок в памяти, продолжение прерванных
+рассылок и загрузка каталога.
+
+Бот начинает принимать апдейты сразу; их обработка ждёт только готовности БД,
+каталог при необходимости догрузится по первому обращению. Если БД подготовить не удалось,
+приложение останавливается (main завершает процесс с кодом 1, супервизор перезапустит бота).
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from telegram import Update
+from telegram.ext import Application, ApplicationHandlerStop, ContextTypes
+
+from app import broadcasts, catalog, config
+from app.database import init_db, load_subscription_index
+
+db_ready = asyncio.Event()
+error: Optional[BaseException] = None   # почему не удалось подготовить БД
+
+
+def is_ready() -> bool:
+    """БД смигрирована и каталог загружен."""
+    return db_ready.is_set() and error is None and catalog.is_ready()
+
+
+async def _abort(app: Application) -> None:
+    # Сбой мог случиться ещё до app.start() в run_polling — тогда stop_running ничего не делает
+    while not app.running:
+        await asyncio.sleep(0.1)
+    app.stop_running()
+
+
+async def run(app: Application) -> None:
+    global error
+    t0 = time.perf_counter()
+    try:
+        await asyncio.to_thread(init_db)
+        if config.SUBSCRIPTION_INDEX:
+            await asyncio.to_thread(load_subscription_index)
+    except Exception as e:
+        logging.exception("Не удалось подготовить БД — бот останавливается")
+        error = e
+        db_ready.set()      # будим придержанные апдейты: wait_ready их отбросит
+        await _abort(app)
+        return
+    db_ready.set()
+    logging.info("БД готова за %.2f с", time.perf_counter() - t0)
+    broadcasts.resume(app)
+    try:
+        await catalog.olympiads()
+        logging.info("Каталог олимпиад загружен за %.2f с", time.perf_counter() - t0)
+    except Exception:
+        logging.exception("Не удалось загрузить каталог олимпиад при старте")
+
+
+async def wait_ready(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Хендлер группы -1: придерживает апдейты, пока не готова БД; если подготовить её не удалось — отбрасывает."""
+    if not db_ready.is_set():
+        await db_ready.wait()
+    if error is not None:
+        raise ApplicationHandlerStop
@@ -0,0 +1,5 @@
+"""
+Бенчмарки горячих путей бота на синтетических данных.
+
+Запуск: python -m bench.run --help
+"""
@@ -0,0 +1,150 @@
+"""
+Архивация подписок на прошедшие олимпиады (app.archive).
+
+Часть олимпиад в синтетической таблице получает даты прошлого сезона (с годом). Замеряются:
+чтение всех подписок и send_daily до и после архивации, время самой архивации и размер базы.
+Проверяется, что send_daily отправляет те же сообщения, а после «нового сезона» (тем же
+олимпиадам вернули исходные даты) из архива возвращается всё, кроме ключей, чьи даты
+и в новом сезоне целиком в прошлом. Защита от устаревшей таблицы: без force перенос --expired
+(больше ARCHIVE_MAX_SHARE) и прогон через год после загрузки таблицы ничего не переносят.
+
+Пример:
+    python -m bench.bench_archive --olympiads 2000 --users 50000 --expired 0.6
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from app import archive, config, database
+from app.excel_data import build_lookup
+from app.reminders import send_daily
+
+from bench.synthetic import (
+    FakeBot,
+    FakeContext,
+    make_profiles,
+    make_rows,
+    make_subscriptions_db,
+    rows_to_olympiads,
+    write_workbook,
+)
+
+
+def _past_cell(rnd: random.Random, today: date) -> str:
+    d = today - timedelta(days=rnd.randint(30, 300))
+    return f"{d:%d.%m.%Y}/заключительный этап\n{d - timedelta(days=40):%d.%m.%Y}/отборочный этап"
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _daily() -> int:
+    bot = FakeBot()
+    asyncio.run(send_daily(FakeContext(bot)))
+    return bot.sent
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--olympiads", type=int, default=2000)
+    p.add_argument("--profiles", type=int, default=40)
+    p.add_argument("--users", type=int, default=50_000)
+    p.add_argument("--subs-per-user", type=int, default=8)
+    p.add_argument("--expired", type=float, default=0.6, help="доля олимпиад, у которых все даты прошли")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    today = date.today()
+    rnd = random.Random(args.seed)
+    tmp = Path(tempfile.mkdtemp(prefix="olymp-archive-"))
+    try:
+        config.EXCEL_FILE = str(tmp / "olympiads.xlsx")
+        config.DB_FILE = str(tmp / "subscriptions.db")
+        config.SEND_EMPTY_INFO = False
+
+        rows = make_rows(args.olympiads, make_profiles(args.profiles), today, seed=args.seed)
+        season = [r[:] for r in rows]
+        for r in rows:
+            if rnd.random() < args.expired:
+                r[5] = _past_cell(rnd, today)
+        write_workbook(config.EXCEL_FILE, rows)
+        make_subscriptions_db(config.DB_FILE, rows_to_olympiads(rows), args.users, args.subs_per_user, args.seed)
+        database.init_db()
+
+        # Часть исходных синтетических ячеек и так целиком в прошлом — они останутся в архиве
+        season_lookup = build_lookup(rows_to_olympiads(season))
+        stays_archived = sum(
+            1
+            for _, oid, prof in database.get_all_subscriptions()
+            if (oid, prof) in season_lookup and archive.is_expired(season_lookup[(oid, prof)]["date_desc"], today)
+        )
+
+        before = {
+            "subscriptions": database.get_archive_counts()[0],
+            "size_mb": os.path.getsize(config.DB_FILE) / 1024 / 1024,
+            "get_all_subscriptions_s": _time(database.get_all_subscriptions),
+            "send_daily_s": _time(_daily, 1),
+            "messages": _daily(),
+        }
+        held_share = asyncio.run(archive.run(today))
+        held_stale = asyncio.run(archive.run(today + timedelta(days=400)))
+        res = asyncio.run(archive.run(today, force=True))
+        after = {
+            "subscriptions": res["subscriptions"],
+            "size_mb": os.path.getsize(config.DB_FILE) / 1024 / 1024,
+            "get_all_subscriptions_s": _time(database.get_all_subscriptions),
+            "send_daily_s": _time(_daily, 1),
+            "messages": _daily(),
+        }
+
+        # Новый сезон: те же олимпиады снова с будущими датами
+        time.sleep(0.01)
+        write_workbook(config.EXCEL_FILE, season)
+        restored = asyncio.run(archive.run(today))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = json.dumps(
+        {
+            "olympiads": args.olympiads,
+            "users": args.users,
+            "expired_share": args.expired,
+            "before": before,
+            "guard": {
+                "max_share": config.ARCHIVE_MAX_SHARE,
+                "share_held": bool(held_share["held"]) and held_share["archived"] == 0,
+                "stale_held": bool(held_stale["held"]) and held_stale["archived"] == 0,
+            },
+            "archive_run": {k: res[k] for k in ("archived_keys", "archived", "vacuumed", "seconds")},
+            "after": after,
+            "same_messages": before["messages"] == after["messages"],
+            "restore_run": {k: restored[k] for k in ("restored_keys", "restored", "subscriptions", "archive")},
+            "fully_restored": restored["subscriptions"] == before["subscriptions"] - stays_archived
+            and restored["archive"] == stays_archived,
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
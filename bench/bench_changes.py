@@ -0,0 +1,165 @@
+"""
+Сравнение версий каталога и уведомления об изменившихся датах (app.changes).
+
+В синтетической таблице на --olympiads строк правится --edits ячеек «Даты», одна строка
+добавляется и одна удаляется. Замеряются:
+  - diff     — changes.diff между двумя версиями каталога (без чтения файла);
+  - full     — как без него: разбор всех ячеек обеих версий и сравнение всех ключей;
+  - subscribers — выборка подписчиков изменившихся ключей по индексу против полного чтения подписок;
+  - check    — changes.check целиком: перечитывание файла, diff и отправка (FakeBot).
+Проверяется, что изменившиеся ключи — ровно правленые, что подписчики совпадают с полным
+перебором и что каждый из них получил одно сообщение.
+
+Пример:
+    python -m bench.bench_changes --olympiads 10000 --users 50000 --edits 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app import catalog, changes, config, database
+from app.dates import parse_events_at
+from app.excel_data import build_lookup
+
+from bench.synthetic import (
+    FakeBot,
+    make_profiles,
+    make_rows,
+    make_subscriptions_db,
+    rows_to_olympiads,
+    write_workbook,
+)
+
+
+def _best(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _keys(row) -> set:
+    return {(row[0], prof) for prof in rows_to_olympiads([row])[0]["profiles"]}
+
+
+def _full(old, new, reference):
+    """Разбор всех ячеек обеих версий и сравнение по всем ключам."""
+    before = {k: parse_events_at(o["date_desc"], reference, {}) for k, o in old.items()}
+    after = {k: parse_events_at(o["date_desc"], reference, {}) for k, o in new.items()}
+    return {k for k in after.keys() & before.keys() if after[k] != before[k]}
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--olympiads", type=int, default=10_000)
+    p.add_argument("--profiles", type=int, default=40)
+    p.add_argument("--users", type=int, default=50_000)
+    p.add_argument("--subs-per-user", type=int, default=8)
+    p.add_argument("--edits", type=int, default=5, help="сколько ячеек «Даты» правится")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    today = datetime.now(config.TIMEZONE).date()
+    rnd = random.Random(args.seed)
+    tmp = Path(tempfile.mkdtemp(prefix="olymp-changes-"))
+    try:
+        config.EXCEL_FILE = str(tmp / "olympiads.xlsx")
+        config.DB_FILE = str(tmp / "subscriptions.db")
+        config.CATALOG_REFERENCE_DATE = today
+        rows = make_rows(args.olympiads, make_profiles(args.profiles), today, seed=args.seed)
+        write_workbook(config.EXCEL_FILE, rows)
+        make_subscriptions_db(config.DB_FILE, rows_to_olympiads(rows), args.users, args.subs_per_user, args.seed)
+        database.init_db()
+
+        # Новая версия: правки дат, одна строка удалена, одна добавлена
+        edited_rows = rnd.sample(range(1, len(rows)), args.edits)
+        new_rows = [r[:] for r in rows]
+        for i in edited_rows:
+            d = today + timedelta(days=rnd.randint(10, 90))
+            new_rows[i][5] = f"{d:%d.%m.%Y}/перенесено"
+        removed_row = new_rows.pop(0)
+        removed_keys = _keys(removed_row)
+        new_rows.append(make_rows(1, make_profiles(args.profiles), today, seed=args.seed + 1)[0])
+        new_rows[-1][0] = "Новая олимпиада"
+        expected = set().union(*(_keys(rows[i]) for i in edited_rows))
+
+        old = build_lookup(rows_to_olympiads(rows))
+        new = build_lookup(rows_to_olympiads(new_rows))
+        d = changes.diff(old, new, today, today)
+        diff_s = _best(lambda: changes.diff(old, new, today, today))
+        full_s = _best(lambda: _full(old, new, today), 1)
+
+        keys = list(d["changed"])
+        subs = database.get_key_subscribers(keys)
+        indexed_s = _best(lambda: database.get_key_subscribers(keys))
+        wanted = set(keys)
+        brute = {uid for uid, oid, prof in database.get_all_subscriptions() if (oid, prof) in wanted}
+        scan_s = _best(
+            lambda: {uid for uid, oid, prof in database.get_all_subscriptions() if (oid, prof) in wanted}, 1
+        )
+
+        # Целиком: каталог перечитывается из файла, diff, отправка
+        bot = FakeBot()
+        asyncio.run(changes.check(bot, today))      # запоминает исходный каталог
+        time.sleep(0.01)
+        write_workbook(config.EXCEL_FILE, new_rows)
+        os.utime(config.EXCEL_FILE)
+        t0 = time.perf_counter()
+        res = asyncio.run(changes.check(bot, today))
+        check_s = time.perf_counter() - t0
+        catalog_lookup = catalog.get_lookup()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = json.dumps(
+        {
+            "olympiads": args.olympiads,
+            "keys": len(old),
+            "users": args.users,
+            "edits": args.edits,
+            "diff": {
+                "added": len(d["added"]),
+                "removed": len(d["removed"]),
+                "changed": len(d["changed"]),
+                "seconds": diff_s,
+            },
+            "full_recompute_seconds": full_s,
+            "speedup": full_s / diff_s if diff_s else None,
+            "changed_keys_match_edits": set(d["changed"]) == expected,
+            "removed_match": d["removed"] == removed_keys,
+            "subscribers": {
+                "users": len(subs),
+                "indexed_seconds": indexed_s,
+                "full_scan_seconds": scan_s,
+                "match_full_scan": set(subs) == brute,
+            },
+            "check": {
+                "seconds_with_reload": check_s,
+                "result": res,
+                "messages_sent": bot.sent,
+                "one_message_per_subscriber": bot.sent == len(subs) and res["sent"] == len(subs),
+                "catalog_reloaded": len(catalog_lookup) == len(new),
+            },
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Разбор ячеек дат: регрессионные проверки и замер скорости.
+
+Проверки (при расхождении скрипт падает):
+  - golden  — события каждой ячейки корпуса форматов при фиксированной опорной дате
+              (GOLDEN_EXPECTED) и ближайшее событие на разные дни, в т. ч. идущие диапазоны (ONGOING);
+  - legacy  — сверка с прежней реализацией (цепочка re.split, год — ближайший не раньше «сегодня»)
+              на корпусе и случайных ячейках (включая «мусорные») при опорной дате = «сегодня».
+              Прежняя реализация переносила даты без года на следующий год, поэтому сравниваются
+              только даты в пределах LEGACY_HORIZON дней, где обе схемы выбора года совпадают.
+Затем замеряются:
+  - uncached — разбор --cells различных ячеек без кэша ячеек: та же цепочка re.split, что и
+               раньше, поэтому время примерно равно прежнему (ratio около 1);
+  - catalog  — --cells разборов ячеек каталога из --catalog строк (как в send_daily,
+               где одна ячейка разбирается для каждого подписчика), кэш сбрасывается перед прогоном.
+               Ускорение (speedup) даёт кэш разобранных ячеек.
+
+Пример:
+    python -m bench.bench_dates --cells 100000 --out dates.json
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from app import dates
+from app.dates import DATE_RE, next_upcoming_from_cell, parse_dates_from_cell, parse_events
+
+from bench.synthetic import make_date_cell
+
+RANGE_SEP_RE = re.compile(r"\s*[–—-]\s*")
+
+
+def _resolve_year(dd: int, mm: int, y: Optional[str], today: date) -> int:
+    """Прежний выбор года: дата без года — ближайшая не раньше today."""
+    if y:
+        return int(y) + (2000 if int(y) < 100 else 0)
+    try:
+        candidate = date(today.year, mm, dd)
+    except ValueError:
+        return today.year
+    return candidate.year if candidate >= today else today.year + 1
+
+
+def legacy_parse_dates_from_cell(cell: str, today: date) -> List[Tuple[date, str]]:
+    if not cell:
+        return []
+    text = str(cell).strip()
+    if not text or text.upper().startswith("ПОКА"):
+        return []
+
+    chunks = re.split(r"[\n;]+", text.replace("\r", "\n"))
+    refined = []
+    for ch in chunks:
+        parts = [p.strip() for p in re.split(r",(?!\s*\d{1,2}\.\d{1,2})", ch) if p.strip()]
+        refined.extend(parts)
+
+    out: List[Tuple[date, str]] = []
+    for entry in refined:
+        entry = entry.strip()
+        if not entry:
+            continue
+        if "/" in entry:
+            left, label = entry.split("/", 1)
+            label = label.strip() or "событие"
+        else:
+            left, label = entry, "событие"
+
+        if "с " in left.lower() and " по " in left.lower():
+            m = DATE_RE.findall(left)
+            if m:
+                d1, m1, y1 = m[0]
+                dd, mm = int(d1), int(m1)
+                yy = _resolve_year(dd, mm, y1, today)
+                try:
+                    dt = date(yy, mm, dd)
+                    if dt >= today:
+                        out.append((dt, label))
+                except ValueError:
+                    pass
+            continue
+
+        if RANGE_SEP_RE.search(left):
+            sides = RANGE_SEP_RE.split(left)
+            if sides:
+                m = DATE_RE.search(sides[0])
+                if m:
+                    d1, m1, y1 = m.groups()
+                    dd, mm = int(d1), int(m1)
+                    yy = _resolve_year(dd, mm, y1, today)
+                    try:
+                        dt = date(yy, mm, dd)
+                        if dt >= today:
+                            out.append((dt, label or "начало"))
+                    except ValueError:
+                        pass
+            continue
+
+        m = DATE_RE.search(left) or DATE_RE.search(entry)
+        if m:
+            d, m_, y = m.groups()
+            dd, mm = int(d), int(m_)
+            yy = _resolve_year(dd, mm, y, today)
+            try:
+                dt = date(yy, mm, dd)
+                if dt >= today:
+                    out.append((dt, label))
+            except ValueError:
+                pass
+
+    uniq = {}
+    for dt, lab in out:
+        if dt in uniq and lab not in uniq[dt]:
+            uniq[dt] = uniq[dt] + f"; {lab}"
+        else:
+            uniq.setdefault(dt, lab)
+    return [(dt, uniq[dt]) for dt in sorted(uniq.keys())]
+
+
+# Форматы из README и реальной таблицы плюс пограничные случаи
+GOLDEN_CORPUS = [
+    "",
+    "ПОКА РАНО",
+    "пока рано",
+    "16.02.2026/финал",
+    "01.12.2025/начало регистрации; 10.01/окончание регистрации",
+    "12.11–14.11.2025/очный тур",
+    "12.11 - 14.11/очный тур",
+    "12.11—14.11",
+    "с 05.10 по 20.10/отбор",
+    "С 05.10 ПО 20.10",
+    "с 05.10.25 по 20.10.25/отбор, 01.11/финал",
+    "30.08.2025/расписание появится в конце сентября-начало октября",
+    "01.02, 03.02/два тура",
+    "01.02/первый, второй тур",
+    "01.02/финал,\n03.04/итоги",
+    "01.02\r\n02.02/b\r03.02",
+    "онлайн-этап 01.10",
+    "01.10 онлайн-этап",
+    "отбор/01.10",
+    "29.02/високосный",
+    "31.04/нет такой даты",
+    "1.2.3.4",
+    "123.45/мусор",
+    "01.02.20256",
+    "01.02.5/год из одной цифры",
+    "01.02.0099",
+    "01.02/a; 01.02/b; 01.02/a",
+    "01.02/ ; 01.02/",
+    " ; ;, ,\n",
+    "класс 01.02 по 03.02",
+    "01.02 по 03.02 вс ;x",
+    "с 01.02 по",
+    "/01.02",
+    "01.02/x/y/03.04",
+]
+
+# События корпуса при опорной дате GOLDEN_REFERENCE: ячейка -> [(начало, конец, ярлык)]
+GOLDEN_REFERENCE = date(2025, 9, 1)
+GOLDEN_EXPECTED = {
+    "": [],
+    "ПОКА РАНО": [],
+    "пока рано": [],
+    "16.02.2026/финал": [("16.02.2026", "16.02.2026", "финал")],
+    "01.12.2025/начало регистрации; 10.01/окончание регистрации": [
+        ("01.12.2025", "01.12.2025", "начало регистрации"),
+        ("10.01.2026", "10.01.2026", "окончание регистрации"),
+    ],
+    "12.11–14.11.2025/очный тур": [("12.11.2025", "14.11.2025", "очный тур")],
+    "12.11 - 14.11/очный тур": [("12.11.2025", "14.11.2025", "очный тур")],
+    "12.11—14.11": [("12.11.2025", "14.11.2025", "событие")],
+    "с 05.10 по 20.10/отбор": [("05.10.2025", "20.10.2025", "отбор")],
+    "С 05.10 ПО 20.10": [("05.10.2025", "20.10.2025", "событие")],
+    "с 05.10.25 по 20.10.25/отбор, 01.11/финал": [("05.10.2025", "20.10.2025", "отбор, 01.11/финал")],
+    "30.08.2025/расписание появится в конце сентября-начало октября": [
+        ("30.08.2025", "30.08.2025", "расписание появится в конце сентября-начало октября"),
+    ],
+    "01.02, 03.02/два тура": [("01.02.2026", "01.02.2026", "два тура")],
+    "01.02/первый, второй тур": [("01.02.2026", "01.02.2026", "первый")],
+    "01.02/финал,\n03.04/итоги": [("01.02.2026", "01.02.2026", "финал"), ("03.04.2026", "03.04.2026", "итоги")],
+    "01.02\r\n02.02/b\r03.02": [
+        ("01.02.2026", "01.02.2026", "событие"),
+        ("02.02.2026", "02.02.2026", "b"),
+        ("03.02.2026", "03.02.2026", "событие"),
+    ],
+    "онлайн-этап 01.10": [],
+    "01.10 онлайн-этап": [("01.10.2025", "01.10.2025", "событие")],
+    "отбор/01.10": [("01.10.2025", "01.10.2025", "01.10")],
+    "29.02/високосный": [("29.02.2028", "29.02.2028", "високосный")],
+    "31.04/нет такой даты": [],
+    "1.2.3.4": [("01.02.2026", "01.02.2026", "событие")],
+    "123.45/мусор": [],
+    "01.02.20256": [("01.02.2025", "01.02.2025", "событие")],
+    "01.02.5/год из одной цифры": [("01.02.2026", "01.02.2026", "год из одной цифры")],
+    "01.02.0099": [("01.02.2099", "01.02.2099", "событие")],
+    "01.02/a; 01.02/b; 01.02/a": [("01.02.2026", "01.02.2026", "a; b")],
+    "01.02/ ; 01.02/": [("01.02.2026", "01.02.2026", "событие")],
+    " ; ;, ,\n": [],
+    "класс 01.02 по 03.02": [("01.02.2026", "03.02.2026", "событие")],
+    "01.02 по 03.02 вс ;x": [("01.02.2026", "01.02.2026", "событие")],
+    "с 01.02 по": [("01.02.2026", "01.02.2026", "событие")],
+    "/01.02": [("01.02.2026", "01.02.2026", "01.02")],
+    "01.02/x/y/03.04": [("01.02.2026", "01.02.2026", "x/y/03.04")],
+    # Переход через год и опорная дата
+    "28.12–05.01.2026/зимняя школа": [("28.12.2025", "05.01.2026", "зимняя школа")],
+    "28.12–05.01/зимняя школа": [("28.12.2025", "05.01.2026", "зимняя школа")],
+    "25.08/за неделю до опорной даты — прошло": [("25.08.2025", "25.08.2025", "за неделю до опорной даты — прошло")],
+    # Таблица выложена в сентябре: весенние и летние даты без года — следующего года
+    "20.05/финал": [("20.05.2026", "20.05.2026", "финал")],
+    "10.08/регистрация": [("10.08.2026", "10.08.2026", "регистрация")],
+    "15.05/отбор; 20.05–25.05/финал": [
+        ("15.05.2026", "15.05.2026", "отбор"),
+        ("20.05.2026", "25.05.2026", "финал"),
+    ],
+    "01.05/заключительный этап": [("01.05.2026", "01.05.2026", "заключительный этап")],
+    "14.11–12.11/конец раньше начала": [("14.11.2025", "14.11.2025", "конец раньше начала")],
+    "12.11–31.11/нет такой даты конца": [("12.11.2025", "12.11.2025", "нет такой даты конца")],
+}
+
+# Ближайшее событие (идущее или будущее) на день today при опорной дате GOLDEN_REFERENCE
+ONGOING = [
+    ("с 05.10 по 20.10/отбор", date(2025, 10, 4), ("05.10.2025", "20.10.2025", "отбор")),
+    ("с 05.10 по 20.10/отбор", date(2025, 10, 12), ("05.10.2025", "20.10.2025", "отбор")),
+    ("с 05.10 по 20.10/отбор", date(2025, 10, 20), ("05.10.2025", "20.10.2025", "отбор")),
+    ("с 05.10 по 20.10/отбор", date(2025, 10, 21), None),
+    ("12.11–14.11/очный тур; 01.12/итоги", date(2025, 11, 13), ("12.11.2025", "14.11.2025", "очный тур")),
+    ("12.11–14.11/очный тур; 01.12/итоги", date(2025, 11, 15), ("01.12.2025", "01.12.2025", "итоги")),
+    ("28.12–05.01/зимняя школа", date(2026, 1, 3), ("28.12.2025", "05.01.2026", "зимняя школа")),
+    # Год не «переезжает» вперёд со сменой дня: прошедшее событие сезона остаётся в прошлом
+    ("10.09/отбор", date(2025, 9, 11), None),
+    ("10.09/отбор", date(2026, 3, 1), None),
+    # Майские даты сентябрьской таблицы не прошли ни сразу после загрузки, ни в апреле
+    ("20.05/финал", date(2025, 9, 2), ("20.05.2026", "20.05.2026", "финал")),
+    ("20.05/финал", date(2026, 4, 30), ("20.05.2026", "20.05.2026", "финал")),
+    ("10.08/регистрация", date(2025, 9, 1), ("10.08.2026", "10.08.2026", "регистрация")),
+]
+
+LEGACY_HORIZON = 240
+# Диапазон, где у начала нет года, а у конца есть: теперь год начала берётся из конца
+# («02.06–05.06.2026» — 2026), прежняя реализация выбирала его от «сегодня». Такие ячейки
+# в сверке с прежней реализацией пропускаются (покрыты GOLDEN_EXPECTED).
+_MIXED_RANGE_RE = re.compile(
+    r"\d{1,2}\.\d{1,2}(?!\.\d)[^/\n\r;]*?(?:[–—-]|\sпо\s)\s*\d{1,2}\.\d{1,2}\.\d{2,4}", re.IGNORECASE
+)
+
+_NOISE = "0123456789..../-–— ,;;\n\rсСпПоО абвx"
+
+
+def _noise_cell(rnd: random.Random) -> str:
+    return "".join(rnd.choice(_NOISE) for _ in range(rnd.randint(0, 40)))
+
+
+def _fmt_event(ev) -> Tuple[str, str, str]:
+    return f"{ev[0]:%d.%m.%Y}", f"{ev[1]:%d.%m.%Y}", ev[2]
+
+
+def check_golden() -> int:
+    missing = [c for c in GOLDEN_CORPUS if c not in GOLDEN_EXPECTED]
+    if missing:
+        raise SystemExit(f"Нет ожидаемого результата для {missing!r}")
+    checked = 0
+    for cell, want in GOLDEN_EXPECTED.items():
+        got = [_fmt_event(ev) for ev in parse_events(cell, GOLDEN_REFERENCE)]
+        if got != want:
+            raise SystemExit(f"Расхождение для {cell!r}:\n  ожидалось: {want}\n  получено: {got}")
+        checked += 1
+    for cell, today, want in ONGOING:
+        nxt = next_upcoming_from_cell(cell, today, GOLDEN_REFERENCE)
+        got = _fmt_event(nxt) if nxt else None
+        if got != want:
+            raise SystemExit(f"Ближайшее для {cell!r} на {today}:\n  ожидалось: {want}\n  получено: {got}")
+        checked += 1
+    return checked
+
+
+def _comparable(items: List[Tuple[date, str]], today: date) -> List[Tuple[date, frozenset]]:
+    horizon = today + timedelta(days=LEGACY_HORIZON)
+    return [(dt, frozenset(lab.split("; "))) for dt, lab in items if dt < horizon]
+
+
+def check_equivalence(n_random: int, seed: int) -> int:
+    rnd = random.Random(seed)
+    todays = [date(2025, 1, 1), date(2025, 9, 1), date(2025, 12, 31), date(2028, 2, 28)]
+    cells = list(GOLDEN_CORPUS)
+    for _ in range(n_random):
+        cells.append(make_date_cell(rnd, rnd.choice(todays)) if rnd.random() < 0.5 else _noise_cell(rnd))
+    cells = [c for c in cells if not _MIXED_RANGE_RE.search(c)]
+    checked = 0
+    for today in todays:
+        for cell in cells + cells[: len(GOLDEN_CORPUS)]:
+            want = _comparable(legacy_parse_dates_from_cell(cell, today), today)
+            got = _comparable(parse_dates_from_cell(cell, today, today), today)
+            if got != want:
+                raise SystemExit(f"Расхождение для {cell!r} при today={today}:\n  было: {want}\n  стало: {got}")
+            checked += 1
+    return checked
+
+
+def _time(fn, cells, today, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        dates._parsed.clear()
+        t0 = time.perf_counter()
+        for c in cells:
+            fn(c, today)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cells", type=int, default=100_000)
+    p.add_argument("--catalog", type=int, default=2_000)
+    p.add_argument("--check", type=int, default=20_000, help="сколько случайных ячеек сверить с эталоном")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    golden = check_golden()
+    checked = check_equivalence(args.check, args.seed)
+
+    today = date(2025, 9, 1)
+    rnd = random.Random(args.seed + 1)
+    cells = [make_date_cell(rnd, today + timedelta(days=rnd.randint(-60, 60))) for _ in range(args.cells)]
+    # Без кэша ячеек: на вход идут уже очищенные ячейки, эталону — те же
+    plain = [c.strip() for c in cells if c.strip() and not c.strip().upper().startswith("ПОКА")]
+    unc_legacy = _time(legacy_parse_dates_from_cell, plain, today, args.repeat)
+    memo: dict = {}  # кэш интервалов на опорную дату, как у parse_events
+    unc_current = _time(lambda c, t: dates.resolve_entries(dates._entries(c), t, memo), plain, today, args.repeat)
+
+    catalog = cells[: args.catalog]
+    workload = [rnd.choice(catalog) for _ in range(args.cells)]
+    cat_legacy = _time(legacy_parse_dates_from_cell, workload, today, args.repeat)
+    cat_current = _time(parse_dates_from_cell, workload, today, args.repeat)
+
+    report = json.dumps(
+        {
+            "golden_checked": golden,
+            "equivalence_checked": checked,
+            "cells": args.cells,
+            "uncached": {"legacy_s": unc_legacy, "current_s": unc_current, "ratio": unc_legacy / unc_current},
+            "catalog": {
+                "catalog_rows": len(catalog),
+                "legacy_s": cat_legacy,
+                "current_s": cat_current,
+                "speedup": cat_legacy / cat_current,
+            },
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
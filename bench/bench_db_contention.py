@@ -0,0 +1,190 @@
+"""
+Конкурентная запись в SQLite из нескольких процессов (бот + админ-скрипты + воркер рассылки).
+
+Каждый процесс с заданной частотой пишет через app.database:
+- add_subscription — уникальная подписка (проверка: ни одна строка не потеряна);
+- record_deliveries — неудача доставки одному общему «горячему» пользователю
+  (проверка: consecutive_failures == числу вызовов, т. е. нет потерянных обновлений);
+- ensure_user — три оператора в одной транзакции;
+а каждая 20-я операция — полное чтение подписок, как у ежедневной рассылки.
+
+Операции процесса выполняются из event loop, как в боте: через asyncio.to_thread. Рядом крутится
+таймер с шагом 5 мс; его опоздание (loop_lag_*) показывает, насколько запись останавливает loop —
+хендлеры остальных пользователей в это время стоят.
+
+--inline — также прогнать с вызовами прямо в потоке event loop (как было до asyncio.to_thread).
+--legacy — прежний режим: журнал DELETE, отложенные транзакции Python sqlite3, без повторов,
+вызовы в потоке event loop.
+
+Пример:
+    python -m bench.bench_db_contention --procs 6 --writes 400 --rate 200
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+HOT_USER = 1
+TICK = 0.005  # шаг таймера, по опозданию которого меряется остановка event loop
+
+
+async def _loop(idx: int, writes: int, rate: float, offload: bool) -> dict:
+    from telegram import User
+
+    from app import database
+
+    user = User(id=10_000_000 + idx, first_name=f"w{idx}", is_bot=False)
+
+    def iteration(i: int) -> None:
+        database.add_subscription(1_000_000 * (idx + 1) + i, f"oly{i % 50}", f"Олимпиада {i % 50}", "p")
+        database.record_deliveries({HOT_USER: "failed"})
+        database.ensure_user(user)
+        if i % 20 == 0:
+            database.get_all_subscriptions()
+
+    lags, done = [], False
+
+    async def ticker() -> None:
+        while not done:
+            t0 = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - t0 - TICK)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0)  # таймер успевает встать в ожидание до первой записи
+    errors, latencies = 0, []
+    t_start = time.perf_counter()
+    for i in range(writes):
+        if rate:
+            delay = t_start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        t0 = time.perf_counter()
+        try:
+            if offload:
+                await asyncio.to_thread(iteration, i)
+            else:
+                iteration(i)
+        except sqlite3.OperationalError:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - t_start
+    done = True
+    await tick
+    return {"errors": errors, "latencies": latencies, "lags": lags, "elapsed": elapsed}
+
+
+def _worker(idx: int, db: str, writes: int, rate: float, mode: str, start_at: float, out) -> None:
+    from app import config, database
+
+    config.DB_FILE = db
+    if mode == "legacy":
+        @contextmanager
+        def legacy_conn():
+            conn = sqlite3.connect(db)
+            try:
+                yield conn
+                conn.commit()
+            finally:
+                conn.close()
+
+        database.db_write = legacy_conn
+        database.db_conn = legacy_conn
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+    out.put(asyncio.run(_loop(idx, writes, rate, mode == "coordinated")))
+
+
+def run(procs: int, writes: int, rate: float, mode: str, prefill: int) -> dict:
+    from app import config, database
+
+    tmp = Path(tempfile.mkdtemp(prefix="olymp-dbstress-"))
+    try:
+        db = str(tmp / "stress.db")
+        config.DB_FILE = db
+        if mode == "legacy":
+            config.DB_JOURNAL_MODE = "DELETE"
+        database.init_db()
+        if prefill:
+            conn = sqlite3.connect(db)
+            conn.executemany(
+                "INSERT INTO subscriptions (user_id, olympiad_id, olympiad_name, profile) VALUES (?,?,?,?)",
+                ((u, f"oly{u % 2000}", "", "p") for u in range(100, 100 + prefill)),
+            )
+            conn.commit()
+            conn.close()
+
+        ctx = mp.get_context("spawn")
+        out = ctx.Queue()
+        start_at = time.time() + 2.0
+        workers = [
+            ctx.Process(target=_worker, args=(i, db, writes, rate, mode, start_at, out)) for i in range(procs)
+        ]
+        for w in workers:
+            w.start()
+        results = [out.get() for _ in workers]
+        for w in workers:
+            w.join()
+
+        conn = sqlite3.connect(db)
+        subs = conn.execute("SELECT COUNT(*) FROM subscriptions").fetchone()[0]
+        row = conn.execute("SELECT consecutive_failures FROM delivery WHERE user_id=?", (HOT_USER,)).fetchone()
+        conn.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    lat = sorted(x for r in results for x in r["latencies"])
+    lags = sorted(x for r in results for x in r["lags"])
+    errors = sum(r["errors"] for r in results)
+    attempted = procs * writes
+    return {
+        "mode": mode,
+        "iterations": attempted,
+        "errors": errors,
+        "lost_subscriptions": attempted + prefill - subs,
+        "lost_counter_updates": attempted - (row[0] if row else 0),
+        "iterations_per_s": attempted / max(r["elapsed"] for r in results),
+        "p50_ms": lat[len(lat) // 2] * 1000,
+        "p99_ms": lat[int(len(lat) * 0.99)] * 1000,
+        "max_ms": lat[-1] * 1000,
+        "loop_lag_p99_ms": lags[int(len(lags) * 0.99)] * 1000,
+        "loop_lag_max_ms": lags[-1] * 1000,
+        "loop_stalled_s": sum(x for x in lags if x > TICK),
+    }
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--procs", type=int, default=6)
+    p.add_argument("--writes", type=int, default=400, help="итераций на процесс")
+    p.add_argument("--rate", type=float, default=200, help="итераций в секунду на процесс (0 — без ограничения)")
+    p.add_argument("--prefill", type=int, default=100_000, help="подписок в базе до начала (длина чтения)")
+    p.add_argument("--inline", action="store_true", help="также прогнать с записью в потоке event loop")
+    p.add_argument("--legacy", action="store_true", help="также прогнать прежний режим для сравнения")
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    modes = ["coordinated"] + ["inline"] * args.inline + ["legacy"] * args.legacy
+    results = [run(args.procs, args.writes, args.rate, mode, args.prefill) for mode in modes]
+
+    report = json.dumps(
+        {"procs": args.procs, "writes": args.writes, "rate": args.rate, "prefill": args.prefill, "results": results},
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Слияние быстрых кликов по чекбоксам (app.ui.debounced_edit).
+
+N кликов toggle_profile с интервалом --gap-ms прогоняются через настоящий хендлер
+app.handlers.subscribe на фейковом callback_query: считается число вызовов
+edit_message_text при EDIT_DEBOUNCE_MS=0 (правка на каждый клик) и с задержкой.
+Проверяется, что в сообщении в итоге последнее состояние (с задержкой — ровно одной правкой),
+и что «Готово» не перетирается отложенной правкой — ни ждущей, ни уже отправляемой
+(done_during_flush: «Готово» приходит, пока правка клавиатуры ждёт ответа API, и эта
+правка медленнее — без ожидания она применилась бы последней).
+Если проверка не прошла, скрипт завершается с ошибкой после вывода отчёта.
+
+Пример:
+    python -m bench.bench_debounce --clicks 20 --gap-ms 30 --debounce-ms 300
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from app import config, ui
+from app.constants import UD_OLYS, UD_SELECTION
+from app.handlers import subscribe
+from app.keyboards import profiles_markup
+
+from bench.synthetic import make_profiles
+
+
+class FakeMessage:
+    def __init__(self, chat_id: int, message_id: int):
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.text = ""
+        self.caption = None
+        self.reply_markup = None
+
+
+class FakeQuery:
+    """callback_query: правки применяются к общему сообщению с задержкой API."""
+
+    def __init__(self, data: str, message: FakeMessage, stats: dict, api_ms: float):
+        self.data = data
+        self.message = message
+        self._stats = stats
+        self._api = api_ms / 1000
+
+    async def answer(self, *args, **kwargs):
+        return True
+
+    async def edit_message_text(self, text, reply_markup=None):
+        self._stats["edits"] += 1
+        await asyncio.sleep(self._api)
+        self.message.text, self.message.reply_markup = text, reply_markup
+        return self.message
+
+
+async def _scenario(clicks: int, gap: float, api_ms: float, done: str, seed: int) -> dict:
+    """done: "" — без «Готово»; "now" — сразу после кликов; "in_flight" — пока отправляется правка."""
+    rnd = random.Random(seed)
+    profiles = make_profiles(12)
+    olys = [{"id": f"o{i}", "name": f"o{i}", "profiles": [p]} for i, p in enumerate(profiles)]
+    context = SimpleNamespace(user_data={UD_OLYS: olys, UD_SELECTION: []})
+    msg = FakeMessage(chat_id=1, message_id=10)
+    stats = {"edits": 0}
+
+    await subscribe.show_profiles(
+        SimpleNamespace(callback_query=FakeQuery("menu_select", msg, stats, api_ms)), context
+    )
+    stats["edits"] = 0
+
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    click_api_ms = api_ms * 3 if done == "in_flight" else api_ms
+    for _ in range(clicks):
+        q = FakeQuery(f"toggle_profile|{rnd.randrange(len(profiles))}", msg, stats, click_api_ms)
+        await subscribe.toggle_profile_cb(SimpleNamespace(callback_query=q), context)
+        await asyncio.sleep(gap)
+    if not context.user_data[UD_SELECTION]:
+        await subscribe.toggle_profile_cb(
+            SimpleNamespace(callback_query=FakeQuery("toggle_profile|0", msg, stats, click_api_ms)), context
+        )
+    in_flight = False
+    if done == "in_flight":
+        while not ui._flushing:
+            await asyncio.sleep(0.001)
+        in_flight = True
+    if done:
+        await subscribe.profiles_done_cb(SimpleNamespace(callback_query=FakeQuery("profiles_done", msg, stats, api_ms)), context)
+    await asyncio.sleep(config.EDIT_DEBOUNCE_MS / 1000 + 2 * click_api_ms / 1000 + 0.05)
+
+    expected = profiles_markup(context.user_data["profiles"], context.user_data[UD_SELECTION])
+    res = {
+        "edits": stats["edits"],
+        "final_state_shown": msg.reply_markup == expected if not done else msg.text.startswith("Профиль:"),
+        "elapsed_s": loop.time() - t0,
+    }
+    if done == "in_flight":
+        res["done_while_edit_in_flight"] = in_flight
+    return res
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--clicks", type=int, default=20)
+    p.add_argument("--gap-ms", type=float, default=30)
+    p.add_argument("--debounce-ms", type=int, default=300)
+    p.add_argument("--api-ms", type=float, default=80, help="задержка одного editMessageText")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    if args.clicks * args.gap_ms >= args.debounce_ms * ui._MAX_WAIT_FACTOR:
+        p.error("клики должны уложиться в одно окно слияния: clicks * gap-ms < debounce-ms * 4")
+
+    results = {}
+    for name, debounce, done in (
+        ("immediate", 0, ""),
+        ("debounced", args.debounce_ms, ""),
+        ("debounced_then_done", args.debounce_ms, "now"),
+        ("done_during_flush", args.debounce_ms, "in_flight"),
+    ):
+        config.EDIT_DEBOUNCE_MS = debounce
+        results[name] = asyncio.run(_scenario(args.clicks, args.gap_ms / 1000, args.api_ms, done, args.seed))
+
+    failed = [name for name, r in results.items() if not r["final_state_shown"]]
+    if results["debounced"]["edits"] != 1:
+        failed.append("debounced: правок %d вместо 1" % results["debounced"]["edits"])
+
+    report = json.dumps(
+        {"clicks": args.clicks, "gap_ms": args.gap_ms, "debounce_ms": args.debounce_ms, "results": results},
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+    if failed:
+        raise SystemExit("Проверки не прошли: " + ", ".join(failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Сквозной нагрузочный прогон: настоящий Application из main.py против bench/fake_bot_api.py.
+
+--users пользователей (не больше --concurrency одновременно) проходят сценарий
+/start → menu_select → toggle_profile ×--toggles → profiles_done → include_all (по каждому
+выбранному профилю); следующий шаг — после ответа бота на предыдущий и паузы --think-ms.
+Затем по базе из --daily-users пользователей (плюс только что подписавшиеся) выполняется
+send_daily через тот же Bot API — с его задержкой, 429 и 403.
+
+Отчёт: апдейтов в секунду, задержка ответа по шагам (от подачи апдейта до первого ответа бота:
+sendMessage или answerCallbackQuery), p99 хендлеров по метрикам (верхняя граница корзины),
+длительность ежедневной рассылки, вызовы и ошибки Bot API, число сохранённых подписок.
+По умолчанию планировщик запросов (BOT_API_RATE) выключен, чтобы мерить пропускную способность
+самого бота; --bot-api-rate включает его.
+
+Пример:
+    python -m bench.bench_e2e --users 2000 --concurrency 200 --latency-ms 20 --rate-429 0.001 --rate-403 0.02
+"""
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+from app import catalog, config, metrics, warmup
+from app.excel_data import get_profiles
+from app.reminders import send_daily
+
+from bench.fake_bot_api import FakeBotAPI
+from bench.synthetic import make_profiles, make_rows, make_subscriptions_db, rows_to_olympiads, write_workbook
+
+FLOW_USER_BASE = 10_000_000
+
+
+def _pct(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else 0.0
+
+
+async def _user_flow(api: FakeBotAPI, uid: int, n_profiles: int, args, rnd: random.Random, lat: Dict) -> int:
+    think = args.think_ms / 1000
+
+    async def step(name: str, key: tuple):
+        t0 = time.perf_counter()
+        reply = await api.wait_reply(key, timeout=args.step_timeout)
+        lat.setdefault(name, []).append(time.perf_counter() - t0)
+        if think:
+            await asyncio.sleep(think * rnd.uniform(0.5, 1.5))
+        return reply
+
+    reply = await step("/start", api.push_message(uid, "/start"))
+    if not reply:
+        return 1
+    mid = reply["message_id"]
+    await step("menu_select", api.push_callback(uid, mid, "menu_select"))
+    picked = rnd.sample(range(n_profiles), k=min(args.toggles, n_profiles))
+    for idx in picked:
+        await step("toggle_profile", api.push_callback(uid, mid, f"toggle_profile|{idx}"))
+    await step("profiles_done", api.push_callback(uid, mid, "profiles_done"))
+    for _ in picked:
+        await step("include_all", api.push_callback(uid, mid, "include_all"))
+    return 3 + 2 * len(picked)
+
+
+async def _run(args) -> Dict:
+    today = date.today()
+    tmp = Path(tempfile.mkdtemp(prefix="olymp-e2e-"))
+    api = FakeBotAPI(args.latency_ms, args.jitter_ms, args.rate_429, args.retry_after, args.rate_403, args.seed)
+    try:
+        config.EXCEL_FILE = str(tmp / "olympiads.xlsx")
+        config.DB_FILE = str(tmp / "subscriptions.db")
+        config.BOT_API_RATE = args.bot_api_rate
+        rows = make_rows(args.olympiads, make_profiles(args.profiles), today, seed=args.seed)
+        write_workbook(config.EXCEL_FILE, rows)
+        make_subscriptions_db(config.DB_FILE, rows_to_olympiads(rows), args.daily_users, 8, args.seed)
+
+        import main
+
+        url = await api.start()
+        app = main.build_app("123456:FAKE", url)
+        await app.initialize()
+        await app.start()
+        await app.post_init(app)
+        await app.updater.start_polling(poll_interval=0, timeout=1, drop_pending_updates=True)
+        while not warmup.is_ready():
+            await asyncio.sleep(0.05)
+        n_profiles = len(get_profiles(await catalog.olympiads()))
+
+        rnd = random.Random(args.seed)
+        lat: Dict[str, List[float]] = {}
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def limited(uid: int) -> int:
+            async with sem:
+                return await _user_flow(api, uid, n_profiles, args, random.Random(rnd.random()), lat)
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(
+            *(limited(FLOW_USER_BASE + i) for i in range(args.users)), return_exceptions=True
+        )
+        flows_s = time.perf_counter() - t0
+        updates = sum(r for r in results if isinstance(r, int))
+        flow_errors = sum(1 for r in results if not isinstance(r, int))
+        await asyncio.sleep(config.EDIT_DEBOUNCE_MS / 1000 * 5 + 0.2)   # отложенные правки и запись подписок
+
+        conn = sqlite3.connect(config.DB_FILE)
+        saved_users = conn.execute(
+            "SELECT COUNT(DISTINCT user_id) FROM subscriptions WHERE user_id >= ?", (FLOW_USER_BASE,)
+        ).fetchone()[0]
+        conn.close()
+
+        calls_before = dict(api.calls)
+        t0 = time.perf_counter()
+        await send_daily(SimpleNamespace(bot=app.bot, application=app))
+        daily_s = time.perf_counter() - t0
+        daily_sends = api.calls.get("sendMessage", 0) - calls_before.get("sendMessage", 0)
+
+        await app.updater.stop()
+        await app.stop()
+        await app.shutdown()
+    finally:
+        await api.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    handlers = {
+        k[0]: {"count": n, "avg_ms": s / n * 1000, "p99_ms_le": metrics.HANDLER_LATENCY.quantile(0.99, handler=k[0]) * 1000,
+               "max_ms": mx * 1000}
+        for k, n, s, mx in metrics.HANDLER_LATENCY.stats() if n
+    }
+    return {
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "api": {"latency_ms": args.latency_ms, "rate_429": args.rate_429, "rate_403": args.rate_403},
+        "flows": {
+            "updates": updates,
+            "seconds": flows_s,
+            "updates_per_s": updates / flows_s if flows_s else 0.0,
+            "failed_flows": flow_errors,
+            "users_with_saved_subscriptions": saved_users,
+        },
+        "step_latency_ms": {
+            name: {"n": len(v), "p50": _pct(v, 0.5), "p99": _pct(v, 0.99), "max": _pct(v, 1.0)}
+            for name, v in lat.items()
+        },
+        "handlers": handlers,
+        "daily": {"seconds": daily_s, "send_message_calls": daily_sends},
+        "bot_api_calls": api.calls,
+        "bot_api_errors": {str(k): v for k, v in api.errors.items()},
+    }
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--users", type=int, default=1000)
+    p.add_argument("--concurrency", type=int, default=100, help="сколько пользователей кликают одновременно")
+    p.add_argument("--toggles", type=int, default=2, help="сколько профилей выбирает пользователь")
+    p.add_argument("--think-ms", type=float, default=0, help="пауза пользователя между шагами")
+    p.add_argument("--step-timeout", type=float, default=30)
+    p.add_argument("--olympiads", type=int, default=300)
+    p.add_argument("--profiles", type=int, default=20)
+    p.add_argument("--daily-users", type=int, default=2000, help="подписчиков в базе до прогона")
+    p.add_argument("--latency-ms", type=float, default=20)
+    p.add_argument("--jitter-ms", type=float, default=5)
+    p.add_argument("--rate-429", type=float, default=0.0)
+    p.add_argument("--retry-after", type=int, default=1)
+    p.add_argument("--rate-403", type=float, default=0.0)
+    p.add_argument("--bot-api-rate", type=float, default=0, help="BOT_API_RATE бота; 0 — без планировщика")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    report = json.dumps(asyncio.run(_run(args)), ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
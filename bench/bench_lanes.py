@@ -0,0 +1,186 @@
+"""
+Задержка ответа на клик во время массовой отправки (app.ratelimit).
+
+Массовая отправка --messages сообщений идёт через delivery.send_chunks (--senders параллельных
+отправителей: напоминания и рассылка одновременно), а пользователи кликают с частотой
+--clicks-per-s; клик — один запрос без полосы, как ответ хендлера. Bot API моделируется
+в процессе: задержка --latency-ms и flood-лимит --api-limit запросов в секунду — при
+превышении Telegram отвечает 429 и не принимает запросы retry_after секунд.
+
+Режимы:
+  - none  — без планировщика: отправители упираются во flood-лимит, клики ловят RetryAfter;
+  - fifo  — общий лимит --rate, одна очередь (полосы не передаются);
+  - lanes — PriorityRateLimiter: очереди по приоритету и доля --share под ответы пользователям.
+Отчёт по режиму: длительность отправки, сообщений в секунду, p50/p99/max задержки клика, 429.
+
+Масштаб времени ускорен (лимит в сотни раз выше телеграмного), соотношения те же.
+
+Пример:
+    python -m bench.bench_lanes --messages 50000 --senders 64 --rate 2000 --api-limit 2400 --share 0.3
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from telegram.error import RetryAfter
+
+from app.delivery import send_chunks
+from app.ratelimit import PriorityRateLimiter
+
+MODES = ("none", "fifo", "lanes")
+
+
+class SimulatedAPI:
+    """Bot API в процессе: задержка ответа и flood-лимит в окне 1 с с паузой на retry_after."""
+
+    def __init__(self, latency_ms: float, limit: float, retry_after: int = 1):
+        self.latency = latency_ms / 1000
+        self.limit = limit
+        self.retry_after = retry_after
+        self._window = 0.0
+        self._count = 0
+        self._blocked_until = 0.0
+        self.calls = 0
+        self.floods = 0
+
+    async def call(self, method: str, **params):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        now = time.perf_counter()
+        if now < self._blocked_until:
+            self.floods += 1
+            raise RetryAfter(max(1, round(self._blocked_until - now)))
+        if now - self._window >= 1.0:
+            self._window, self._count = now, 0
+        self._count += 1
+        if self._count > self.limit:
+            self.floods += 1
+            self._blocked_until = now + self.retry_after
+            raise RetryAfter(self.retry_after)
+        return True
+
+
+class LimitedBot:
+    """Минимальный бот: send_message проходит через rate_limiter, как в ExtBot."""
+
+    def __init__(self, api: SimulatedAPI, limiter: Optional[PriorityRateLimiter], lanes: bool):
+        self.api = api
+        self.rate_limiter = limiter if lanes else None   # fifo: полосы не передаются
+        self._limiter = limiter
+
+    async def send_message(self, chat_id: int, text: str, rate_limit_args: Optional[str] = None):
+        data = {"chat_id": chat_id, "text": text}
+        if self._limiter is None:
+            return await self.api.call("sendMessage", **data)
+        return await self._limiter.process_request(
+            self.api.call, ("sendMessage",), data, "sendMessage", data, rate_limit_args
+        )
+
+
+def _pct(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else 0.0
+
+
+async def _run_mode(mode: str, args) -> Dict:
+    api = SimulatedAPI(args.latency_ms, args.api_limit)
+    limiter = None
+    if mode != "none":
+        limiter = PriorityRateLimiter(args.rate, args.share)
+        await limiter.initialize()
+    bot = LimitedBot(api, limiter, lanes=mode == "lanes")
+
+    per_sender = args.messages // args.senders
+    done = asyncio.Event()
+    sent = {"n": 0}
+
+    async def sender(i: int) -> None:
+        kind = "daily" if i % 2 == 0 else "broadcast"
+        for j in range(per_sender):
+            await send_chunks(bot, 1_000_000 + i * per_sender + j, ["напоминание"], kind=kind)
+            sent["n"] += 1
+
+    clicks: List[float] = []
+    click_floods = {"n": 0}
+
+    async def click(uid: int) -> None:
+        t0 = time.perf_counter()
+        while True:
+            try:
+                await bot.send_message(chat_id=uid, text="меню")
+                break
+            except RetryAfter as e:
+                click_floods["n"] += 1
+                await asyncio.sleep(e.retry_after)
+        clicks.append(time.perf_counter() - t0)
+
+    async def clicker() -> None:
+        tasks = []
+        uid = 0
+        while not done.is_set():
+            uid += 1
+            tasks.append(asyncio.create_task(click(uid)))
+            await asyncio.sleep(1 / args.clicks_per_s)
+        await asyncio.gather(*tasks)
+
+    t0 = time.perf_counter()
+    clicking = asyncio.create_task(clicker())
+    await asyncio.gather(*(sender(i) for i in range(args.senders)))
+    seconds = time.perf_counter() - t0
+    done.set()
+    await clicking
+    if limiter is not None:
+        await limiter.shutdown()
+    return {
+        "bulk_seconds": seconds,
+        "bulk_messages": sent["n"],
+        "bulk_per_s": sent["n"] / seconds if seconds else 0.0,
+        "clicks": len(clicks),
+        "click_ms": {"p50": _pct(clicks, 0.5), "p99": _pct(clicks, 0.99), "max": _pct(clicks, 1.0)},
+        "clicks_hit_429": click_floods["n"],
+        "api_429": api.floods,
+        "api_calls": api.calls,
+    }
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--messages", type=int, default=50_000)
+    p.add_argument("--senders", type=int, default=64, help="параллельных массовых отправителей")
+    p.add_argument("--rate", type=float, default=2000, help="лимит планировщика, запросов/с")
+    p.add_argument("--share", type=float, default=0.3, help="доля лимита под ответы пользователям")
+    p.add_argument("--api-limit", type=float, default=2400, help="flood-лимит Bot API, запросов/с")
+    p.add_argument("--latency-ms", type=float, default=5)
+    p.add_argument("--clicks-per-s", type=float, default=50)
+    p.add_argument("--modes", default=",".join(MODES))
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    results = {}
+    for mode in args.modes.split(","):
+        results[mode] = asyncio.run(_run_mode(mode.strip(), args))
+    report = json.dumps(
+        {
+            "messages": args.messages,
+            "senders": args.senders,
+            "rate": args.rate,
+            "share": args.share,
+            "api_limit": args.api_limit,
+            "latency_ms": args.latency_ms,
+            "modes": results,
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
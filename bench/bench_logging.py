@@ -0,0 +1,136 @@
+"""
+Накладные расходы логирования на отправку сообщения (app.logs).
+
+--messages сообщений уходят через delivery.send_chunks (FakeBot), каждое — событие message.
+Вывод логов — файл во временном каталоге; --write-delay-us добавляет задержку к каждой записи,
+как у stderr, перенаправленного в journald/docker под нагрузкой.
+
+Режимы:
+  - off     — события выключены (уровень WARNING): базовая линия;
+  - sync    — как раньше: StreamHandler на корневом логгере, запись в потоке event loop,
+              все события (LOG_SAMPLE message=1);
+  - queued  — logs.setup: QueueHandler + QueueListener, все события;
+  - sampled — logs.setup с прореживанием по умолчанию (message=0.01).
+Отчёт по режиму: время отправки и накладные расходы на сообщение против off (мкс), время
+дописывания очереди после отправки, число строк в логе и что все они — корректный JSON.
+
+Пример:
+    python -m bench.bench_logging --messages 50000 --write-delay-us 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app import config, logs
+from app.delivery import send_chunks
+
+from bench.synthetic import FakeBot
+
+MODES = ("off", "sync", "queued", "sampled")
+
+
+class SlowStream:
+    """Файл, каждая запись в который ждёт delay секунд (блокирующий ввод-вывод, GIL отпущен)."""
+
+    def __init__(self, path: Path, delay: float):
+        self.f = open(path, "w", encoding="utf-8")
+        self.delay = delay
+
+    def write(self, s: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return self.f.write(s)
+
+    def flush(self) -> None:
+        self.f.flush()
+
+    def close(self) -> None:
+        self.f.close()
+
+
+async def _send(n: int) -> float:
+    bot = FakeBot()
+    t0 = time.perf_counter()
+    for uid in range(n):
+        await send_chunks(bot, 100000 + uid, ["текст напоминания"], kind="daily")
+    return time.perf_counter() - t0
+
+
+def _run(mode: str, n: int, path: Path, delay: float) -> dict:
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    stream = SlowStream(path, delay)
+    config.LOG_LEVEL = "WARNING" if mode == "off" else "INFO"
+    config.LOG_SAMPLE = {"message": 0.01} if mode == "sampled" else {"message": 1.0}
+    if mode == "sync":
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logs.JsonFormatter())
+        root.addHandler(handler)
+        root.setLevel(config.LOG_LEVEL)
+    else:
+        logs.setup(stream)
+
+    send_s = asyncio.run(_send(n))
+    t0 = time.perf_counter()
+    logs.stop()
+    drain_s = time.perf_counter() - t0
+    stream.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    valid = True
+    for line in lines:
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            valid = False
+            break
+        if rec.get("event") != "message" or rec.get("outcome") != "sent":
+            valid = False
+            break
+    return {"send_seconds": send_s, "drain_seconds": drain_s, "lines": len(lines), "valid_json": valid}
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--messages", type=int, default=50_000)
+    p.add_argument("--write-delay-us", type=float, default=20.0, help="задержка одной записи в лог, мкс")
+    p.add_argument("--modes", default=",".join(MODES))
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    tmp = Path(tempfile.mkdtemp(prefix="olymp-logging-"))
+    config.LOG_FORMAT = "json"
+    results = {}
+    try:
+        modes = [m for m in MODES if m in args.modes.split(",")]
+        if "off" not in modes:
+            modes.insert(0, "off")
+        for mode in modes:
+            results[mode] = _run(mode, args.messages, tmp / f"{mode}.log", args.write_delay_us / 1e6)
+    finally:
+        logging.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    base = results["off"]["send_seconds"]
+    for r in results.values():
+        r["overhead_us_per_message"] = (r["send_seconds"] - base) / args.messages * 1e6
+    report = json.dumps(
+        {"messages": args.messages, "write_delay_us": args.write_delay_us, "modes": results},
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Кэш планов напоминаний (app.plans) для /testnotify и /preview.
+
+Замеряется время ответа на пользователя:
+  - direct    — как /testnotify раньше: подписки из базы + user_digest на каждый запрос;
+  - plan_cold — первое обращение к плану (подписки из базы, дайджест в кэш);
+  - plan_hot  — повторное обращение;
+  - preview   — неделя вперёд (/preview) при прогретом кэше;
+  - после send_daily — планы на сегодня уже в кэше, к базе не обращаемся.
+Проверяется, что план совпадает с user_digest, что добавление подписки (в том числе другим
+процессом) и перечитывание каталога сбрасывают кэш, что планы на прошедшие дни удаляются со
+сменой дня и что после send_daily база не читается.
+
+Пример:
+    python -m bench.bench_plans --users 20000 --sample 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app import catalog, config, database, plans
+from app.reminders import send_daily, user_digest
+
+from bench.synthetic import (
+    FakeBot,
+    FakeContext,
+    make_profiles,
+    make_rows,
+    make_subscriptions_db,
+    rows_to_olympiads,
+    write_workbook,
+)
+
+
+def _per_user(fn, uids) -> float:
+    """Среднее время на пользователя, мкс."""
+    t0 = time.perf_counter()
+    for uid in uids:
+        fn(uid)
+    return (time.perf_counter() - t0) / len(uids) * 1e6
+
+
+async def _previews(uids, start) -> float:
+    t0 = time.perf_counter()
+    for uid in uids:
+        await plans.preview(uid, start, plans.PREVIEW_DAYS)
+    return (time.perf_counter() - t0) / len(uids) * 1e6
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--olympiads", type=int, default=1000)
+    p.add_argument("--profiles", type=int, default=30)
+    p.add_argument("--users", type=int, default=20_000)
+    p.add_argument("--subs-per-user", type=int, default=8)
+    p.add_argument("--sample", type=int, default=2000, help="сколько пользователей опрашивать")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    today = datetime.now(config.TIMEZONE).date()
+    rnd = random.Random(args.seed)
+    tmp = Path(tempfile.mkdtemp(prefix="olymp-plans-"))
+    reads = {"n": 0}
+    pairs = database.get_user_subscription_pairs
+
+    def counted(uid):
+        reads["n"] += 1
+        return pairs(uid)
+
+    try:
+        config.EXCEL_FILE = str(tmp / "olympiads.xlsx")
+        config.DB_FILE = str(tmp / "subscriptions.db")
+        config.SEND_EMPTY_INFO = False
+        rows = make_rows(args.olympiads, make_profiles(args.profiles), today, seed=args.seed)
+        write_workbook(config.EXCEL_FILE, rows)
+        make_subscriptions_db(config.DB_FILE, rows_to_olympiads(rows), args.users, args.subs_per_user, args.seed)
+        database.init_db()
+        database.get_user_subscription_pairs = counted
+
+        lookup = catalog.get_lookup()
+        uids = rnd.sample(range(100000, 100000 + args.users), min(args.sample, args.users))
+
+        direct = _per_user(lambda u: user_digest(catalog.get_lookup(), pairs(u), today), uids)
+        plan_cold = _per_user(lambda u: plans.user_plan(lookup, u, today), uids)
+        plan_hot = _per_user(lambda u: plans.user_plan(lookup, u, today), uids)
+        tomorrow = today + timedelta(days=1)
+        asyncio.run(_previews(uids, tomorrow))
+        preview_hot = asyncio.run(_previews(uids, tomorrow))
+
+        same = all(plans.user_plan(lookup, u, today) == user_digest(lookup, pairs(u), today) for u in uids)
+
+        # Новая подписка сбрасывает план пользователя
+        uid = uids[0]
+        olys = rows_to_olympiads(rows)
+        o = next((o for o in olys if o["date_desc"].startswith(f"{today:%d.%m}")), olys[0])
+        database.add_subscription(uid, o["id"], o["name"], o["profiles"][0])
+        invalidated_on_subscribe = plans.user_plan(lookup, uid, today) == user_digest(lookup, pairs(uid), today)
+
+        # Подписка, добавленная другим процессом (прямой INSERT в файл базы)
+        other_uid = uids[1]
+        before_external = plans.user_items(other_uid)
+        other = sqlite3.connect(config.DB_FILE)
+        other.execute(
+            "INSERT OR IGNORE INTO subscriptions (user_id, olympiad_id, olympiad_name, profile) VALUES (?,?,?,?)",
+            (other_uid, o["id"], o["name"], o["profiles"][0]),
+        )
+        other.commit()
+        other.close()
+        invalidated_on_external_write = (
+            (o["id"], o["profiles"][0]) in plans.user_items(other_uid)
+            and (o["id"], o["profiles"][0]) not in before_external
+            and plans.user_plan(lookup, other_uid, today) == user_digest(lookup, pairs(other_uid), today)
+        )
+
+        # Планы на прошедшие дни удаляются со сменой дня
+        yesterday = today - timedelta(days=1)
+        for u in uids:
+            plans.remember(lookup, u, yesterday, ([], []), database.subscriptions_version(u))
+        plans._today = None
+        plans.user_plan(lookup, uid, today)
+        past_days_evicted = not any(day < today for _, day in plans._plans)
+
+        # После send_daily планы на сегодня берутся из кэша без чтения базы
+        plans._scope = None
+        asyncio.run(send_daily(FakeContext(FakeBot())))
+        reads["n"] = 0
+        after_daily = _per_user(lambda u: plans.user_plan(lookup, u, today), uids)
+        db_reads_after_daily = reads["n"]
+
+        # Перечитывание каталога: новые даты попадают в план
+        time.sleep(0.01)
+        for r in rows:
+            r[5] = f"{today:%d.%m.%Y}/перенесено"
+        write_workbook(config.EXCEL_FILE, rows)
+        os.utime(config.EXCEL_FILE)
+        new_lookup = catalog.get_lookup()
+        plan = plans.user_plan(new_lookup, uid, today)
+        invalidated_on_reload = plan == user_digest(new_lookup, pairs(uid), today) and "перенесено" in plan[0][1]
+    finally:
+        database.get_user_subscription_pairs = pairs
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = json.dumps(
+        {
+            "users": args.users,
+            "sample": len(uids),
+            "per_user_us": {
+                "direct": direct,
+                "plan_cold": plan_cold,
+                "plan_hot": plan_hot,
+                "after_send_daily": after_daily,
+                "preview_week_hot": preview_hot,
+            },
+            "speedup_hot": direct / plan_hot,
+            "same_as_user_digest": same,
+            "invalidated_on_subscribe": invalidated_on_subscribe,
+            "invalidated_on_external_write": invalidated_on_external_write,
+            "past_days_evicted": past_days_evicted,
+            "db_reads_after_send_daily": db_reads_after_daily,
+            "invalidated_on_catalog_reload": invalidated_on_reload,
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
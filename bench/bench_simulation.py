@@ -0,0 +1,92 @@
+"""
+Симуляция рассылки (app.simulation) на год вперёд для всей базы подписчиков.
+
+С --check результат сначала сверяется с прямым прогоном build_user_reminders
+по каждому пользователю и дню на небольшой выборке.
+
+Пример:
+    python -m bench.bench_simulation --users 100000 --days 365
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+from app import config, simulation
+from app.excel_data import build_lookup
+from app.reminders import build_user_reminders
+
+from bench.synthetic import make_profiles, make_rows, make_subscriptions, rows_to_olympiads
+
+
+def check(lookup, subs, start: date, days: int) -> int:
+    """Сверка с build_user_reminders; возвращает число проверенных пар (пользователь, день)."""
+    res = simulation.simulate(lookup, subs, start, days, send_empty=False)
+    by_user = {}
+    for uid, oid, prof in subs:
+        by_user.setdefault(uid, []).append((oid, prof))
+    for day, messages, lines in res["per_day"]:
+        got = [len(build_user_reminders(lookup, items, day)) - 1 for items in by_user.values()]
+        expected = (sum(1 for n in got if n), sum(got))
+        if (messages, lines) != expected:
+            raise AssertionError(f"{day}: симуляция {(messages, lines)}, прямой прогон {expected}")
+    return len(by_user) * days
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--olympiads", type=int, default=2000)
+    p.add_argument("--profiles", type=int, default=40)
+    p.add_argument("--users", type=int, default=100_000)
+    p.add_argument("--subs-per-user", type=int, default=8)
+    p.add_argument("--days", type=int, default=365)
+    p.add_argument("--mode", choices=["MILESTONES", "WINDOW"])
+    p.add_argument("--check", action="store_true", help="сверить с прямым прогоном на 500 пользователях × 60 дней")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    if args.mode:
+        config.REMIND_MODE = args.mode
+    start = date.today()
+    olys = rows_to_olympiads(make_rows(args.olympiads, make_profiles(args.profiles), start, seed=args.seed))
+    lookup = build_lookup(olys)
+    subs = [(uid, oid, prof) for uid, oid, _, prof in make_subscriptions(olys, args.users, args.subs_per_user, args.seed)]
+
+    checked = 0
+    if args.check:
+        sample = [s for s in subs if s[0] < 100000 + 500]
+        checked = check(lookup, sample, start, 60)
+
+    t0 = time.perf_counter()
+    res = simulation.simulate(lookup, subs, start, args.days, send_empty=False)
+    elapsed = time.perf_counter() - t0
+
+    report = json.dumps(
+        {
+            "users": res["users"],
+            "subscriptions": len(subs),
+            "days": args.days,
+            "mode": config.REMIND_MODE,
+            "checked_user_days": checked,
+            "simulate_s": elapsed,
+            "messages": res["messages"],
+            "lines": res["lines"],
+            "peak_day": res["peak_day"].isoformat() if res["peak_day"] else None,
+            "peak_messages": res["peak_messages"],
+            "user_max_messages": res["user_max_messages"],
+            "user_avg_messages": res["user_avg_messages"],
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Источники каталога: время чтения и пиковая память процесса для каждого бэкенда.
+
+Каждый замер — в отдельном интерпретаторе, чтобы RSS не смешивался между бэкендами.
+«pandas» — прежний путь (pd.read_excel) на том же .xlsx.
+
+Пример:
+    python -m bench.bench_sources --olympiads 2000
+"""
+import argparse
+import csv
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from app import config
+
+from bench.synthetic import HEADERS, make_profiles, make_rows, write_workbook
+
+_PROBE = """
+import resource, sys, time
+from app import config, excel_data
+if {force_pandas!r}:
+    excel_data.register_source([".xlsx"], excel_data._read_pandas)
+config.EXCEL_FILE = {path!r}
+t0 = time.perf_counter()
+olys = excel_data.fetch_olympiads()
+print(time.perf_counter() - t0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, len(olys))
+"""
+
+
+def _measure(path: str, force_pandas: bool = False) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(path=path, force_pandas=force_pandas)],
+        cwd=config.BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return {"load_s": float(out[0]), "max_rss_mb": int(out[1]) / 1024, "olympiads": int(out[2])}
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--olympiads", type=int, default=2000)
+    p.add_argument("--profiles", type=int, default=40)
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    tmp = Path(tempfile.mkdtemp(prefix="olymp-sources-"))
+    try:
+        rows = make_rows(args.olympiads, make_profiles(args.profiles), date.today())
+        write_workbook(str(tmp / "o.xlsx"), rows)
+        with open(tmp / "o.csv", "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f, delimiter=";")
+            w.writerow(HEADERS)
+            w.writerows(rows)
+        with open(tmp / "o.json", "w", encoding="utf-8") as f:
+            json.dump([dict(zip(HEADERS, r)) for r in rows], f, ensure_ascii=False)
+
+        results = {
+            "pandas": _measure(str(tmp / "o.xlsx"), force_pandas=True),
+            "xlsx": _measure(str(tmp / "o.xlsx")),
+            "csv": _measure(str(tmp / "o.csv")),
+            "json": _measure(str(tmp / "o.json")),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = json.dumps({"olympiads": args.olympiads, "results": results}, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
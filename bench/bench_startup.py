@@ -0,0 +1,81 @@
+"""
+Стоимость старта: импорт main.py по данным `python -X importtime`.
+
+Запускает интерпретатор заново --repeat раз, берёт лучший результат и печатает JSON:
+суммарное время импорта, самые дорогие модули верхнего уровня и признак того,
+что тяжёлые зависимости (pandas, openpyxl) на старте не загружаются.
+
+Пример:
+    python -m bench.bench_startup --repeat 5
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from app import config
+
+HEAVY = ("pandas", "numpy", "openpyxl")
+
+_PROBE = "import sys, main; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+
+
+def _parse_importtime(stderr: str) -> Tuple[int, List[Tuple[str, int]]]:
+    """Возвращает (суммарное self-время, [(модуль, импортированный из main напрямую, cumulative мкс)])."""
+    total, top = 0, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = _split(line)
+        total += self_us
+        if name.startswith("  ") and not name.startswith("   "):
+            top.append((name.strip(), cum_us))
+    return total, top
+
+
+def _split(line: str) -> Tuple[int, int, str]:
+    """'import time:   self |   cumulative |   name' -> (self, cumulative, имя с отступом вложенности)."""
+    self_part, cum_part, name = line.split("|", 2)
+    return int(self_part.split(":")[-1]), int(cum_part), name[1:]
+
+
+def measure() -> Dict:
+    code = _PROBE.format(heavy=HEAVY)
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=config.BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - t0
+    total_us, top = _parse_importtime(proc.stderr)
+    top.sort(key=lambda x: -x[1])
+    return {
+        "wall_s": wall,
+        "import_s": total_us / 1e6,
+        "heavy_loaded": [m for m in proc.stdout.strip().split(",") if m],
+        "top_modules": [{"module": n, "cumulative_ms": us / 1000} for n, us in top[:15]],
+    }
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    best = min((measure() for _ in range(args.repeat)), key=lambda r: r["import_s"])
+    report = json.dumps(best, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Индекс подписок в памяти (app.subindex) против запросов к SQLite.
+
+Замеряются чтения горячих путей с индексом и без (SUBSCRIPTION_INDEX=false): подписки
+пользователя («Мои подписки», меню удаления), его профили, пары для напоминаний, все подписки
+по пользователям (ежедневная рассылка), подписчики ключей; построение индекса и его размер.
+Проверяется, что ответы совпадают с SQL, что индекс обновляется при записи бота, догоняет
+запись другого процесса (прямой INSERT в файл базы) по журналу без перестроения и сходится с
+базой после архивации и восстановления. Для крупной чужой записи (больше, чем индекс применяет
+по журналу) замеряется первое чтение после неё: индекс перестраивается в фоне, чтение не ждёт
+перестроения и идёт в SQLite.
+
+Пример:
+    python -m bench.bench_subindex --users 100000 --sample 5000
+"""
+import argparse
+import json
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+from app import config, database
+from app.subindex import SubscriptionIndex
+
+from bench.synthetic import make_profiles, make_rows, make_subscriptions_db, rows_to_olympiads
+
+
+def _per_call(fn, args) -> float:
+    """Среднее время вызова, мкс."""
+    t0 = time.perf_counter()
+    for a in args:
+        fn(a)
+    return (time.perf_counter() - t0) / len(args) * 1e6
+
+
+def _best(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _sql(fn, *args):
+    config.SUBSCRIPTION_INDEX = False
+    try:
+        return fn(*args)
+    finally:
+        config.SUBSCRIPTION_INDEX = True
+
+
+def _wait_index() -> float:
+    """Ждёт, пока фоновое перестроение индекса закончится; сколько ждали, с."""
+    t0 = time.perf_counter()
+    database.get_subscribed_keys()          # запускает перестроение, если индекс сброшен
+    while database._index is None or database._rebuilding:
+        time.sleep(0.01)
+    return time.perf_counter() - t0
+
+
+def _same(uids, keys) -> bool:
+    """Ответы индекса совпадают с SQL (порядок — как у запросов по индексу UNIQUE)."""
+    for uid in uids:
+        if database.get_user_subscriptions(uid) != sorted(_sql(database.get_user_subscriptions, uid)):
+            return False
+        if sorted(database.get_user_profiles(uid)) != sorted(_sql(database.get_user_profiles, uid)):
+            return False
+    if sorted(database.get_all_subscriptions()) != sorted(_sql(database.get_all_subscriptions)):
+        return False
+    if database.get_subscribed_keys() != _sql(database.get_subscribed_keys):
+        return False
+    idx = database.get_key_subscribers(keys)
+    sql = _sql(database.get_key_subscribers, keys)
+    return {u: sorted(k) for u, k in idx.items()} == {u: sorted(k) for u, k in sql.items()}
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--olympiads", type=int, default=2000)
+    p.add_argument("--profiles", type=int, default=40)
+    p.add_argument("--users", type=int, default=100_000)
+    p.add_argument("--subs-per-user", type=int, default=8)
+    p.add_argument("--sample", type=int, default=5000, help="сколько пользователей опрашивать")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out")
+    args = p.parse_args(argv)
+
+    rnd = random.Random(args.seed)
+    tmp = Path(tempfile.mkdtemp(prefix="olymp-subindex-"))
+    try:
+        config.DB_FILE = str(tmp / "subscriptions.db")
+        config.SUBSCRIPTION_INDEX = True
+        olys = rows_to_olympiads(make_rows(args.olympiads, make_profiles(args.profiles), date.today(), seed=args.seed))
+        make_subscriptions_db(config.DB_FILE, olys, args.users, args.subs_per_user, args.seed)
+        database.init_db()
+        uids = rnd.sample(range(100000, 100000 + args.users), min(args.sample, args.users))
+
+        t0 = time.perf_counter()
+        database.load_subscription_index()
+        build_s = time.perf_counter() - t0
+        tracemalloc.start()
+        conn = sqlite3.connect(config.DB_FILE)
+        rows = conn.execute("SELECT user_id, olympiad_id, olympiad_name, profile FROM subscriptions").fetchall()
+        conn.close()
+        before = tracemalloc.get_traced_memory()[0]
+        probe = SubscriptionIndex.build(rows)
+        index_mb = (tracemalloc.get_traced_memory()[0] - before) / 1024 / 1024
+        tracemalloc.stop()
+        del rows, probe
+
+        keys = sorted(database.get_subscribed_keys())[:20]
+        reads = {}
+        for name, fn, arg in (
+            ("get_user_subscriptions", database.get_user_subscriptions, uids),
+            ("get_user_profiles", database.get_user_profiles, uids),
+            ("get_user_subscription_pairs", database.get_user_subscription_pairs, uids),
+            ("get_key_subscribers_20_keys", database.get_key_subscribers, [keys] * 50),
+        ):
+            sql_us = _per_call(lambda a: _sql(fn, a), arg)
+            idx_us = _per_call(fn, arg)
+            reads[name] = {"sql_us": sql_us, "index_us": idx_us, "speedup": sql_us / idx_us}
+        sql_s = _best(lambda: _sql(database.get_subscriptions_by_user))
+        idx_s = _best(database.get_subscriptions_by_user)
+        reads["get_subscriptions_by_user"] = {"sql_s": sql_s, "index_s": idx_s, "speedup": sql_s / idx_s}
+
+        same = _same(uids[:500], keys)
+
+        # Запись бота — сразу в индексе, без перестроения
+        uid = uids[0]
+        o = olys[0]
+        database.add_subscriptions(uid, [(o, prof) for prof in o["profiles"]])
+        database.remove_subscriptions_by_profile(uid, database.get_user_profiles(uid)[-1])
+        index_after_writes = database._index
+        write_through = database.get_user_subscriptions(uid) == sorted(_sql(database.get_user_subscriptions, uid))
+        no_rebuild_on_own_writes = database._index is index_after_writes
+
+        # Запись другого процесса — индекс замечает её по счётчику изменений
+        other = sqlite3.connect(config.DB_FILE)
+        other.execute(
+            "INSERT INTO subscriptions (user_id, olympiad_id, olympiad_name, profile) VALUES (?,?,?,?)",
+            (999_999_999, o["id"], o["name"], o["profiles"][0]),
+        )
+        other.commit()
+        other.close()
+        sees_external_write = database.get_user_profiles(999_999_999) == [o["profiles"][0]]
+        external_without_rebuild = database._index is index_after_writes
+
+        # Крупная чужая запись: первое чтение не ждёт перестроения индекса
+        other = sqlite3.connect(config.DB_FILE)
+        other.executemany(
+            "INSERT INTO subscriptions (user_id, olympiad_id, olympiad_name, profile) VALUES (?,?,?,?)",
+            [(900_000_000 + i, o["id"], o["name"], o["profiles"][0]) for i in range(database._LOG_APPLY_MAX * 2)],
+        )
+        other.commit()
+        other.close()
+        t0 = time.perf_counter()
+        bulk_answer = database.get_user_profiles(900_000_000)
+        first_read_ms = (time.perf_counter() - t0) * 1000
+        served_during_rebuild = database._index is None and bulk_answer == [o["profiles"][0]]
+        rebuild_s = _wait_index()
+        after_bulk = _same(uids[:200], keys) and database.get_user_profiles(900_000_001) == [o["profiles"][0]]
+
+        # Архивация и восстановление
+        database.archive_subscriptions(keys)
+        after_archive = database.get_subscribed_keys() == _sql(database.get_subscribed_keys)
+        database.restore_subscriptions(keys)
+        _wait_index()
+        after_restore = _same(uids[:200], keys)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = json.dumps(
+        {
+            "users": args.users,
+            "subscriptions": database._index.size if database._index else None,
+            "index_build_s": build_s,
+            "index_mb": index_mb,
+            "reads": reads,
+            "same_as_sql": same,
+            "write_through": write_through,
+            "no_rebuild_on_own_writes": no_rebuild_on_own_writes,
+            "sees_external_write": sees_external_write,
+            "external_write_without_rebuild": external_without_rebuild,
+            "external_bulk_write": {
+                "rows": database._LOG_APPLY_MAX * 2,
+                "first_read_ms": first_read_ms,
+                "served_from_sql_during_rebuild": served_during_rebuild,
+                "rebuild_s": rebuild_s,
+                "consistent_after_rebuild": after_bulk,
+            },
+            "consistent_after_archive": after_archive,
+            "consistent_after_restore": after_restore,
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Локальная замена Telegram Bot API для нагрузочных прогонов.
+
+HTTP/1.1 сервер на asyncio (keep-alive, как у httpx в python-telegram-bot) понимает методы,
+которые вызывает бот: getMe, getUpdates (long polling), deleteWebhook, sendMessage,
+editMessageText, editMessageReplyMarkup, answerCallbackQuery, deleteMessage. Ответы
+задерживаются на latency_ms ± jitter_ms; с заданной вероятностью отвечает 429 (RetryAfter)
+на любой метод и 403 (бот заблокирован) на sendMessage.
+
+Апдейты в бота подаются через push_message / push_callback, а ответ бота на апдейт можно дождаться
+через wait_reply (первый sendMessage в чат / answerCallbackQuery на данный колбэк).
+
+Отдельно (бот из main.py с TELEGRAM_API_URL=http://127.0.0.1:8081):
+    python -m bench.fake_bot_api --port 8081 --latency-ms 30 --rate-429 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_olymp_bot",
+            "can_join_groups": False, "can_read_all_group_messages": False, "supports_inline_queries": False}
+
+# Параметры, которые бот передаёт строкой как есть (остальные — JSON)
+_RAW_PARAMS = {"text", "callback_query_id", "caption"}
+
+
+class FakeBotAPI:
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_429: float = 0.0,
+        retry_after: int = 1,
+        rate_403: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.rate_403 = rate_403
+        self._rnd = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._conns: set = set()
+        self.port = 0
+
+        self._updates: List[Dict] = []
+        self._update_id = 0
+        self._has_updates = asyncio.Event()
+        self._message_id = 1000
+        self.messages: Dict[Tuple[int, int], Dict] = {}   # (chat_id, message_id) -> сообщение бота
+        self._waiters: Dict[tuple, asyncio.Future] = {}
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[int, int] = {}
+
+    # --- сервер ---
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{self.port}"
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            for task in list(self._conns):
+                task.cancel()
+            await asyncio.gather(*self._conns, return_exceptions=True)
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._conns.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+                path = request_line.decode("latin-1").split()[1]
+                status, payload = await self._dispatch(path, headers.get("content-type", ""), body)
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._conns.discard(task)
+            writer.close()
+
+    @staticmethod
+    def _params(content_type: str, body: bytes) -> Dict:
+        if not body:
+            return {}
+        if content_type.startswith("application/json"):
+            return json.loads(body)
+        out = {}
+        for k, v in parse_qsl(body.decode(), keep_blank_values=True):
+            if k in _RAW_PARAMS:
+                out[k] = v
+                continue
+            try:
+                out[k] = json.loads(v)
+            except ValueError:
+                out[k] = v
+        return out
+
+    async def _dispatch(self, path: str, content_type: str, body: bytes) -> Tuple[str, Dict]:
+        method = path.rstrip("/").rsplit("/", 1)[-1]
+        params = self._params(content_type, body)
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if method == "getUpdates":
+            return "200 OK", {"ok": True, "result": await self._get_updates(params)}
+
+        delay = self.latency + (self._rnd.uniform(-self.jitter, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.rate_429 and self._rnd.random() < self.rate_429:
+            return self._error(429, f"Too Many Requests: retry after {self.retry_after}",
+                               {"retry_after": self.retry_after})
+        if method == "sendMessage" and self.rate_403 and self._rnd.random() < self.rate_403:
+            self._resolve(("chat", int(params.get("chat_id", 0))))
+            return self._error(403, "Forbidden: bot was blocked by the user")
+
+        handler = getattr(self, "_m_" + method, None)
+        result = handler(params) if handler else True
+        return "200 OK", {"ok": True, "result": result}
+
+    def _error(self, code: int, description: str, parameters: Optional[Dict] = None) -> Tuple[str, Dict]:
+        self.errors[code] = self.errors.get(code, 0) + 1
+        payload = {"ok": False, "error_code": code, "description": description}
+        if parameters:
+            payload["parameters"] = parameters
+        return f"{code} Error", payload
+
+    # --- методы Bot API ---
+
+    async def _get_updates(self, params: Dict) -> List[Dict]:
+        offset = int(params.get("offset") or 0)
+        if offset:
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates:
+            self._has_updates.clear()
+            try:
+                await asyncio.wait_for(self._has_updates.wait(), timeout=float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[: int(params.get("limit") or 100)]
+
+    def _m_getMe(self, params: Dict) -> Dict:
+        return BOT_USER
+
+    def _store(self, chat_id: int, message_id: int, params: Dict) -> Dict:
+        msg = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text", ""),
+        }
+        if params.get("reply_markup"):
+            msg["reply_markup"] = params["reply_markup"]
+        self.messages[(chat_id, message_id)] = msg
+        return msg
+
+    def _m_sendMessage(self, params: Dict) -> Dict:
+        chat_id = int(params["chat_id"])
+        self._message_id += 1
+        msg = self._store(chat_id, self._message_id, params)
+        self._resolve(("chat", chat_id), msg)
+        return msg
+
+    def _m_editMessageText(self, params: Dict) -> Dict:
+        return self._store(int(params["chat_id"]), int(params["message_id"]), params)
+
+    def _m_editMessageReplyMarkup(self, params: Dict) -> Dict:
+        key = (int(params["chat_id"]), int(params["message_id"]))
+        msg = dict(self.messages.get(key) or self._store(*key, {}))
+        msg["reply_markup"] = params.get("reply_markup")
+        self.messages[key] = msg
+        return msg
+
+    def _m_answerCallbackQuery(self, params: Dict) -> bool:
+        self._resolve(("callback", str(params.get("callback_query_id"))))
+        return True
+
+    def _m_deleteMessage(self, params: Dict) -> bool:
+        self.messages.pop((int(params["chat_id"]), int(params["message_id"])), None)
+        return True
+
+    # --- подача апдейтов ---
+
+    def _push(self, update: Dict) -> int:
+        self._update_id += 1
+        update["update_id"] = self._update_id
+        self._updates.append(update)
+        self._has_updates.set()
+        return self._update_id
+
+    @staticmethod
+    def _user(user_id: int) -> Dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+    def push_message(self, user_id: int, text: str) -> tuple:
+        """Сообщение пользователя боту; возвращает ключ для wait_reply."""
+        msg = {
+            "message_id": self._update_id + 1,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private", "first_name": f"user{user_id}"},
+            "from": self._user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            msg["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        key = ("chat", user_id)
+        self._waiters[key] = asyncio.get_running_loop().create_future()
+        self._push({"message": msg})
+        return key
+
+    def push_callback(self, user_id: int, message_id: int, data: str) -> tuple:
+        """Нажатие инлайн-кнопки под сообщением бота message_id; возвращает ключ для wait_reply."""
+        msg = self.messages.get((user_id, message_id)) or self._store(user_id, message_id, {})
+        cq_id = f"{user_id}-{self._update_id + 1}"
+        key = ("callback", cq_id)
+        self._waiters[key] = asyncio.get_running_loop().create_future()
+        self._push({"callback_query": {
+            "id": cq_id, "from": self._user(user_id), "chat_instance": str(user_id), "data": data, "message": msg,
+        }})
+        return key
+
+    def _resolve(self, key: tuple, value=None) -> None:
+        fut = self._waiters.pop(key, None)
+        if fut is not None and not fut.done():
+            fut.set_result(value)
+
+    async def wait_reply(self, key: tuple, timeout: float = 30.0):
+        """Ждёт первого ответа бота на апдейт (sendMessage в чат или answerCallbackQuery)."""
+        fut = self._waiters.get(key)
+        if fut is None:
+            return None
+        return await asyncio.wait_for(fut, timeout)
+
+
+async def _serve(args) -> None:
+    api = FakeBotAPI(args.latency_ms, args.jitter_ms, args.rate_429, args.retry_after, args.rate_403, args.seed)
+    url = await api.start(args.host, args.port)
+    print(f"Fake Bot API: {url} (TELEGRAM_API_URL={url})", flush=True)
+    await asyncio.Event().wait()
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8081)
+    p.add_argument("--latency-ms", type=float, default=30)
+    p.add_argument("--jitter-ms", type=float, default=10)
+    p.add_argument("--rate-429", type=float, default=0.0, help="доля ответов 429 (RetryAfter)")
+    p.add_argument("--retry-after", type=int, default=1)
+    p.add_argument("--rate-403", type=float, default=0.0, help="доля sendMessage с ответом 403 (бот заблокирован)")
+    p.add_argument("--seed", type=int, default=0)
+    try:
+        asyncio.run(_serve(p.parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Замер горячих путей: fetch_olympiads, build_lookup, parse_dates_from_cell,
+build_user_reminders (с прогретым и холодным кэшем строк дня), chunk_messages и полный send_daily на фейковом боте.
+
+Пример:
+    python -m bench.run --olympiads 2000 --profiles 40 --users 20000 --out bench.json
+
+Результат — JSON (stdout или --out), чтобы сравнивать прогоны между коммитами.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict
+
+from app import config
+
+from bench.synthetic import FakeBot, FakeContext, make_profiles, make_rows, make_subscriptions_db, write_workbook
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=config.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def timeit(fn: Callable[[], object], repeat: int) -> Dict:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return {
+        "runs": repeat,
+        "min_s": min(runs),
+        "median_s": statistics.median(runs),
+        "max_s": max(runs),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict:
+    tmp = Path(tempfile.mkdtemp(prefix="olymp-bench-"))
+    try:
+        return _run(args, tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _run(args: argparse.Namespace, tmp: Path) -> Dict:
+    from app import database
+    from app.dates import parse_dates_from_cell
+    from app.excel_data import build_lookup, fetch_olympiads
+    from app import reminders
+    from app.reminders import build_user_reminders, send_daily, user_digest
+    from app.ui import chunk_messages
+
+    today = datetime.now(config.TIMEZONE).date()
+    xlsx = tmp / "olympiads.xlsx"
+    db = tmp / "subscriptions.db"
+
+    rows = make_rows(args.olympiads, make_profiles(args.profiles), today, seed=args.seed)
+    write_workbook(str(xlsx), rows)
+    config.EXCEL_FILE = str(xlsx)
+    config.DB_FILE = str(db)
+    if args.mode:
+        config.REMIND_MODE = args.mode.upper()
+
+    olys = fetch_olympiads()
+    make_subscriptions_db(str(db), olys, args.users, subs_per_user=args.subs_per_user, seed=args.seed)
+    lookup = build_lookup(olys)
+    cells = [o["date_desc"] for o in olys]
+
+    subs = database.get_all_subscriptions()
+    by_user: Dict[int, list] = {}
+    for uid, oid, prof in subs:
+        by_user.setdefault(uid, []).append((oid, prof))
+    user_items = list(by_user.values())
+
+    all_lines = [user_digest(lookup, items, today) for items in user_items]
+
+    def parse_all():
+        for c in cells:
+            parse_dates_from_cell(c, today)
+
+    def reminders_all():
+        for items in user_items:
+            build_user_reminders(lookup, items, today)
+
+    def reminders_cold():
+        reminders._scope = None  # первый прогон дня: строки рендерятся заново
+        reminders_all()
+
+    def chunk_all():
+        for lines, lengths in all_lines:
+            chunk_messages(lines, lengths=lengths)
+
+    bot = FakeBot()
+
+    def daily():
+        asyncio.run(send_daily(FakeContext(bot)))
+
+    results = {
+        "fetch_olympiads": timeit(fetch_olympiads, args.repeat),
+        "build_lookup": timeit(lambda: build_lookup(olys), args.repeat),
+        "parse_dates_from_cell": timeit(parse_all, args.repeat),
+        "build_user_reminders": timeit(reminders_all, args.repeat),
+        "build_user_reminders_cold": timeit(reminders_cold, args.repeat),
+        "chunk_messages": timeit(chunk_all, args.repeat),
+        "send_daily": timeit(daily, args.repeat),
+    }
+    results["parse_dates_from_cell"]["n"] = len(cells)
+    results["build_user_reminders"]["n"] = len(user_items)
+    results["build_user_reminders_cold"]["n"] = len(user_items)
+    results["chunk_messages"]["n"] = len(all_lines)
+    results["send_daily"]["messages_per_run"] = bot.sent // args.repeat
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "date": today.isoformat(),
+            "olympiads": args.olympiads,
+            "profiles": args.profiles,
+            "users": args.users,
+            "subscriptions": len(subs),
+            "remind_mode": config.REMIND_MODE,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--olympiads", type=int, default=500)
+    p.add_argument("--profiles", type=int, default=25)
+    p.add_argument("--users", type=int, default=5000)
+    p.add_argument("--subs-per-user", type=int, default=8)
+    p.add_argument("--mode", choices=["WINDOW", "MILESTONES", "window", "milestones"], default=None)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", help="файл для JSON-результата (по умолчанию stdout)")
+    args = p.parse_args(argv)
+
+    report = json.dumps(run(args), ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
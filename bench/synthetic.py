@@ -0,0 +1,173 @@
+"""Генераторы синтетических данных для бенчмарков: книга Excel, база подписок, фейковый бот."""
+import random
+import re
+import sqlite3
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from openpyxl import Workbook
+
+HEADERS = [
+    "Название Олимпиады",
+    "Профиль предмета",
+    "Уровень олимпиады",
+    "Краткое описание",
+    "Ссылка на сайт олимпиады",
+    "Даты (формат: ДАТА/НАЗВАНИЕСОБЫТИЯ)",
+]
+
+LABELS = ["отборочный этап", "заключительный этап", "начало регистрации", "окончание регистрации", "финал", ""]
+
+
+def _fmt(d: date, rnd: random.Random) -> str:
+    """Дата в одном из поддерживаемых видов: dd.mm, dd.mm.yy, dd.mm.yyyy (с ведущим нулём и без)."""
+    kind = rnd.randrange(4)
+    if kind == 0:
+        return f"{d.day:02d}.{d.month:02d}"
+    if kind == 1:
+        return f"{d.day:02d}.{d.month:02d}.{d.year % 100:02d}"
+    if kind == 2:
+        return f"{d.day}.{d.month}.{d.year}"
+    return f"{d.day:02d}.{d.month:02d}.{d.year}"
+
+
+def _label(rnd: random.Random) -> str:
+    lab = rnd.choice(LABELS)
+    return f"/{lab}" if lab else ""
+
+
+def make_date_cell(rnd: random.Random, today: date) -> str:
+    """Ячейка «Даты» во всех форматах, которые понимает parse_dates_from_cell."""
+    if rnd.random() < 0.05:
+        return "ПОКА РАНО"
+    entries = []
+    for _ in range(rnd.randint(1, 4)):
+        start = today + timedelta(days=rnd.randint(-30, 200))
+        kind = rnd.randrange(5)
+        if kind == 0:
+            end = start + timedelta(days=rnd.randint(1, 5))
+            sep = rnd.choice(["–", "—", "-", " - "])
+            entries.append(f"{_fmt(start, rnd)}{sep}{_fmt(end, rnd)}{_label(rnd)}")
+        elif kind == 1:
+            end = start + timedelta(days=rnd.randint(1, 20))
+            entries.append(f"с {_fmt(start, rnd)} по {_fmt(end, rnd)}{_label(rnd)}")
+        else:
+            entries.append(f"{_fmt(start, rnd)}{_label(rnd)}")
+    text = entries[0]
+    for e in entries[1:]:
+        text += rnd.choice(["; ", "\n", ", ", ";\n"]) + e
+    return text
+
+
+def make_profiles(n: int) -> List[str]:
+    return [f"Профиль {i:03d}" for i in range(n)]
+
+
+def make_rows(n_olympiads: int, profiles: List[str], today: date, seed: int = 0) -> List[List]:
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n_olympiads):
+        profs = rnd.sample(profiles, k=min(len(profiles), rnd.choice([1, 1, 1, 2, 3])))
+        rows.append(
+            [
+                f"Олимпиада школьников №{i:05d}",
+                rnd.choice([", ", "; ", "/"]).join(profs),
+                rnd.randint(1, 3),
+                f"Организатор: университет №{rnd.randint(1, 200)}",
+                f"https://olymp{i}.example.org",
+                make_date_cell(rnd, today),
+            ]
+        )
+    return rows
+
+
+def write_workbook(path: str, rows: List[List]) -> None:
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(HEADERS)
+    for r in rows:
+        ws.append(r)
+    wb.save(path)
+
+
+def rows_to_olympiads(rows: List[List]) -> List[Dict]:
+    """Записи каталога в формате app.excel_data.fetch_olympiads, без записи книги на диск."""
+    return [
+        {
+            "id": r[0],
+            "profiles": [p.strip() for p in re.split(r"[;,/]", r[1]) if p.strip()],
+            "name": r[0],
+            "date_desc": r[5],
+            "level": str(r[2]),
+            "description": r[3],
+            "link": r[4],
+        }
+        for r in rows
+    ]
+
+
+def make_subscriptions(
+    olympiads: List[Dict], n_users: int, subs_per_user: int = 8, seed: int = 0
+) -> List[Tuple[int, str, str, str]]:
+    """Подписки (user_id, olympiad_id, olympiad_name, profile): у каждого пользователя 1..2*subs_per_user."""
+    rnd = random.Random(seed)
+    keys = [(o["id"], o["name"], p) for o in olympiads for p in o["profiles"]]
+    subs = []
+    for u in range(n_users):
+        for oid, name, prof in rnd.sample(keys, k=min(len(keys), rnd.randint(1, 2 * subs_per_user))):
+            subs.append((100000 + u, oid, name, prof))
+    return subs
+
+
+def make_subscriptions_db(
+    path: str,
+    olympiads: List[Dict],
+    n_users: int,
+    subs_per_user: int = 8,
+    seed: int = 0,
+) -> None:
+    """База в схеме app.database с n_users пользователями и ~subs_per_user подписками у каждого."""
+    from app import config, database
+
+    old_db = config.DB_FILE
+    config.DB_FILE = path
+    try:
+        database.init_db()
+    finally:
+        config.DB_FILE = old_db
+    conn = sqlite3.connect(path)
+    try:
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (user_id, first_name, username, joined_at) VALUES (?,?,?,?)",
+            [(100000 + u, f"user{u}", "", "") for u in range(n_users)],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO subscriptions (user_id, olympiad_id, olympiad_name, profile) VALUES (?,?,?,?)",
+            make_subscriptions(olympiads, n_users, subs_per_user, seed),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class FakeBot:
+    """Минимальная замена telegram.Bot: считает отправленные сообщения, ничего не шлёт."""
+
+    def __init__(self, fail_every: Optional[int] = None):
+        self.sent = 0
+        self.chars = 0
+        self.fail_every = fail_every
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        self.sent += 1
+        self.chars += len(text)
+        if self.fail_every and self.sent % self.fail_every == 0:
+            from telegram.error import Forbidden
+
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        return None
+
+
+class FakeContext:
+    def __init__(self, bot):
+        self.bot = bot
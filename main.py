@@ -3,48 +3,93 @@
 
 - app.config       — настройки из .env
 - app.database     — SQLite (пользователи, подписки)
-- app.excel_data   — чтение списка олимпиад из Excel
+- app.subindex     — индекс подписок в памяти (пользователь -> ключи, ключ -> пользователи)
+- app.excel_data   — чтение списка олимпиад из таблицы (xlsx/csv/json)
+- app.catalog      — каталог олимпиад в памяти (перечитывается при изменении файла)
+- app.changes      — уведомления подписчикам об изменившихся датах в таблице
+- app.warmup       — фоновые миграция БД и загрузка каталога после старта
 - app.dates        — разбор дат из ячеек
 - app.keyboards    — инлайн-клавиатуры
 - app.ui           — безопасное редактирование сообщений, чанкинг текста
 - app.reminders    — построение и рассылка ежедневных напоминаний
+- app.simulation   — симуляция рассылки на диапазоне дат
+- app.plans        — кэш планов напоминаний по дням (/testnotify, /preview)
+- app.delivery     — отправка массовых сообщений
+- app.ratelimit    — общий лимит запросов к Bot API с приоритетом ответов пользователям
+- app.broadcasts   — рассылки-кампании в фоне с продолжением после рестарта
+- app.archive      — перенос подписок на прошедшие олимпиады в архив
+- app.metrics      — метрики и эндпоинт /metrics
+- app.profiling    — профилирование по запросу
+- app.logs         — логирование через очередь, JSON-события с прореживанием
 - app.handlers     — обработчики команд и колбэков
 """
 import logging
+from typing import Optional
 
 from telegram.error import Conflict
 from telegram.ext import Application, ApplicationBuilder
 
-from app import config
-from app.database import init_db
+from app import archive, changes, config, logs, metrics, warmup
 from app.handlers import register_handlers
+from app.ratelimit import PriorityRateLimiter
 from app.reminders import fallback_daily_scheduler, send_daily
 
 
 async def _post_init(app: Application):
-    """Запускаем fallback-планировщик, если нет JobQueue (не установлен python-telegram-bot[job-queue])."""
+    """Запускаем прогрев (миграция БД, загрузка каталога), fallback-планировщик, если нет JobQueue
+    (не установлен python-telegram-bot[job-queue]), и эндпоинт метрик, если задан METRICS_PORT."""
+    app.create_task(warmup.run(app))
     if getattr(app, "job_queue", None) is None:
         app.create_task(fallback_daily_scheduler(app, config.NOTIFY_TIME))
+        if config.ARCHIVE_AT:
+            app.create_task(fallback_daily_scheduler(app, config.ARCHIVE_AT, archive.job))
+        if config.CATALOG_WATCH_SECONDS:
+            app.create_task(changes.watch(app))
         logging.warning("JobQueue не найден — используется fallback-планировщик.")
     else:
         logging.info("JobQueue доступен — используется стандартный планировщик.")
+    if config.METRICS_PORT:
+        app.create_task(metrics.serve(config.METRICS_HOST, config.METRICS_PORT))
+
+
+def build_app(token: Optional[str] = None, base_url: Optional[str] = None) -> Application:
+    """Application с хендлерами и ежедневными задачами.
+
+    base_url — адрес Bot API (по умолчанию TELEGRAM_API_URL, пусто — api.telegram.org): локальный
+    Bot API сервер или заглушка из bench/fake_bot_api.py для нагрузочных прогонов.
+    """
+    builder = ApplicationBuilder().token(token or config.TELEGRAM_TOKEN).post_init(_post_init)
+    base_url = (base_url or config.TELEGRAM_API_URL).rstrip("/")
+    if base_url:
+        builder = builder.base_url(f"{base_url}/bot").base_file_url(f"{base_url}/file/bot")
+    if config.BOT_API_RATE > 0:
+        builder = builder.rate_limiter(PriorityRateLimiter(config.BOT_API_RATE, config.INTERACTIVE_SHARE))
+    app = builder.build()
+    register_handlers(app)
+    if getattr(app, "job_queue", None) is not None:
+        app.job_queue.run_daily(send_daily, time=config.NOTIFY_TIME, name="send_daily_job")
+        if config.ARCHIVE_AT:
+            app.job_queue.run_daily(archive.job, time=config.ARCHIVE_AT, name="archive_job")
+        if config.CATALOG_WATCH_SECONDS:
+            app.job_queue.run_repeating(
+                changes.job, interval=config.CATALOG_WATCH_SECONDS, first=0, name="catalog_changes_job"
+            )
+    return app
 
 
 def main():
-    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
+    logs.setup()
     if not config.TELEGRAM_TOKEN:
         raise SystemExit(
             "TELEGRAM_TOKEN не задан. Скопируйте .env.example в .env и укажите токен от @BotFather."
         )
-    init_db()
-    app = ApplicationBuilder().token(config.TELEGRAM_TOKEN).post_init(_post_init).build()
-    register_handlers(app)
-    if getattr(app, "job_queue", None) is not None:
-        app.job_queue.run_daily(send_daily, time=config.NOTIFY_TIME, name="send_daily_job")
+    app = build_app()
     try:
         app.run_polling(drop_pending_updates=True)
     except Conflict:
         logging.error("Запуск не удался: другой экземпляр бота уже запущен.")
+    if warmup.error is not None:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":